@@ -0,0 +1,43 @@
+import threading
+import time
+from typing import Dict, Any
+
+
+class MockLlm:
+    """
+    Deterministic local stand-in for LlmExtractor (no network, no API key).
+
+    Sleeps `latency_s` per call (cut short by `timeout_s`, like the real
+    extractor) and answers from the ground truth set with `answer_with()`;
+    fields it has no answer for come back as None. Counts calls and fields.
+    """
+
+    model = "mock-llm"
+
+    def __init__(self, latency_s: float = 0.0):
+        self.latency_s = latency_s
+        self.calls = 0
+        self.fields_requested = 0
+        self.timeouts = 0
+        self._answers: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def answer_with(self, expected: Dict[str, Any]):
+        self._answers = dict(expected)
+
+    def extract(self, pdf_text: str, extraction_schema: Dict[str, str], timeout_s: float | None = None) -> Dict[str, Any] | None:
+        with self._lock:
+            self.calls += 1
+            self.fields_requested += len(extraction_schema)
+
+        if timeout_s is not None and timeout_s < self.latency_s:
+            time.sleep(timeout_s)
+            with self._lock:
+                self.timeouts += 1
+            return None
+
+        time.sleep(self.latency_s)
+        return {field: self._answers.get(field) for field in extraction_schema}
+
+    def stats(self) -> Dict[str, int]:
+        return {"calls": self.calls, "fields_requested": self.fields_requested, "timeouts": self.timeouts}
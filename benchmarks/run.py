@@ -0,0 +1,186 @@
+"""
+Reproducible end-to-end benchmark.
+
+    python -m benchmarks.run --documents 50 --pages 3 --words-per-page 400 --llm-latency 0.3 --output bench.json
+    python -m benchmarks.run ... --compare bench.json --tolerance 0.2
+
+Generates a synthetic corpus, runs Orchestrator.run_document on every PDF
+against MockLlm and a fresh cache, and writes one JSON report. With
+--compare, the run is checked against a previous report and the exit code is
+1 when a tracked metric regressed by more than --tolerance.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, Any, List
+
+import fitz  # PyMuPDF
+
+from src.extraction_pipeline.cache_store import SqliteCacheStore
+from src.extraction_pipeline.orchestrator import Orchestrator
+from src.extraction_pipeline.stats import percentile
+from src.extraction_pipeline.telemetry import configure_logging
+from src.extraction_pipeline.extractors.cache_extractor import CacheExtractor
+from src.extraction_pipeline.extractors.heuristic_extractor import HeuristicExtractor
+from .mock_llm import MockLlm
+from .synthetic import generate_corpus, GENERATORS
+
+# (path in the report, True when higher is better)
+TRACKED_METRICS = [
+    (("docs_per_s",), True),
+    (("latency_s", "p50"), False),
+    (("latency_s", "p95"), False),
+    (("llm", "calls"), False),
+    (("memory", "max_rss_mb"), False),
+    (("memory", "tracemalloc_peak_mb"), False),
+]
+
+
+def _distribution(values: List[float]) -> Dict[str, float]:
+    return {
+        "p50": round(percentile(values, 50), 6),
+        "p95": round(percentile(values, 95), 6),
+        "p99": round(percentile(values, 99), 6),
+        "max": round(max(values), 6) if values else 0.0,
+        "total": round(sum(values), 6),
+    }
+
+
+def _max_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024, 2)
+
+
+def run_benchmark(documents: int = 20, pages: int = 1, words_per_page: int = 60, llm_latency_s: float = 0.0,
+                  labels: List[str] | None = None, passes: int = 1, budget_s: float | None = None, seed: int = 0,
+                  work_dir: str | None = None, verbose: bool = False, trace_memory: bool = False) -> Dict[str, Any]:
+    """
+    Runs the benchmark and returns the report (see module docstring).
+    `trace_memory` adds the Python heap peak (tracemalloc); it slows every stage
+    down several times, so latencies of such a run are not comparable.
+    """
+    with tempfile.TemporaryDirectory(dir=work_dir) as tmp:
+        corpus = generate_corpus(os.path.join(tmp, "pdfs"), documents, labels, pages, words_per_page, seed)
+        llm = MockLlm(latency_s=llm_latency_s)
+
+        latencies: List[float] = []
+        stage_times: Dict[str, List[float]] = {}
+        fields = correct = timed_out = pages_read = 0
+
+        if trace_memory:
+            tracemalloc.start()
+        start_time = time.perf_counter()
+        with open(os.devnull, "w") as devnull, \
+                (contextlib.nullcontext() if verbose else contextlib.redirect_stdout(devnull)):
+            cache = CacheExtractor(SqliteCacheStore(os.path.join(tmp, "cache.sqlite"), migrate_from=None))
+            orchestrator = Orchestrator(HeuristicExtractor(), cache, llm)
+            for _ in range(passes):
+                for doc in corpus:
+                    llm.answer_with(doc.expected)
+                    run = orchestrator.run_document(doc.label, doc.pdf_path, doc.schema, budget_s)
+                    latencies.append(run.time_taken)
+                    for stage, seconds in run.stage_times.items():
+                        stage_times.setdefault(stage, []).append(seconds)
+                    fields += len(doc.schema)
+                    correct += sum(1 for f, v in doc.expected.items() if run.result.get(f) == v)
+                    timed_out += len(run.timed_out_fields)
+                    pages_read += run.pages_read
+            cache.close()
+        wall_time = time.perf_counter() - start_time
+        memory = {"max_rss_mb": _max_rss_mb()}
+        if trace_memory:
+            memory["tracemalloc_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 3)
+            tracemalloc.stop()
+
+    processed = documents * passes
+    return {
+        "config": {
+            "documents": documents, "pages": pages, "words_per_page": words_per_page,
+            "llm_latency_s": llm_latency_s, "labels": labels or list(GENERATORS), "passes": passes,
+            "budget_s": budget_s, "seed": seed, "trace_memory": trace_memory,
+        },
+        "environment": {
+            "python": platform.python_version(), "platform": platform.platform(), "pymupdf": fitz.VersionBind,
+        },
+        "documents_processed": processed,
+        "wall_time_s": round(wall_time, 4),
+        "docs_per_s": round(processed / wall_time, 3) if wall_time > 0 else 0.0,
+        "latency_s": _distribution(latencies),
+        "stages_s": {stage: _distribution(values) for stage, values in sorted(stage_times.items())},
+        "llm": {**llm.stats(), "calls_per_doc": round(llm.calls / processed, 3) if processed else 0.0},
+        "pages_read_per_doc": round(pages_read / processed, 3) if processed else 0.0,
+        "accuracy": {"fields": fields, "correct": correct, "rate": round(correct / fields, 4) if fields else 0.0,
+                     "timed_out": timed_out},
+        "memory": memory,
+    }
+
+
+def _metric(report: Dict[str, Any], path) -> float | None:
+    value = report
+    for key in path:
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Returns one message per tracked metric that got worse than `tolerance` (relative)."""
+    regressions = []
+    for path, higher_is_better in TRACKED_METRICS:
+        new, old = _metric(report, path), _metric(baseline, path)
+        if new is None or old is None or old == 0:
+            continue
+        change = (new - old) / abs(old)
+        if (-change if higher_is_better else change) > tolerance:
+            regressions.append(f"{'.'.join(path)}: {old} -> {new} ({change:+.1%})")
+    return regressions
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the extraction pipeline on synthetic PDFs.")
+    parser.add_argument('--documents', type=int, default=20, help="Number of synthetic PDFs.")
+    parser.add_argument('--pages', type=int, default=1, help="Pages per PDF (fields are on page 1).")
+    parser.add_argument('--words-per-page', type=int, default=60, help="Word density of every page.")
+    parser.add_argument('--labels', type=str, nargs='+', choices=list(GENERATORS), help="Document types (round-robin).")
+    parser.add_argument('--llm-latency', type=float, default=0.0, help="Mock LLM latency per call (s).")
+    parser.add_argument('--passes', type=int, default=1, help="Times the corpus is processed (later passes hit the cache).")
+    parser.add_argument('--budget', type=float, help="Per-document time budget (s).")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', type=str, help="Write the JSON report here (default: stdout).")
+    parser.add_argument('--compare', type=str, help="Previous JSON report to check for regressions.")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed relative regression with --compare.")
+    parser.add_argument('--trace-memory', action='store_true', help="Also report the Python heap peak (slow; latencies not comparable).")
+    parser.add_argument('--verbose', action='store_true', help="Keep the pipeline's own logs.")
+    args = parser.parse_args(argv)
+    if args.verbose:
+        configure_logging("DEBUG")
+
+    report = run_benchmark(args.documents, args.pages, args.words_per_page, args.llm_latency, args.labels,
+                           args.passes, args.budget, args.seed, verbose=args.verbose,
+                           trace_memory=args.trace_memory)
+    rendered = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(rendered + "\n")
+    else:
+        print(rendered)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for message in regressions:
+            print(f"REGRESSION {message}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+import os
+import random
+from dataclasses import dataclass
+from typing import Dict, List
+import fitz  # PyMuPDF
+
+OAB_PAGE = (1056, 552)
+TELA_PAGE = (744, 591)
+
+FIRST_NAMES = ["JOANA", "LUIS", "MARIA", "PEDRO", "ANA", "CARLOS", "BEATRIZ", "RAFAEL"]
+LAST_NAMES = ["SILVA", "SOUZA", "ARAUJO", "AMARAL", "COSTA", "PEREIRA", "LIMA", "ROCHA"]
+UFS = {"PR": "PARANÁ", "SP": "SÃO PAULO", "RJ": "RIO DE JANEIRO", "MG": "MINAS GERAIS"}
+CATEGORIES = ["ADVOGADO", "ADVOGADA", "SUPLEMENTAR", "ESTAGIARIO", "ESTAGIARIA"]
+CITIES = ["Curitiba", "Londrina", "Mozarlândia", "Campinas", "Niterói"]
+PRODUCTS = ["CONSIGNADO", "CREDITO PESSOAL", "CARTAO", "FINANCIAMENTO"]
+FILLER = ("saldo parcela vencida juros multa encargos contrato operação cliente "
+          "valor total data registro histórico documento referência cobrança").split()
+
+OAB_SCHEMA = {
+    "nome": "Nome do profissional, normalmente no canto superior esquerdo da imagem",
+    "inscricao": "Número de inscrição do profissional",
+    "seccional": "Seccional do profissional",
+    "subsecao": "Subseção à qual o profissional faz parte",
+    "categoria": "Categoria, pode ser ADVOGADO, ADVOGADA, SUPLEMENTAR, ESTAGIARIO, ESTAGIARIA",
+    "endereco_profissional": "Endereço do profissional",
+    "telefone_profissional": "Telefone do profissional",
+    "situacao": "Situação do profissional, normalmente no canto inferior direito.",
+}
+
+TELA_SCHEMA = {
+    "pesquisa_por": "Pesquisa por",
+    "pesquisa_tipo": "Tipo de pesquisa",
+    "sistema": "Sistema da operação selecionada",
+    "data_base": "Data base da operação selecionada",
+    "produto": "Produto da operação selecionada",
+    "cidade": "Cidade do cliente",
+    "valor_parcela": "Valor da parcela",
+    "quantidade_parcelas": "Quantidade de parcelas da operação selecionada",
+}
+
+SCHEMAS = {"carteira_oab": OAB_SCHEMA, "tela_sistema": TELA_SCHEMA}
+
+
+@dataclass
+class SyntheticDocument:
+    label: str
+    pdf_path: str
+    schema: Dict[str, str]
+    expected: Dict[str, str]
+
+
+def _filler_text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(FILLER) for _ in range(words))
+
+
+def _fill_box(page: fitz.Page, rect: fitz.Rect, text: str):
+    """Writes `text` into `rect`, shrinking the font until it fits."""
+    if not text:
+        return
+    for fontsize in (8, 6, 5, 4, 3, 2, 1.5, 1):
+        if page.insert_textbox(rect, text, fontsize=fontsize) >= 0:
+            return
+    print(f"[synthetic] Filler did not fit in {rect}; it was truncated.")
+
+
+def _add_filler_pages(doc: fitz.Document, rng: random.Random, size, pages: int, words_per_page: int):
+    width, height = size
+    for _ in range(pages - 1):
+        page = doc.new_page(width=width, height=height)
+        _fill_box(page, fitz.Rect(20, 20, width - 20, height - 20), _filler_text(rng, words_per_page))
+
+
+def make_oab(path: str, rng: random.Random, pages: int = 1, words_per_page: int = 60) -> Dict[str, str]:
+    """carteira_oab-like card. Returns the ground truth of the schema fields."""
+    uf = rng.choice(list(UFS))
+    street_no = rng.randint(10, 9999)
+    expected = {
+        "nome": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        "inscricao": str(rng.randint(100000, 999999)),
+        "seccional": uf,
+        "subsecao": f"CONSELHO SECCIONAL - {UFS[uf]}",
+        "categoria": rng.choice(CATEGORIES),
+        "endereco_profissional": f"AVENIDA BRASIL, Nº {street_no} CENTRO",
+        "telefone_profissional": f"(41) 9{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}",
+        "situacao": "SITUAÇÃO REGULAR",
+    }
+
+    doc = fitz.open()
+    page = doc.new_page(width=OAB_PAGE[0], height=OAB_PAGE[1])
+    page.insert_text((5, 34), expected["nome"], fontsize=28)
+    for x, label in ((5, "Inscrição"), (156, "Seccional"), (305, "Subseção")):
+        page.insert_text((x, 137), label, fontsize=20)
+    page.insert_text((8, 167), expected["inscricao"], fontsize=18)
+    page.insert_text((156, 167), expected["seccional"], fontsize=18)
+    page.insert_text((305, 167), expected["subsecao"], fontsize=18)
+    page.insert_text((6, 200), expected["categoria"], fontsize=18)
+    page.insert_text((6, 252), "Endereço Profissional", fontsize=20)
+    page.insert_text((6, 282), expected["endereco_profissional"], fontsize=18)
+    page.insert_text((5, 409), "Telefone Profissional", fontsize=20)
+    page.insert_text((5, 438), expected["telefone_profissional"], fontsize=18)
+    page.insert_text((770, 507), expected["situacao"], fontsize=24)
+    filler_words = max(0, words_per_page - 30)
+    _fill_box(page, fitz.Rect(620, 40, 1040, 440), _filler_text(rng, filler_words))
+
+    _add_filler_pages(doc, rng, OAB_PAGE, pages, words_per_page)
+    doc.save(path)
+    doc.close()
+    return expected
+
+
+def make_tela(path: str, rng: random.Random, pages: int = 1, words_per_page: int = 60) -> Dict[str, str]:
+    """tela_sistema-like screen: 'Label: value' pairs plus filler text. Returns the ground truth."""
+    expected = {
+        "pesquisa_por": "CLIENTE",
+        "pesquisa_tipo": "CPF",
+        "sistema": rng.choice(PRODUCTS[:1] + ["Todos"]),
+        "data_base": f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2025",
+        "produto": rng.choice(PRODUCTS),
+        "cidade": rng.choice(CITIES),
+        "valor_parcela": f"{rng.randint(100, 9999)},{rng.randint(0, 99):02d}",
+        "quantidade_parcelas": str(rng.randint(1, 96)),
+    }
+
+    doc = fitz.open()
+    page = doc.new_page(width=TELA_PAGE[0], height=TELA_PAGE[1])
+    page.insert_text((236, 14), "Consulta de Cobrança", fontsize=12)
+    pairs = [
+        ((6, 40), f"Pesquisar por: {expected['pesquisa_por']}"),
+        ((200, 40), f"Tipo: {expected['pesquisa_tipo']}"),
+        ((335, 40), f"Sistema: {expected['sistema']}"),
+        ((6, 70), f"Data Base: {expected['data_base']}"),
+        ((200, 70), f"Produto: {expected['produto']}"),
+        ((6, 100), f"Cidade: {expected['cidade']}"),
+        ((200, 100), f"Valor Parcela: {expected['valor_parcela']}"),
+        ((6, 130), f"Quantidade de parcelas {expected['quantidade_parcelas']}"),
+    ]
+    for point, text in pairs:
+        page.insert_text(point, text, fontsize=10)
+    filler_words = max(0, words_per_page - 25)
+    _fill_box(page, fitz.Rect(6, 160, TELA_PAGE[0] - 6, TELA_PAGE[1] - 10), _filler_text(rng, filler_words))
+
+    _add_filler_pages(doc, rng, TELA_PAGE, pages, words_per_page)
+    doc.save(path)
+    doc.close()
+    return expected
+
+
+GENERATORS = {"carteira_oab": make_oab, "tela_sistema": make_tela}
+
+
+def generate_corpus(out_dir: str, documents: int, labels: List[str] | None = None, pages: int = 1,
+                    words_per_page: int = 60, seed: int = 0) -> List[SyntheticDocument]:
+    """Writes `documents` PDFs (labels round-robin) to `out_dir`. Same seed, same corpus."""
+    labels = labels or list(GENERATORS)
+    rng = random.Random(seed)
+    os.makedirs(out_dir, exist_ok=True)
+
+    corpus = []
+    for i in range(documents):
+        label = labels[i % len(labels)]
+        path = os.path.join(out_dir, f"{label}_{i:05d}.pdf")
+        expected = GENERATORS[label](path, rng, pages=pages, words_per_page=words_per_page)
+        corpus.append(SyntheticDocument(label, path, dict(SCHEMAS[label]), expected))
+    return corpus
@@ -1,40 +1,120 @@
 import json
 import os
 import argparse
-from dotenv import load_dotenv
-from typing import List, Dict, Any
+import signal
+from collections import deque
+from typing import Dict, Any, Tuple, Iterator
 from src.extraction_pipeline.pdf_parser import PdfParser
 from src.extraction_pipeline.orchestrator import Orchestrator
 from src.extraction_pipeline.extractors.llm_extractor import LlmExtractor
+from src.extraction_pipeline.extractors import llm_transport
+from src.extraction_pipeline.extractors.llm_transport import TransportConfig
 from src.extraction_pipeline.extractors.heuristic_extractor import HeuristicExtractor
 from src.extraction_pipeline.extractors.cache_extractor import CacheExtractor
+from src.extraction_pipeline.stage_router import StageRouter
+from src.extraction_pipeline.batch_io import DatasetError, JsonlResultWriter, iter_dataset
+from src.extraction_pipeline.telemetry import REGISTRY, configure_logging
 
-def load_dataset(json_path: str) -> List[Dict[str, Any]]:
-    """Loads a dataset JSON file."""
-    try:
-        with open(json_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        print(f"Critical Error: dataset.json not found at '{json_path}'")
-        return []
-    except json.JSONDecodeError:
-        print(f"Critical Error: Failed to read JSON from '{json_path}'.")
-        return []
-
-def process_single_item(orchestrator: Orchestrator, label: str, pdf_path: str, schema: Dict[str, str]):
-    """Processes a single document and prints the result."""
+def resolve_dataset_item(item: Dict[str, Any]) -> Tuple[str, str, Dict[str, str]] | None:
+    """Validates a dataset entry and resolves its PDF path under data/."""
+    if not isinstance(item, dict):
+        print(f"Invalid item in dataset (not an object): {item}")
+        return None
+    label = item.get("label")
+    schema = item.get("extraction_schema")
+    pdf_rel_path = item.get("pdf_path") 
+    
+    if not all([label, schema, pdf_rel_path]):
+        print(f"Invalid item in dataset (missing data): {item}")
+        return None
+
+    pdf_filename = os.path.basename(pdf_rel_path)
+    pdf_abs_path = os.path.join("data", pdf_filename)
+    return label, pdf_abs_path, schema
+
+def iter_batch_items(dataset_path: str, start: int = 0) -> Iterator[Tuple[int, Tuple[str, str, Dict[str, str]]]]:
+    """Streams (input index, (label, pdf_path, schema)) for the valid items from `start` on."""
+    for index, item in iter_dataset(dataset_path, start):
+        resolved = resolve_dataset_item(item)
+        if not resolved:
+            continue
+        if not os.path.exists(resolved[1]):
+            print(f"Error: PDF not found at '{resolved[1]}'. Skipping.")
+            continue
+        yield index, resolved
+
+def report_result(writer: JsonlResultWriter | None, index: int, label: str, pdf_path: str, result: Dict[str, Any],
+                  time_taken: float):
+    """One finished document: a JSONL line with --output, the classic printout otherwise."""
+    if writer:
+        writer.write(index, {"label": label, "pdf_path": pdf_path, "result": result, "time_taken": round(time_taken, 4)})
+    else:
+        print(f"--- Extraction Result: {pdf_path} (Took {time_taken:.4f}s) ---")
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+
+def run_parallel_batch(orchestrator: Orchestrator, items: Iterator[Tuple[int, Tuple[str, str, Dict[str, str]]]],
+                       workers: int, llm_concurrency: int, llm_batch_size: int = 1, budget_s: float | None = None,
+                       writer: JsonlResultWriter | None = None):
+    """Runs the batch through the BatchRunner; results are reported in input order as they complete."""
+    from src.extraction_pipeline.batch_runner import BatchRunner
+
+    # The runner yields in input order, so input indices can ride alongside in a FIFO.
+    indices = deque()
+
+    def runner_items():
+        for index, item in items:
+            indices.append(index)
+            yield item
+
+    runner = BatchRunner(orchestrator, workers=workers, llm_concurrency=llm_concurrency, llm_batch_size=llm_batch_size,
+                         budget_s=budget_s)
+    for (label, pdf_path, _), result, time_taken in runner.run(runner_items()):
+        report_result(writer, indices.popleft(), label, pdf_path, result, time_taken)
+
+    print("\n--- Batch Summary ---")
+    print(json.dumps(runner.summary.as_dict(), indent=2))
+
+def process_single_item(orchestrator: Orchestrator, label: str, pdf_path: str, schema: Dict[str, str],
+                        budget_s: float | None = None, writer: JsonlResultWriter | None = None, index: int = 0):
+    """Processes a single document and prints the result, per-stage timings and timed-out fields (or writes it to `writer`)."""
     if not os.path.exists(pdf_path):
         print(f"Error: PDF not found at '{pdf_path}'. Skipping.")
         return
 
-    result, time_taken = orchestrator.process_document(
+    run = orchestrator.run_document(
         label=label,
         pdf_path=pdf_path,
-        original_schema=schema
+        original_schema=schema,
+        budget_s=budget_s
     )
+    if writer:
+        report_result(writer, index, label, pdf_path, run.result, run.time_taken)
+        return
     
-    print(f"--- Extraction Result (Took {time_taken:.4f}s) ---")
-    print(json.dumps(result, indent=2, ensure_ascii=False))
+    print(f"--- Extraction Result (Took {run.time_taken:.4f}s) ---")
+    print(json.dumps(run.result, indent=2, ensure_ascii=False))
+    print("Stage times: " + ", ".join(f"{stage}={seconds:.4f}s" for stage, seconds in run.stage_times.items()))
+    if run.pages_read > 1:
+        print(f"Pages read: {run.pages_read}")
+    if run.timed_out_fields:
+        print(f"Timed out (budget {budget_s}s): {run.timed_out_fields}")
+
+def create_openai_client(transport: TransportConfig | None = None):
+    """
+    Builds the OpenAI client (API key from .env), on the pooled transport when
+    one is given. Handed to LlmExtractor as a factory so that dotenv/openai are
+    only imported when a document reaches Stage 3.
+    """
+    from dotenv import load_dotenv
+    load_dotenv()
+    if transport is not None:
+        return llm_transport.create_openai_client(transport)
+    from openai import OpenAI
+    return OpenAI()
+
+def _raise_keyboard_interrupt(signum, frame):
+    """SIGTERM stops serve mode the same way Ctrl+C does (cache flushed on the way out)."""
+    raise KeyboardInterrupt
 
 def main():
     """
@@ -42,25 +122,92 @@ def main():
     Sets up and runs the extraction pipeline.
     """
     print("--- Starting Extraction Application ---")
-    load_dotenv() 
 
     parser = argparse.ArgumentParser(description="Run the extraction pipeline.")
+    parser.add_argument('command', nargs='?', choices=['serve', 'stats'],
+                        help="'serve': keep the pipeline warm behind a local HTTP API. 'stats': print the per-(label, field, stage) routing statistics.")
+    parser.add_argument('--host', type=str, default="127.0.0.1", help="Serve mode: address to listen on.")
+    parser.add_argument('--port', type=int, default=8080, help="Serve mode: TCP port.")
+    parser.add_argument('--socket', type=str, help="Serve mode: listen on this Unix socket instead of TCP.")
     parser.add_argument('--file', type=str, help="Path to a single PDF file to process.")
     parser.add_argument('--label', type=str, help="The label for the single PDF file.")
     parser.add_argument('--schema', type=str, help="The extraction schema (as a JSON string).")
+    parser.add_argument('--input', type=str, default="data/dataset.json", help="Batch mode: dataset as JSON Lines or a JSON array (read as a stream).")
+    parser.add_argument('--output', type=str, help="Batch mode: write one JSON line per result here (plus a .checkpoint file).")
+    parser.add_argument('--resume', action='store_true', help="Batch mode: continue an interrupted --output run from its checkpoint.")
+    parser.add_argument('--workers', type=int, help="Batch mode: process pool size for parsing + heuristics.")
+    parser.add_argument('--llm-concurrency', type=int, default=4, help="Batch and serve modes: max concurrent LLM calls.")
+    parser.add_argument('--budget', type=float, help="Per-document time budget (s). Fields still missing when it runs out come back as null.")
+    parser.add_argument('--llm-timeout', type=float, help="Hard timeout (s) for each LLM call.")
+    parser.add_argument('--llm-hedge-percentile', type=float, help="Send a duplicate LLM request after this latency percentile (e.g. 95).")
+    parser.add_argument('--llm-connect-timeout', type=float, default=3.0, help="Connect timeout (s) of each LLM HTTP attempt.")
+    parser.add_argument('--llm-read-timeout', type=float, default=60.0, help="Read timeout (s) of each LLM HTTP attempt.")
+    parser.add_argument('--llm-retries', type=int, default=2, help="Extra attempts on retryable LLM errors (429, 5xx, connection), with jittered backoff.")
+    parser.add_argument('--llm-breaker-failures', type=int, default=5, help="Consecutive LLM failures that open the circuit breaker (0 disables it).")
+    parser.add_argument('--llm-breaker-reset', type=float, default=30.0, help="Seconds the open breaker waits before letting a probe request through.")
+    parser.add_argument('--no-llm-cache', action='store_true', help="Always call the LLM, even for a prompt it already answered.")
+    parser.add_argument('--llm-batch-size', type=int, default=1, help="Batch and serve modes: documents per LLM request (micro-batching).")
+    parser.add_argument('--llm-batch-window-ms', type=int, default=50, help="Batch mode: max wait to fill an LLM batch.")
+    parser.add_argument('--speculative-llm', action='store_true', help="Sequential batch and serve modes: start the LLM call for fields the heuristics usually miss while they still run.")
+    parser.add_argument('--no-adaptive-routing', action='store_true', help="Run every stage for every field, even the ones that keep failing (stats are still recorded).")
+    parser.add_argument('--heuristic-rules', type=str, help="JSON file with the Stage 1 rules per label (default: extractors/heuristic_rules.json).")
+    parser.add_argument('--log-level', type=str, help="Pipeline logs to stderr at this level (DEBUG, INFO, WARNING). Silent by default.")
+    parser.add_argument('--metrics-out', type=str, help="Write metrics and per-document traces to this file at the end.")
+    parser.add_argument('--metrics-format', type=str, choices=["jsonl", "prometheus"], default="jsonl", help="Format of --metrics-out.")
     args = parser.parse_args()
+    configure_logging(args.log_level)
 
-    heuristic_ext = HeuristicExtractor()
+    heuristic_ext = HeuristicExtractor(args.heuristic_rules)
     cache_ext = CacheExtractor()
-    llm_ext = LlmExtractor(model="gpt-5-mini")
+    router = StageRouter(cache_ext.store, adaptive=not args.no_adaptive_routing)
+    if args.command == "stats":
+        print(router.format_table(args.label))
+        cache_ext.close()
+        return
+
+    transport = TransportConfig(
+        max_connections=2 * args.llm_concurrency,
+        connect_timeout_s=args.llm_connect_timeout,
+        read_timeout_s=args.llm_read_timeout,
+        max_retries=args.llm_retries,
+        breaker_failures=args.llm_breaker_failures,
+        breaker_reset_s=args.llm_breaker_reset
+    )
+    llm_ext = LlmExtractor(
+        model="gpt-5-mini",
+        max_concurrency=args.llm_concurrency,
+        timeout_s=args.llm_timeout,
+        hedge_percentile=args.llm_hedge_percentile,
+        client_factory=lambda: create_openai_client(transport),
+        response_cache=None if args.no_llm_cache else cache_ext.store,
+        transport=transport
+    )
+    
+    if (args.workers or args.command == "serve") and args.llm_batch_size > 1:
+        from src.extraction_pipeline.extractors.llm_batcher import LlmBatcher
+        llm_ext = LlmBatcher(llm_ext, max_batch_size=args.llm_batch_size, window_s=args.llm_batch_window_ms / 1000)
     
     orchestrator = Orchestrator(
         heuristic_extractor=heuristic_ext,
         cache_extractor=cache_ext,
-        llm_extractor=llm_ext
+        llm_extractor=llm_ext,
+        speculative=args.speculative_llm,
+        router=router
     )
 
-    if args.file and args.label:
+    if args.command == "serve":
+        from src.extraction_pipeline.server import ExtractionServer
+        server = ExtractionServer(orchestrator, args.host, args.port, args.socket, default_budget_s=args.budget)
+        print(f"Running in SERVE mode on {server.address} (POST /extract, GET /health, /stats, /metrics)")
+        signal.signal(signal.SIGTERM, _raise_keyboard_interrupt)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("Shutting down server...")
+        finally:
+            server.shutdown()
+
+    elif args.file and args.label:
         print(f"Running in SINGLE FILE mode for: {args.file}")
         
         if not args.schema:
@@ -73,32 +220,45 @@ def main():
             print("Error: --schema argument is not valid JSON.")
             return
 
-        process_single_item(orchestrator, args.label, args.file, schema_dict)
+        process_single_item(orchestrator, args.label, args.file, schema_dict, args.budget)
 
     else:
-        print("Running in BATCH (dataset.json) mode...")
-        DATASET_PATH = "data/dataset.json"
-        dataset = load_dataset(DATASET_PATH)
-        if not dataset:
+        print(f"Running in BATCH ({args.input}) mode...")
+        if not os.path.exists(args.input):
+            print(f"Critical Error: dataset not found at '{args.input}'")
             print("Application shutting down due to dataset error.")
             return
+        if args.resume and not args.output:
+            print("Error: --resume needs the --output file of the run to continue.")
+            return
 
-        print(f"Items to process: {len(dataset)}")
-
-        for item in dataset:
-            label = item.get("label")
-            schema = item.get("extraction_schema")
-            pdf_rel_path = item.get("pdf_path") 
-            
-            pdf_filename = os.path.basename(pdf_rel_path)
-            pdf_abs_path = os.path.join("data", pdf_filename)
-            
-            if not all([label, schema, pdf_abs_path]):
-                print(f"Invalid item in dataset (missing data): {item}")
-                continue
+        try:
+            writer = JsonlResultWriter(args.output, resume=args.resume, input_path=args.input) if args.output else None
+        except DatasetError as e:
+            print(f"Error: {e}")
+            return
+        if writer and writer.next_index:
+            print(f"Resuming: skipping the first {writer.next_index} item(s).")
+        items = iter_batch_items(args.input, writer.next_index if writer else 0)
 
-            process_single_item(orchestrator, label, pdf_abs_path, schema)
+        try:
+            if args.workers:
+                run_parallel_batch(orchestrator, items, args.workers, args.llm_concurrency, args.llm_batch_size,
+                                   args.budget, writer)
+            else:
+                for index, (label, pdf_abs_path, schema) in items:
+                    process_single_item(orchestrator, label, pdf_abs_path, schema, args.budget, writer, index)
+        except DatasetError as e:
+            print(f"Critical Error: Failed to read '{args.input}': {e}")
+        finally:
+            if writer:
+                writer.close()
+                print(f"{writer.written} result(s) written to '{args.output}'.")
 
+    cache_ext.close()
+    if args.metrics_out:
+        REGISTRY.dump(args.metrics_out, args.metrics_format)
+        print(f"Metrics written to '{args.metrics_out}' ({args.metrics_format}).")
     print("\n--- Processing Finished ---")
 
 if __name__ == "__main__":
@@ -0,0 +1,184 @@
+import json
+import os
+import time
+from typing import Dict, Any, Iterator, Tuple
+
+from .telemetry import get_logger
+
+log = get_logger("batch_io")
+
+READ_CHUNK = 64 * 1024
+
+
+class DatasetError(ValueError):
+    """The dataset file is not a JSON array nor JSON Lines, or the checkpoint belongs to another input."""
+
+
+def iter_dataset(path: str, start: int = 0) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Yields (index, item) from a dataset file without loading it whole.
+    Accepts JSON Lines (one item per line) and the legacy JSON array
+    (dataset.json), detected from the first non-blank character. Items before
+    `start` are skipped without being kept. Broken JSONL lines are logged and
+    skipped, but still take their index so positions stay stable across runs.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        first = ""
+        while not first:
+            ch = f.read(1)
+            if not ch:
+                return
+            first = ch.strip()
+        f.seek(0)
+        items = _iter_json_array(f) if first == "[" else _iter_json_lines(f)
+        for index, item in enumerate(items):
+            if index >= start:
+                yield index, item
+
+
+def _iter_json_lines(f) -> Iterator[Dict[str, Any] | None]:
+    for line_no, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            log.warning("[BatchIO] Line %d is not valid JSON (%s). Skipping.", line_no, e)
+            yield None
+
+
+def _iter_json_array(f) -> Iterator[Dict[str, Any]]:
+    """Incremental parse of a top-level JSON array: only the current item (plus one read chunk) is in memory."""
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = "", 0, False
+    started = False
+    while True:
+        while pos < len(buffer) and (buffer[pos].isspace() or (started and buffer[pos] == ",")):
+            pos += 1
+        if pos < len(buffer):
+            if not started:
+                if buffer[pos] != "[":
+                    raise DatasetError("dataset is not a JSON array")
+                started, pos = True, pos + 1
+                continue
+            if buffer[pos] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as e:
+                if eof:
+                    raise DatasetError(f"invalid JSON in dataset array: {e}") from None
+            else:
+                # A number at the very end of the buffer may still be cut short.
+                if end < len(buffer) or eof:
+                    yield item
+                    pos = end
+                    continue
+        elif eof:
+            raise DatasetError("dataset JSON array is not closed")
+
+        chunk = f.read(READ_CHUNK)
+        buffer, pos = buffer[pos:] + chunk, 0
+        eof = not chunk
+
+
+class JsonlResultWriter:
+    """
+    Appends one JSON line per finished document and keeps a checkpoint next to
+    it (`<output>.checkpoint`): the next input index to process and the output
+    size at that point. Lines are flushed as they are written; the checkpoint is
+    rewritten atomically every `checkpoint_every` lines or `checkpoint_interval`
+    seconds, and on close().
+
+    With `resume`, the output is cut back to the checkpointed size (dropping
+    lines written after it, which will be redone) and `next_index` tells the
+    caller how many input items to skip. Results must be written in input order.
+    Without a checkpoint, an existing output is resumed after its last complete
+    line, never truncated; one with no result lines raises DatasetError.
+    """
+
+    def __init__(self, path: str, resume: bool = False, input_path: str | None = None,
+                 checkpoint_every: int = 100, checkpoint_interval: float = 1.0):
+        self.path = path
+        self.checkpoint_path = f"{path}.checkpoint"
+        self.input_path = os.path.abspath(input_path) if input_path else None
+        self.checkpoint_every = checkpoint_every
+        self.checkpoint_interval = checkpoint_interval
+        self.next_index = 0
+        self.written = 0
+
+        state = self._read_checkpoint() if resume else None
+        if resume and state is None and os.path.exists(path) and os.path.getsize(path):
+            state = self._state_from_output()
+            if state is None:
+                raise DatasetError(f"'{path}' has no checkpoint and no result lines to resume from")
+            log.warning("[BatchIO] No checkpoint for '%s'; rebuilt it from the output.", path)
+        if state:
+            if self.input_path and state.get("input") and state["input"] != self.input_path:
+                raise DatasetError(f"checkpoint '{self.checkpoint_path}' belongs to input '{state['input']}'")
+            self.next_index = state["next_index"]
+            self._f = open(path, 'r+b' if os.path.exists(path) else 'wb')
+            self._f.truncate(state["output_bytes"])
+            self._f.seek(0, os.SEEK_END)
+            log.info("[BatchIO] Resuming '%s' at input item %d.", path, self.next_index)
+        else:
+            self._f = open(path, 'wb')
+        self._since_checkpoint = 0
+        self._last_checkpoint = time.monotonic()
+        self.checkpoint()
+
+    def _read_checkpoint(self) -> Dict[str, Any] | None:
+        try:
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _state_from_output(self) -> Dict[str, Any] | None:
+        """Checkpoint rebuilt from the output: keeps every complete result line, resumes after the last one."""
+        next_index, output_bytes = None, 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    next_index = json.loads(line)["index"] + 1
+                except (ValueError, KeyError, TypeError):
+                    break
+                output_bytes += len(line)
+        if next_index is None:
+            return None
+        return {"input": None, "next_index": next_index, "output_bytes": output_bytes}
+
+    def write(self, index: int, record: Dict[str, Any]):
+        self._f.write((json.dumps({"index": index, **record}, ensure_ascii=False) + "\n").encode('utf-8'))
+        self._f.flush()
+        self.next_index = index + 1
+        self.written += 1
+        self._since_checkpoint += 1
+        if (self._since_checkpoint >= self.checkpoint_every
+                or time.monotonic() - self._last_checkpoint >= self.checkpoint_interval):
+            self.checkpoint()
+
+    def checkpoint(self):
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        state = {"input": self.input_path, "next_index": self.next_index, "output_bytes": self._f.tell()}
+        tmp_path = f"{self.checkpoint_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.checkpoint_path)
+        self._since_checkpoint = 0
+        self._last_checkpoint = time.monotonic()
+
+    def close(self):
+        if self._f.closed:
+            return
+        self.checkpoint()
+        self._f.close()
+
+    def __enter__(self) -> "JsonlResultWriter":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
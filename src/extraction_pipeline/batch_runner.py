@@ -0,0 +1,205 @@
+import random
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, Future
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Tuple, Iterator, Iterable
+
+from .pdf_parser import PdfParser
+from .stats import percentile
+from .time_budget import TimeBudget
+from .telemetry import DocumentTrace, get_logger
+from .orchestrator import Orchestrator, scan_pages
+from .extractors.heuristic_extractor import HeuristicExtractor
+
+BatchItem = Tuple[str, str, Dict[str, str]]  # (label, pdf_path, schema)
+
+_worker_heuristics: HeuristicExtractor | None = None
+
+# Latency samples kept for the percentiles (reservoir), whatever the batch size.
+MAX_LATENCY_SAMPLES = 100_000
+
+log = get_logger("batch_runner")
+
+
+def _init_worker(rules_path: str | None = None):
+    """Builds one HeuristicExtractor per worker process (rules compiled once)."""
+    global _worker_heuristics
+    _worker_heuristics = HeuristicExtractor(rules_path)
+
+
+def parse_and_run_heuristics(pdf_path: str, schema: Dict[str, str], budget_s: float | None = None,
+                             label: str | None = None, skip_fields: List[str] | None = None) -> Dict[str, Any]:
+    """
+    Worker-side half of the pipeline: PDF layout + Stage 1, page by page.
+    Runs in a child process and only returns picklable data.
+    `budget_s` is what is left of the document's budget when the job starts;
+    `skip_fields` are the fields the main process routed around Stage 1.
+    """
+    budget = TimeBudget(budget_s, DocumentTrace())
+    heuristics = _worker_heuristics or HeuristicExtractor()
+    scan = scan_pages(heuristics, PdfParser(pdf_path), schema, budget, label, skip_fields or ())
+
+    if not scan.pdf_text or not scan.first_page_words:
+        return {"ok": False, "elapsed": budget.elapsed(), "stage_times": budget.stage_times,
+                "spans": budget.trace.spans, "pages_read": scan.pages_read}
+
+    return {
+        "ok": True,
+        "pdf_text": scan.pdf_text,
+        "pdf_words": scan.first_page_words,
+        "stage_1_results": scan.stage_1_results,
+        "remaining_schema": scan.remaining_schema,
+        "elapsed": budget.elapsed(),
+        "stage_times": budget.stage_times,
+        "spans": budget.trace.spans,
+        "pages_read": scan.pages_read,
+    }
+
+
+def _is_done(outcome: Future | Tuple[Dict[str, Any], float]) -> bool:
+    return not isinstance(outcome, Future) or outcome.done()
+
+
+@dataclass
+class BatchSummary:
+    """Aggregate throughput numbers for one batch run."""
+    documents: int = 0
+    wall_time: float = 0.0
+    latencies: List[float] = field(default_factory=list)
+
+    def record(self, latency: float):
+        """Counts one document; latencies beyond MAX_LATENCY_SAMPLES go through reservoir sampling."""
+        self.documents += 1
+        if len(self.latencies) < MAX_LATENCY_SAMPLES:
+            self.latencies.append(latency)
+        else:
+            slot = random.randrange(self.documents)
+            if slot < MAX_LATENCY_SAMPLES:
+                self.latencies[slot] = latency
+
+    @property
+    def docs_per_second(self) -> float:
+        return self.documents / self.wall_time if self.wall_time > 0 else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "documents": self.documents,
+            "wall_time_s": round(self.wall_time, 4),
+            "docs_per_s": round(self.docs_per_second, 3),
+            "latency_p50_s": round(percentile(self.latencies, 50), 4),
+            "latency_p95_s": round(percentile(self.latencies, 95), 4),
+        }
+
+
+class BatchRunner:
+    """
+    Parallel batch mode.
+
+    - Stage 0 runs in the main process (hash only, no PDF layout).
+    - PDF parsing + Stage 1 run in a process pool (`workers`).
+    - Stage 2 + Stage 3 run in a thread pool; the LLM calls themselves are
+      bounded by the LlmExtractor's own concurrency limit. With an LlmBatcher,
+      the pool is sized so that full batches can actually form.
+    The CacheExtractor only lives in the main process, behind its lock.
+    Items are pulled lazily and at most `max_in_flight` documents are queued
+    at once, so memory does not grow with the size of the input.
+    """
+
+    def __init__(self, orchestrator: Orchestrator, workers: int = 4, llm_concurrency: int = 4, llm_batch_size: int = 1,
+                 budget_s: float | None = None, max_in_flight: int | None = None):
+        self.orchestrator = orchestrator
+        self.budget_s = budget_s
+        self.workers = max(1, workers)
+        self.llm_concurrency = max(1, llm_concurrency)
+        self.llm_batch_size = max(1, llm_batch_size)
+        self.max_in_flight = max_in_flight or 4 * (self.workers + self.llm_concurrency * self.llm_batch_size)
+
+    def _finish(self, label: str, parser: PdfParser, stage_0: Tuple[str, Dict[str, Any], Dict[str, str]],
+                schema: Dict[str, str], budget: TimeBudget, parsed: Future,
+                stage_1_tried: List[str]) -> Tuple[Dict[str, Any], float]:
+        worker_result = parsed.result()
+        start_time = time.perf_counter()
+        pdf_hash, cached_results, _ = stage_0
+        for stage, seconds in worker_result["stage_times"].items():
+            budget.stage_times[stage] = budget.stage_times.get(stage, 0.0) + seconds
+        worker_start = start_time - worker_result["elapsed"]
+        for span in worker_result["spans"]:
+            budget.trace.add_span(span["name"], worker_start + span["start_s"], span["duration_s"], process="worker")
+
+        if not worker_result["ok"]:
+            log.warning("[BatchRunner] Failed to extract text/words for hash %s.", pdf_hash[:10])
+            result = {f: cached_results.get(f) for f in schema}
+            self.orchestrator.finish_document(budget, schema, result, worker_result["pages_read"])
+            return result, worker_result["elapsed"]
+
+        self.orchestrator.record_stage_1(label, stage_1_tried, worker_result["stage_1_results"], budget)
+        final_results = self.orchestrator.resolve_remaining(
+            label,
+            pdf_hash,
+            worker_result["pdf_text"],
+            schema,
+            worker_result["stage_1_results"],
+            worker_result["remaining_schema"],
+            parser.get_quick_fingerprint(),
+            cached_results,
+            budget,
+            worker_result["pdf_words"]
+        )
+        self.orchestrator.finish_document(budget, schema, final_results, worker_result["pages_read"])
+        return final_results, worker_result["elapsed"] + (time.perf_counter() - start_time)
+
+    def _stage_0(self, label: str, pdf_path: str, schema: Dict[str, str]) -> Tuple[PdfParser, Tuple[str, Dict[str, Any], Dict[str, str]], TimeBudget]:
+        budget = self.orchestrator.new_budget(label, pdf_path, self.budget_s)
+        parser = PdfParser(pdf_path)
+        with budget.stage("stage_0"):
+            stage_0 = self.orchestrator.check_stage_0(parser, schema, budget)
+        return parser, stage_0, budget
+
+    def run(self, items: Iterable[BatchItem]) -> Iterator[Tuple[BatchItem, Dict[str, Any], float]]:
+        """
+        Processes all items and yields (item, result, time_taken) in INPUT order.
+        `self.summary` holds the aggregate numbers once the generator is exhausted.
+        """
+        self.summary = BatchSummary()
+        batch_start = time.perf_counter()
+
+        log.info("[BatchRunner] Starting: %d worker(s), LLM concurrency %d, up to %d document(s) in flight.",
+                 self.workers, self.llm_concurrency, self.max_in_flight)
+
+        rules_path = getattr(self.orchestrator.heuristic_extractor, "rules_path", None)
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=(rules_path,)) as process_pool, \
+             ThreadPoolExecutor(max_workers=self.workers + self.llm_concurrency * self.llm_batch_size) as finish_pool:
+
+            pending: deque[Tuple[BatchItem, Future | Tuple[Dict[str, Any], float]]] = deque()
+
+            def next_done():
+                item, outcome = pending.popleft()
+                result, time_taken = outcome.result() if isinstance(outcome, Future) else outcome
+                self.summary.record(time_taken)
+                return item, result, time_taken
+
+            for item in items:
+                label, pdf_path, schema = item
+                parser, stage_0, budget = self._stage_0(label, pdf_path, schema)
+                _, cached_results, schema_to_resolve = stage_0
+
+                if not schema_to_resolve:
+                    run = self.orchestrator.finish_document(budget, schema, cached_results)
+                    pending.append((item, (cached_results, run.time_taken)))
+                else:
+                    stage_1_tried, stage_1_skipped = self.orchestrator.plan_stage_1(label, schema_to_resolve)
+                    parsed = process_pool.submit(parse_and_run_heuristics, pdf_path, schema_to_resolve, budget.remaining(),
+                                                 label, stage_1_skipped)
+                    finished = finish_pool.submit(self._finish, label, parser, stage_0, schema, budget, parsed, stage_1_tried)
+                    pending.append((item, finished))
+
+                # Results stream out in input order as soon as the oldest document is done.
+                while pending and (len(pending) >= self.max_in_flight or _is_done(pending[0][1])):
+                    yield next_done()
+
+            while pending:
+                yield next_done()
+
+        self.summary.wall_time = time.perf_counter() - batch_start
+
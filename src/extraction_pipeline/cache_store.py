@@ -0,0 +1,719 @@
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Any, Tuple, List
+
+from .telemetry import get_logger
+
+FieldKey = Tuple[str, str]  # (field, description fingerprint)
+ContentValue = Tuple[Any, str | None]  # (value, source-word context)
+StageKey = Tuple[str, str, str]  # (label, field, stage)
+
+log = get_logger("cache_store")
+
+# Tables evicted by SqliteCacheStore, with their key and the (table, column) rows that live and die with an entry.
+EVICTED_TABLES = {
+    "hash_cache": ("pdf_hash", (("field_cache", "pdf_hash"), ("fingerprint_index", "pdf_hash"))),
+    "content_cache": ("content_hash", (("content_fields", "content_hash"), ("content_bands", "content_hash"))),
+    "llm_cache": ("prompt_key", ()),
+}
+# Keys per DELETE ... IN (...) statement (SQLite caps bound parameters).
+EVICT_CHUNK = 500
+
+class CacheStore(ABC):
+    """
+    Storage backend for the CacheExtractor (Stage 0 + Stage 2).
+    Every method works on a single entry, so backends can write in O(1).
+    A backend missing any abstract method fails when it is instantiated.
+    """
+
+    @abstractmethod
+    def get_hash(self, pdf_hash: str) -> Dict[str, Any] | None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def put_hash(self, pdf_hash: str, result: Dict[str, Any]):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_fields(self, pdf_hash: str, keys: List[FieldKey]) -> Dict[FieldKey, Any]:
+        """Returns the cached values for the (field, description fingerprint) keys that exist."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def put_fields(self, pdf_hash: str, values: Dict[FieldKey, Any]):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_fingerprint(self, fingerprint: str) -> str | None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def put_fingerprint(self, fingerprint: str, pdf_hash: str):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_content(self, content_hash: str, keys: List[FieldKey]) -> Dict[FieldKey, ContentValue]:
+        """Fields stored for this normalized-content hash: {key: (value, source-word context)}."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def put_content(self, content_hash: str, label: str, minhash: List[int], bands: List[str],
+                    values: Dict[FieldKey, ContentValue]):
+        raise NotImplementedError
+
+    @abstractmethod
+    def find_similar(self, label: str, bands: List[str]) -> List[Tuple[str, List[int]]]:
+        """(content_hash, minhash) of the documents of `label` sharing at least one LSH band."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_llm_response(self, prompt_key: str) -> str | None:
+        """Raw LLM answer stored for this (model, normalized prompt) key."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def put_llm_response(self, prompt_key: str, response: str):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_templates(self, label: str) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def put_template(self, label: str, field: str, value: Any):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_stage_stats(self) -> Dict[StageKey, Dict[str, Any]]:
+        """Every persisted per-(label, field, stage) outcome counter (one small row each)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def put_stage_stats(self, key: StageKey, stats: Dict[str, Any]):
+        raise NotImplementedError
+
+    def flush(self):
+        """Persists any buffered writes."""
+
+    def close(self):
+        self.flush()
+
+
+class JsonCacheStore(CacheStore):
+    """
+    Legacy backend: the whole cache lives in memory and cache_db.json is
+    rewritten (atomically) on every write. Fine for small runs and tests.
+    """
+
+    def __init__(self, path: str = "cache_db.json"):
+        self.path = path
+        self._lock = threading.RLock()
+        self.hash_cache, self.template_cache, self.fingerprint_index = load_json_cache(path)
+        self.field_cache = _load_json_section(path, "field_cache")
+        self.content_cache = _load_json_section(path, "content_cache")
+        self.llm_cache = _load_json_section(path, "llm_cache")
+        self.stage_stats = _load_json_section(path, "stage_stats")
+
+    def _save(self):
+        try:
+            with self._lock:
+                data = {
+                    "hash_cache": self.hash_cache,
+                    "template_cache": self.template_cache,
+                    "fingerprint_index": self.fingerprint_index,
+                    "field_cache": self.field_cache,
+                    "content_cache": self.content_cache,
+                    "llm_cache": self.llm_cache,
+                    "stage_stats": self.stage_stats
+                }
+                tmp_file = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, indent=2, ensure_ascii=False)
+                os.replace(tmp_file, self.path)
+        except IOError as e:
+            log.error("[CacheStore] Error saving cache: %s", e)
+
+    def get_hash(self, pdf_hash: str) -> Dict[str, Any] | None:
+        with self._lock:
+            return self.hash_cache.get(pdf_hash)
+
+    def put_hash(self, pdf_hash: str, result: Dict[str, Any]):
+        with self._lock:
+            self.hash_cache[pdf_hash] = result
+            self._save()
+
+    def get_fields(self, pdf_hash: str, keys: List[FieldKey]) -> Dict[FieldKey, Any]:
+        with self._lock:
+            doc_fields = self.field_cache.get(pdf_hash, {})
+            return {key: doc_fields[f"{key[0]}|{key[1]}"] for key in keys if f"{key[0]}|{key[1]}" in doc_fields}
+
+    def put_fields(self, pdf_hash: str, values: Dict[FieldKey, Any]):
+        with self._lock:
+            doc_fields = self.field_cache.setdefault(pdf_hash, {})
+            for (field, description_fp), value in values.items():
+                doc_fields[f"{field}|{description_fp}"] = value
+            self._save()
+
+    def get_fingerprint(self, fingerprint: str) -> str | None:
+        with self._lock:
+            return self.fingerprint_index.get(fingerprint)
+
+    def put_fingerprint(self, fingerprint: str, pdf_hash: str):
+        with self._lock:
+            self.fingerprint_index[fingerprint] = pdf_hash
+            self._save()
+
+    def get_content(self, content_hash: str, keys: List[FieldKey]) -> Dict[FieldKey, ContentValue]:
+        with self._lock:
+            doc_fields = self.content_cache.get(content_hash, {}).get("fields", {})
+            return {key: tuple(doc_fields[f"{key[0]}|{key[1]}"]) for key in keys if f"{key[0]}|{key[1]}" in doc_fields}
+
+    def put_content(self, content_hash: str, label: str, minhash: List[int], bands: List[str],
+                    values: Dict[FieldKey, ContentValue]):
+        with self._lock:
+            entry = self.content_cache.setdefault(content_hash, {"label": label, "minhash": minhash, "bands": bands, "fields": {}})
+            for (field, description_fp), value in values.items():
+                entry["fields"][f"{field}|{description_fp}"] = list(value)
+            self._save()
+
+    def find_similar(self, label: str, bands: List[str]) -> List[Tuple[str, List[int]]]:
+        wanted = set(bands)
+        with self._lock:
+            return [(h, entry["minhash"]) for h, entry in self.content_cache.items()
+                    if entry["label"] == label and wanted.intersection(entry["bands"])]
+
+    def get_llm_response(self, prompt_key: str) -> str | None:
+        with self._lock:
+            return self.llm_cache.get(prompt_key)
+
+    def put_llm_response(self, prompt_key: str, response: str):
+        with self._lock:
+            self.llm_cache[prompt_key] = response
+            self._save()
+
+    def get_templates(self, label: str) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.template_cache.get(label, {}))
+
+    def put_template(self, label: str, field: str, value: Any):
+        with self._lock:
+            self.template_cache.setdefault(label, {})[field] = value
+            self._save()
+
+    def get_stage_stats(self) -> Dict[StageKey, Dict[str, Any]]:
+        with self._lock:
+            return {tuple(key.split("|", 2)): dict(stats) for key, stats in self.stage_stats.items()}
+
+    def put_stage_stats(self, key: StageKey, stats: Dict[str, Any]):
+        with self._lock:
+            self.stage_stats["|".join(key)] = stats
+            self._save()
+
+
+class SqliteCacheStore(CacheStore):
+    """
+    SQLite (WAL) backend.
+
+    - Entries are read and written one row at a time; nothing is loaded up front,
+      so memory stays bounded no matter how many documents were cached.
+    - Writes are buffered and committed together every `flush_every` writes or
+      `flush_interval` seconds (write coalescing). Reads see buffered writes.
+    - WAL + busy_timeout make it safe to share the file between processes.
+    - hash_cache and content_cache are evicted LRU by `max_hash_entries` and/or `ttl_seconds`;
+      a file's field and fingerprint rows go with its hash_cache row, written for them if needed;
+      llm_cache by `max_llm_entries` and/or `llm_ttl_seconds` (answers go stale sooner).
+    - On first open, an existing cache_db.json is migrated once.
+    """
+
+    def __init__(self,
+                 db_path: str = "cache_db.sqlite",
+                 max_hash_entries: int | None = 1_000_000,
+                 ttl_seconds: float | None = None,
+                 flush_every: int = 64,
+                 flush_interval: float = 1.0,
+                 migrate_from: str | None = "cache_db.json",
+                 max_llm_entries: int | None = 100_000,
+                 llm_ttl_seconds: float | None = 7 * 24 * 3600):
+        self.db_path = db_path
+        self.max_hash_entries = max_hash_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_llm_entries = max_llm_entries
+        self.llm_ttl_seconds = llm_ttl_seconds
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+
+        self._lock = threading.RLock()
+        self._pending_hash: Dict[str, Tuple[str, float]] = {}
+        self._pending_touch: Dict[str, float] = {}
+        self._pending_fingerprint: Dict[str, str] = {}
+        self._pending_fields: Dict[Tuple[str, str, str], str] = {}
+        self._pending_template: Dict[Tuple[str, str], str] = {}
+        self._pending_content: Dict[str, Tuple[str, str, List[str], float]] = {}
+        self._pending_content_fields: Dict[Tuple[str, str, str], Tuple[str, str | None]] = {}
+        self._pending_content_touch: Dict[str, float] = {}
+        self._pending_llm: Dict[str, Tuple[str, float]] = {}
+        self._pending_llm_touch: Dict[str, float] = {}
+        self._pending_stage_stats: Dict[StageKey, str] = {}
+        self._last_flush = time.monotonic()
+        self._writes_since_eviction = 0
+
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_tables()
+        if migrate_from:
+            self._migrate_json(migrate_from)
+        atexit.register(self.close)
+
+    def _create_tables(self):
+        with self._lock:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS hash_cache (
+                    pdf_hash TEXT PRIMARY KEY,
+                    result TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_hash_cache_last_access ON hash_cache(last_access);
+                CREATE TABLE IF NOT EXISTS field_cache (
+                    pdf_hash TEXT NOT NULL,
+                    field TEXT NOT NULL,
+                    description_fp TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    PRIMARY KEY (pdf_hash, field, description_fp)
+                );
+                CREATE TABLE IF NOT EXISTS fingerprint_index (
+                    fingerprint TEXT PRIMARY KEY,
+                    pdf_hash TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_fingerprint_index_pdf_hash ON fingerprint_index(pdf_hash);
+                CREATE TABLE IF NOT EXISTS template_cache (
+                    label TEXT NOT NULL,
+                    field TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    PRIMARY KEY (label, field)
+                );
+                CREATE TABLE IF NOT EXISTS content_cache (
+                    content_hash TEXT PRIMARY KEY,
+                    label TEXT NOT NULL,
+                    minhash TEXT NOT NULL,
+                    last_access REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_content_cache_last_access ON content_cache(last_access);
+                CREATE TABLE IF NOT EXISTS content_fields (
+                    content_hash TEXT NOT NULL,
+                    field TEXT NOT NULL,
+                    description_fp TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    context TEXT,
+                    PRIMARY KEY (content_hash, field, description_fp)
+                );
+                CREATE TABLE IF NOT EXISTS content_bands (
+                    label TEXT NOT NULL,
+                    band TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    PRIMARY KEY (label, band, content_hash)
+                );
+                CREATE INDEX IF NOT EXISTS idx_content_bands_content_hash ON content_bands(content_hash);
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    prompt_key TEXT PRIMARY KEY,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache(last_access);
+                CREATE TABLE IF NOT EXISTS stage_stats (
+                    label TEXT NOT NULL,
+                    field TEXT NOT NULL,
+                    stage TEXT NOT NULL,
+                    stats TEXT NOT NULL,
+                    PRIMARY KEY (label, field, stage)
+                );
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                );
+                CREATE TABLE IF NOT EXISTS entry_counts (
+                    tbl TEXT PRIMARY KEY,
+                    n INTEGER NOT NULL
+                );
+            """)
+            # Running entry counts, kept by triggers so every process sharing the file sees the same numbers.
+            # Upserts that hit an existing key fire no INSERT trigger, so only new entries are counted.
+            for table in EVICTED_TABLES:
+                self._conn.executescript(f"""
+                    CREATE TRIGGER IF NOT EXISTS {table}_count_insert AFTER INSERT ON {table}
+                    BEGIN UPDATE entry_counts SET n = n + 1 WHERE tbl = '{table}'; END;
+                    CREATE TRIGGER IF NOT EXISTS {table}_count_delete AFTER DELETE ON {table}
+                    BEGIN UPDATE entry_counts SET n = n - 1 WHERE tbl = '{table}'; END;
+                """)
+            self._conn.execute("BEGIN IMMEDIATE")
+            for table in EVICTED_TABLES:
+                # New files, and files created before entry_counts existed, are counted once here.
+                if not self._conn.execute("SELECT 1 FROM entry_counts WHERE tbl = ?", (table,)).fetchone():
+                    self._conn.execute(f"INSERT INTO entry_counts SELECT ?, COUNT(*) FROM {table}", (table,))
+            self._conn.execute("COMMIT")
+
+    def _migrate_json(self, json_path: str):
+        """One-shot import of the legacy cache_db.json (guarded by a meta flag)."""
+        with self._lock:
+            done = self._conn.execute("SELECT value FROM meta WHERE key = 'migrated_json'").fetchone()
+            if done or not os.path.exists(json_path):
+                return
+
+            hash_cache, template_cache, fingerprint_index = load_json_cache(json_path)
+            now = time.time()
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO hash_cache VALUES (?, ?, ?, ?)",
+                    [(h, json.dumps(r, ensure_ascii=False), now, now) for h, r in hash_cache.items()]
+                )
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO fingerprint_index VALUES (?, ?)",
+                    list(fingerprint_index.items())
+                )
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO template_cache VALUES (?, ?, ?)",
+                    [(label, field, json.dumps(value, ensure_ascii=False))
+                     for label, rules in template_cache.items() for field, value in rules.items()]
+                )
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO field_cache VALUES (?, ?, ?, ?)",
+                    [(h, *key.split("|", 1), json.dumps(value, ensure_ascii=False))
+                     for h, doc_fields in _load_json_section(json_path, "field_cache").items()
+                     for key, value in doc_fields.items()]
+                )
+                self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('migrated_json', ?)", (json_path,))
+                self._conn.execute("COMMIT")
+            except sqlite3.Error:
+                self._conn.execute("ROLLBACK")
+                raise
+            log.info("[CacheStore] Migrated %d hash entries from '%s'.", len(hash_cache), json_path)
+
+    def _maybe_flush(self):
+        pending = (len(self._pending_hash) + len(self._pending_touch) + len(self._pending_fields)
+                   + len(self._pending_fingerprint) + len(self._pending_template)
+                   + len(self._pending_content) + len(self._pending_content_fields) + len(self._pending_content_touch)
+                   + len(self._pending_llm) + len(self._pending_llm_touch) + len(self._pending_stage_stats))
+        if pending >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            self._last_flush = time.monotonic()
+            if not (self._pending_hash or self._pending_touch or self._pending_fields
+                    or self._pending_fingerprint or self._pending_template
+                    or self._pending_content or self._pending_content_fields or self._pending_content_touch
+                    or self._pending_llm or self._pending_llm_touch or self._pending_stage_stats):
+                return
+
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO hash_cache VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(pdf_hash) DO UPDATE SET result = excluded.result, last_access = excluded.last_access",
+                    [(h, result, ts, ts) for h, (result, ts) in self._pending_hash.items()]
+                )
+                self._conn.executemany(
+                    "UPDATE hash_cache SET last_access = ? WHERE pdf_hash = ?",
+                    [(ts, h) for h, ts in self._pending_touch.items()]
+                )
+                # field_cache and fingerprint_index rows are evicted with their hash_cache row: make sure it exists.
+                now = time.time()
+                anchored = {h for h, _, _ in self._pending_fields} | set(self._pending_fingerprint.values())
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO hash_cache VALUES (?, '{}', ?, ?)",
+                    [(h, now, now) for h in anchored]
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO field_cache VALUES (?, ?, ?, ?)",
+                    [(h, field, description_fp, value) for (h, field, description_fp), value in self._pending_fields.items()]
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO fingerprint_index VALUES (?, ?)",
+                    list(self._pending_fingerprint.items())
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO template_cache VALUES (?, ?, ?)",
+                    [(label, field, value) for (label, field), value in self._pending_template.items()]
+                )
+                self._conn.executemany(
+                    "INSERT INTO content_cache VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(content_hash) DO UPDATE SET last_access = excluded.last_access",
+                    [(h, label, minhash, ts) for h, (label, minhash, _, ts) in self._pending_content.items()]
+                )
+                self._conn.executemany(
+                    "UPDATE content_cache SET last_access = ? WHERE content_hash = ?",
+                    [(ts, h) for h, ts in self._pending_content_touch.items()]
+                )
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO content_bands VALUES (?, ?, ?)",
+                    [(label, band, h) for h, (label, _, bands, _) in self._pending_content.items() for band in bands]
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO content_fields VALUES (?, ?, ?, ?, ?)",
+                    [(h, field, description_fp, value, context)
+                     for (h, field, description_fp), (value, context) in self._pending_content_fields.items()]
+                )
+                self._conn.executemany(
+                    "INSERT INTO llm_cache VALUES (?, ?, ?, ?) ON CONFLICT(prompt_key) DO UPDATE SET "
+                    "response = excluded.response, created_at = excluded.created_at, last_access = excluded.last_access",
+                    [(key, response, ts, ts) for key, (response, ts) in self._pending_llm.items()]
+                )
+                self._conn.executemany(
+                    "UPDATE llm_cache SET last_access = ? WHERE prompt_key = ?",
+                    [(ts, key) for key, ts in self._pending_llm_touch.items()]
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO stage_stats VALUES (?, ?, ?, ?)",
+                    [(*key, stats) for key, stats in self._pending_stage_stats.items()]
+                )
+                # Every document written counts, including those that only got field or fingerprint rows.
+                self._writes_since_eviction += (len(self._pending_hash.keys() | anchored)
+                                                + len(self._pending_content) + len(self._pending_llm))
+                if self._writes_since_eviction >= self.flush_every:
+                    self._evict()
+                    self._writes_since_eviction = 0
+                self._conn.execute("COMMIT")
+            except sqlite3.Error as e:
+                self._conn.execute("ROLLBACK")
+                log.error("[CacheStore] Error flushing cache: %s", e)
+                return
+
+            self._pending_hash.clear()
+            self._pending_touch.clear()
+            self._pending_fields.clear()
+            self._pending_fingerprint.clear()
+            self._pending_template.clear()
+            self._pending_content.clear()
+            self._pending_content_fields.clear()
+            self._pending_content_touch.clear()
+            self._pending_llm.clear()
+            self._pending_llm_touch.clear()
+            self._pending_stage_stats.clear()
+
+    def _evict(self):
+        """
+        LRU + TTL eviction for hash_cache, content_cache and llm_cache. Runs inside the flush transaction.
+        Sizes come from entry_counts and victims from the last_access indexes, so the cost follows the
+        number of evicted entries, not the size of the cache; only their dependent rows are deleted.
+        """
+        for table, max_entries, ttl in (("hash_cache", self.max_hash_entries, self.ttl_seconds),
+                                        ("content_cache", self.max_hash_entries, self.ttl_seconds),
+                                        ("llm_cache", self.max_llm_entries, self.llm_ttl_seconds)):
+            key = EVICTED_TABLES[table][0]
+            if ttl is not None:
+                self._delete_entries(table, [row[0] for row in self._conn.execute(
+                    f"SELECT {key} FROM {table} WHERE last_access < ?", (time.time() - ttl,))])
+            if max_entries is not None:
+                (count,) = self._conn.execute("SELECT n FROM entry_counts WHERE tbl = ?", (table,)).fetchone()
+                if count > max_entries:
+                    self._delete_entries(table, [row[0] for row in self._conn.execute(
+                        f"SELECT {key} FROM {table} ORDER BY last_access ASC LIMIT ?", (count - max_entries,))])
+
+    def _delete_entries(self, table: str, keys: List[str]):
+        """Deletes `keys` from `table` together with their rows in the dependent tables."""
+        key, dependents = EVICTED_TABLES[table]
+        for start in range(0, len(keys), EVICT_CHUNK):
+            chunk = keys[start:start + EVICT_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            self._conn.execute(f"DELETE FROM {table} WHERE {key} IN ({placeholders})", chunk)
+            for dependent, column in dependents:
+                self._conn.execute(f"DELETE FROM {dependent} WHERE {column} IN ({placeholders})", chunk)
+
+    def evict(self):
+        """Forces pending writes out and runs the eviction policy now."""
+        with self._lock:
+            self.flush()
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._evict()
+            self._conn.execute("COMMIT")
+
+    def _expired(self, table: str, key: str) -> bool:
+        """True when `ttl_seconds` ran out for entry `key` of hash_cache/content_cache (or it is not stored)."""
+        if self.ttl_seconds is None:
+            return False
+        row = self._conn.execute(f"SELECT last_access FROM {table} WHERE {EVICTED_TABLES[table][0]} = ?",
+                                 (key,)).fetchone()
+        return not row or row[0] < time.time() - self.ttl_seconds
+
+    def get_hash(self, pdf_hash: str) -> Dict[str, Any] | None:
+        with self._lock:
+            if pdf_hash in self._pending_hash:
+                return json.loads(self._pending_hash[pdf_hash][0])
+
+            row = self._conn.execute("SELECT result, last_access FROM hash_cache WHERE pdf_hash = ?", (pdf_hash,)).fetchone()
+            if not row:
+                return None
+            if self.ttl_seconds is not None and row[1] < time.time() - self.ttl_seconds:
+                return None
+
+            self._pending_touch[pdf_hash] = time.time()
+            self._maybe_flush()
+            return json.loads(row[0])
+
+    def put_hash(self, pdf_hash: str, result: Dict[str, Any]):
+        with self._lock:
+            self._pending_hash[pdf_hash] = (json.dumps(result, ensure_ascii=False), time.time())
+            self._maybe_flush()
+
+    def get_fields(self, pdf_hash: str, keys: List[FieldKey]) -> Dict[FieldKey, Any]:
+        with self._lock:
+            wanted = set(keys)
+            found = {}
+            rows = [] if self._expired("hash_cache", pdf_hash) else self._conn.execute(
+                "SELECT field, description_fp, value FROM field_cache WHERE pdf_hash = ?", (pdf_hash,)
+            ).fetchall()
+            for field, description_fp, value in rows:
+                if (field, description_fp) in wanted:
+                    found[(field, description_fp)] = json.loads(value)
+            for (pending_hash, field, description_fp), value in self._pending_fields.items():
+                if pending_hash == pdf_hash and (field, description_fp) in wanted:
+                    found[(field, description_fp)] = json.loads(value)
+
+            if found and pdf_hash not in self._pending_hash:
+                self._pending_touch[pdf_hash] = time.time()
+                self._maybe_flush()
+            return found
+
+    def put_fields(self, pdf_hash: str, values: Dict[FieldKey, Any]):
+        with self._lock:
+            for (field, description_fp), value in values.items():
+                self._pending_fields[(pdf_hash, field, description_fp)] = json.dumps(value, ensure_ascii=False)
+            self._maybe_flush()
+
+    def get_fingerprint(self, fingerprint: str) -> str | None:
+        with self._lock:
+            if fingerprint in self._pending_fingerprint:
+                return self._pending_fingerprint[fingerprint]
+            row = self._conn.execute("SELECT pdf_hash FROM fingerprint_index WHERE fingerprint = ?", (fingerprint,)).fetchone()
+            return row[0] if row else None
+
+    def put_fingerprint(self, fingerprint: str, pdf_hash: str):
+        with self._lock:
+            self._pending_fingerprint[fingerprint] = pdf_hash
+            self._maybe_flush()
+
+    def get_content(self, content_hash: str, keys: List[FieldKey]) -> Dict[FieldKey, ContentValue]:
+        with self._lock:
+            wanted = set(keys)
+            found = {}
+            rows = [] if self._expired("content_cache", content_hash) else self._conn.execute(
+                "SELECT field, description_fp, value, context FROM content_fields WHERE content_hash = ?", (content_hash,)
+            ).fetchall()
+            for field, description_fp, value, context in rows:
+                if (field, description_fp) in wanted:
+                    found[(field, description_fp)] = (json.loads(value), context)
+            for (pending_hash, field, description_fp), (value, context) in self._pending_content_fields.items():
+                if pending_hash == content_hash and (field, description_fp) in wanted:
+                    found[(field, description_fp)] = (json.loads(value), context)
+
+            if found and content_hash not in self._pending_content:
+                self._pending_content_touch[content_hash] = time.time()
+                self._maybe_flush()
+            return found
+
+    def put_content(self, content_hash: str, label: str, minhash: List[int], bands: List[str],
+                    values: Dict[FieldKey, ContentValue]):
+        with self._lock:
+            self._pending_content[content_hash] = (label, json.dumps(minhash), bands, time.time())
+            for (field, description_fp), (value, context) in values.items():
+                self._pending_content_fields[(content_hash, field, description_fp)] = (
+                    json.dumps(value, ensure_ascii=False), context)
+            self._maybe_flush()
+
+    def find_similar(self, label: str, bands: List[str]) -> List[Tuple[str, List[int]]]:
+        with self._lock:
+            candidates = {}
+            if bands:
+                placeholders = ",".join("?" * len(bands))
+                for content_hash, minhash in self._conn.execute(
+                    "SELECT DISTINCT c.content_hash, c.minhash FROM content_bands b "
+                    "JOIN content_cache c ON c.content_hash = b.content_hash "
+                    f"WHERE b.label = ? AND b.band IN ({placeholders})", (label, *bands)
+                ):
+                    candidates[content_hash] = json.loads(minhash)
+            wanted = set(bands)
+            for content_hash, (pending_label, minhash, pending_bands, _) in self._pending_content.items():
+                if pending_label == label and wanted.intersection(pending_bands):
+                    candidates[content_hash] = json.loads(minhash)
+            return list(candidates.items())
+
+    def get_llm_response(self, prompt_key: str) -> str | None:
+        with self._lock:
+            if prompt_key in self._pending_llm:
+                return self._pending_llm[prompt_key][0]
+            row = self._conn.execute("SELECT response, created_at FROM llm_cache WHERE prompt_key = ?",
+                                     (prompt_key,)).fetchone()
+            if not row:
+                return None
+            # The TTL runs from when the answer was produced, not from its last use.
+            if self.llm_ttl_seconds is not None and row[1] < time.time() - self.llm_ttl_seconds:
+                return None
+            self._pending_llm_touch[prompt_key] = time.time()
+            self._maybe_flush()
+            return row[0]
+
+    def put_llm_response(self, prompt_key: str, response: str):
+        with self._lock:
+            self._pending_llm[prompt_key] = (response, time.time())
+            self._maybe_flush()
+
+    def get_templates(self, label: str) -> Dict[str, Any]:
+        with self._lock:
+            rules = {field: json.loads(value) for field, value in
+                     self._conn.execute("SELECT field, value FROM template_cache WHERE label = ?", (label,))}
+            for (pending_label, field), value in self._pending_template.items():
+                if pending_label == label:
+                    rules[field] = json.loads(value)
+            return rules
+
+    def put_template(self, label: str, field: str, value: Any):
+        with self._lock:
+            self._pending_template[(label, field)] = json.dumps(value, ensure_ascii=False)
+            self._maybe_flush()
+
+    def get_stage_stats(self) -> Dict[StageKey, Dict[str, Any]]:
+        with self._lock:
+            rows = {(label, field, stage): json.loads(stats) for label, field, stage, stats in
+                    self._conn.execute("SELECT label, field, stage, stats FROM stage_stats")}
+            rows.update({key: json.loads(stats) for key, stats in self._pending_stage_stats.items()})
+            return rows
+
+    def put_stage_stats(self, key: StageKey, stats: Dict[str, Any]):
+        with self._lock:
+            self._pending_stage_stats[key] = json.dumps(stats)
+            self._maybe_flush()
+
+    def close(self):
+        with self._lock:
+            if self._conn is None:
+                return
+            self.flush()
+            self._conn.close()
+            self._conn = None
+        atexit.unregister(self.close)
+
+
+def _load_json_section(path: str, section: str) -> Dict[str, Any]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f).get(section, {})
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def load_json_cache(path: str) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, str]]:
+    """Reads the legacy cache_db.json layout: (hash_cache, template_cache, fingerprint_index)."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+            return data.get("hash_cache", {}), data.get("template_cache", {}), data.get("fingerprint_index", {})
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}, {}, {}
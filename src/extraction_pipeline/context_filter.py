@@ -0,0 +1,115 @@
+import re
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Dict, List, Tuple, Pattern
+
+FIXED_CLUES = [
+    "inscrição", "seccional", "subseção", "categoria", "situação",
+    "endereço profissional", "telefone profissional",
+    "pesquisar por", "tipo:", "cidade:", "data base:", "produto:", "sistema:",
+    "valor parcela", "data de referência"
+]
+
+# Description words that say nothing about where a value is on the page.
+DESCRIPTION_STOPWORDS = {
+    "normalmente", "canto", "superior", "inferior", "esquerdo", "direito",
+    "imagem", "documento", "valor", "campo", "qual", "quais", "pode", "entre",
+}
+
+CLUE_WEIGHT = 2
+DESCRIPTION_WEIGHT = 1
+
+
+def estimate_tokens(text: str) -> int:
+    """Fast token estimate (~4 chars per token for pt/en text); no tokenizer needed."""
+    return len(text) // 4 + 1
+
+
+@lru_cache(maxsize=256)
+def compile_clues(schema_items: Tuple[Tuple[str, str], ...]) -> Tuple[Pattern, Dict[str, int]]:
+    """
+    Builds ONE case-insensitive regex from the fixed clues, the schema keys and
+    the meaningful words of the descriptions. Cached per schema.
+    Returns (pattern, weight of each lowercased clue).
+    """
+    weights: Dict[str, int] = {}
+    for clue in FIXED_CLUES:
+        weights[clue] = CLUE_WEIGHT
+    for key, description in schema_items:
+        weights[key.replace("_", " ").lower()] = CLUE_WEIGHT
+        for word in re.findall(r"\w{5,}", (description or "").lower()):
+            if word not in DESCRIPTION_STOPWORDS:
+                weights.setdefault(word, DESCRIPTION_WEIGHT)
+
+    alternatives = sorted(weights, key=len, reverse=True)
+    pattern = re.compile("|".join(re.escape(clue) for clue in alternatives), re.IGNORECASE)
+    return pattern, weights
+
+
+class ContextFilter:
+    """
+    Stage 3 context filter.
+
+    One regex pass over the page marks the lines that contain clues; each hit
+    opens a window (1 line above, 2 below). Windows are ranked by clue score and
+    added until `max_tokens` is reached, then emitted in page order. The LLM
+    input size is therefore capped no matter how long the page is.
+    """
+
+    def __init__(self, max_tokens: int = 600, window_before: int = 1, window_after: int = 2):
+        self.max_tokens = max_tokens
+        self.window_before = window_before
+        self.window_after = window_after
+
+    def _truncate(self, lines: List[str]) -> str:
+        kept, used = [], 0
+        for line in lines:
+            cost = estimate_tokens(line)
+            if used + cost > self.max_tokens:
+                break
+            kept.append(line)
+            used += cost
+        return "\n".join(kept)
+
+    def _score_lines(self, pdf_text: str, line_starts: List[int], schema_to_find: Dict[str, str]) -> Dict[int, int]:
+        pattern, weights = compile_clues(tuple(sorted(schema_to_find.items())))
+        line_scores: Dict[int, int] = {}
+        for match in pattern.finditer(pdf_text):
+            line_no = bisect_right(line_starts, match.start()) - 1
+            line_scores[line_no] = line_scores.get(line_no, 0) + weights.get(match.group(0).lower(), DESCRIPTION_WEIGHT)
+        return line_scores
+
+    def build(self, label: str, pdf_text: str, schema_to_find: Dict[str, str]) -> str:
+        lines = pdf_text.split('\n')
+
+        if label == 'carteira_oab':
+            # Fixed card layout: header block + bottom status line.
+            head = list(range(min(10, len(lines))))
+            tail = list(range(max(len(head), len(lines) - 3), len(lines)))
+            return self._truncate([lines[i] for i in head + tail if lines[i].strip()])
+
+        line_starts, offset = [], 0
+        for line in lines:
+            line_starts.append(offset)
+            offset += len(line) + 1
+
+        line_scores = self._score_lines(pdf_text, line_starts, schema_to_find)
+        if not line_scores:
+            return self._truncate([line for line in lines if line.strip()])
+
+        ranked = sorted(line_scores.items(), key=lambda item: (-item[1], item[0]))
+        selected = set()
+        used = 0
+        for line_no, _ in ranked:
+            window = range(max(0, line_no - self.window_before), min(len(lines), line_no + self.window_after + 1))
+            new_lines = [i for i in window if i not in selected and lines[i].strip()]
+            cost = sum(estimate_tokens(lines[i]) for i in new_lines)
+            if used + cost > self.max_tokens:
+                continue
+            selected.update(new_lines)
+            used += cost
+
+        if not selected:
+            # A single clue line is already over budget: hard-cut it.
+            return lines[ranked[0][0]][: self.max_tokens * 4]
+        return "\n".join(lines[i] for i in sorted(selected))
@@ -0,0 +1,83 @@
+from typing import Dict, List, Iterable, Tuple
+from .word_index import Word, WordIndex, fold_text
+
+class AnchorMatcher:
+    """
+    Multi-anchor matcher compiled once from all anchor keys ("Inscrição", "Data Base:", ...).
+
+    The first token of every anchor goes into a character trie, so each page word
+    is walked once (O(len(word))) to find every anchor whose first token is a
+    prefix of it, no matter how many anchors exist. One pass over the words
+    resolves all requested anchors with the same rules as the old per-key scan:
+      - single-token anchor: first word starting with the token;
+      - multi-token anchor: the NEXT word if it starts with the second token,
+        or the word itself if it already contains the second token.
+    Matching is done on accent-folded uppercase text, folded lazily so the
+    scan stops as soon as every requested anchor is found.
+    """
+
+    _END = ""
+
+    def __init__(self, anchors: Iterable[str]):
+        self._trie: Dict[str, dict] = {}
+        self._parts: Dict[str, Tuple[str, ...]] = {}
+        for anchor in anchors:
+            self.add(anchor)
+
+    def add(self, anchor: str):
+        parts = tuple(fold_text(anchor).split())
+        if not parts or anchor in self._parts:
+            return
+        self._parts[anchor] = parts
+
+        node = self._trie
+        for ch in parts[0]:
+            node = node.setdefault(ch, {})
+        node.setdefault(self._END, []).append(anchor)
+
+    def _candidates(self, word_text: str) -> List[str]:
+        """Anchors whose first token is a prefix of `word_text`."""
+        found = []
+        node = self._trie
+        if self._END in node:
+            found.extend(node[self._END])
+        for ch in word_text:
+            node = node.get(ch)
+            if node is None:
+                break
+            if self._END in node:
+                found.extend(node[self._END])
+        return found
+
+    def find_all(self, index: WordIndex, anchors: Iterable[str] | None = None) -> Dict[str, Word | None]:
+        """Returns {anchor: anchor word or None} for the requested anchors, in one pass."""
+        wanted = set(self._parts if anchors is None else anchors)
+        for anchor in wanted:
+            self.add(anchor)
+
+        results: Dict[str, Word | None] = {anchor: None for anchor in wanted}
+        pending = set(wanted)
+        words, upper = index.words, index.upper
+        next_text = fold_text(upper[0]) if words else ""
+
+        for i in range(len(words)):
+            if not pending:
+                break
+            word_text = next_text
+            next_text = fold_text(upper[i + 1]) if i + 1 < len(words) else ""
+
+            for anchor in self._candidates(word_text):
+                if anchor not in pending:
+                    continue
+                parts = self._parts[anchor]
+                if len(parts) == 1:
+                    results[anchor] = words[i]
+                elif next_text and next_text.startswith(parts[1]):
+                    results[anchor] = words[i + 1]
+                elif parts[1] in word_text:
+                    results[anchor] = words[i]
+                else:
+                    continue
+                pending.discard(anchor)
+
+        return results
@@ -1,104 +1,206 @@
-import json
-import re
+import hashlib
 from typing import Dict, Any, Tuple
+from ..cache_store import CacheStore, SqliteCacheStore
+from . import layout_template
+from . import content_signature
+from .content_signature import ContentSignature
+from .word_index import WordIndex
+from ..telemetry import get_logger
+
+log = get_logger("cache")
 
 class CacheExtractor:
     """
-    Implements Stage 0 (Hash Cache) and Stage 2 (Template Cache).
+    Implements Stage 0 (Hash Cache), the content tier and Stage 2 (Template Cache).
+    Storage is delegated to a CacheStore (SQLite by default).
+
+    The content tier keys on the document's visible text instead of its bytes,
+    so a re-exported or re-signed PDF still hits: an exact match on the
+    normalized word stream serves every known field, and a near-duplicate of
+    the same label (MinHash over word shingles, LSH-indexed in the store) serves
+    the fields whose source words are unchanged.
     """
     CACHE_FILE = "cache_db.json"
+    CACHE_DB = "cache_db.sqlite"
+
+    def __init__(self, store: CacheStore | None = None, content_cache: bool = True,
+                 min_similarity: float = content_signature.MIN_SIMILARITY):
+        """Initializes the Cache Extractor and opens the cache store."""
+        self.store = store or SqliteCacheStore(self.CACHE_DB, migrate_from=self.CACHE_FILE)
+        self.content_cache = content_cache
+        self.min_similarity = min_similarity
+        log.debug("[CacheExtractor] Initialized successfully.")
+
+    def flush(self):
+        """Persists buffered cache writes."""
+        self.store.flush()
+
+    def close(self):
+        self.store.close()
+
+    @staticmethod
+    def description_fingerprint(description: str) -> str:
+        """Short stable id of a field description; a changed description is a new field."""
+        return hashlib.sha1((description or "").strip().encode('utf-8')).hexdigest()[:16]
+
+    def lookup_fingerprint(self, fingerprint: str) -> str | None:
+        """Maps a quick fingerprint to the file hash it was seen with, if any."""
+        if not fingerprint:
+            return None
+        return self.store.get_fingerprint(fingerprint)
+
+    def check_field_cache(self, pdf_hash: str, schema: Dict[str, str]) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """
+        Schema-aware Stage 0: serves every (field, description) already resolved
+        for this file and returns the rest as the schema still to find.
+        """
+        keys = {field: (field, self.description_fingerprint(description)) for field, description in schema.items()}
+        cached = self.store.get_fields(pdf_hash, list(keys.values())) if pdf_hash else {}
+
+        found_results = {}
+        remaining_schema = {}
+        for field, description in schema.items():
+            if keys[field] in cached:
+                found_results[field] = cached[keys[field]]
+            else:
+                remaining_schema[field] = description
+        if remaining_schema and pdf_hash:
+            found_results.update(self._take_legacy_fields(pdf_hash, remaining_schema))
+        return found_results, remaining_schema
 
-    def __init__(self):
-        """Initializes the Cache Extractor and loads cache data."""
-        self._load_cache()
-        print("[CacheExtractor] Initialized successfully.")
-
-    def _load_cache(self):
-        """Loads the cache database from a JSON file."""
-        try:
-            with open(self.CACHE_FILE, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                self.hash_cache = data.get("hash_cache", {})
-                self.template_cache = data.get("template_cache", {})
-        except (FileNotFoundError, json.JSONDecodeError):
-            self.hash_cache = {}
-            self.template_cache = {}
-
-    def _save_cache(self):
-        """Saves the current cache state back to the JSON file."""
-        try:
-            data = {
-                "hash_cache": self.hash_cache,
-                "template_cache": self.template_cache
-            }
-            with open(self.CACHE_FILE, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-        except IOError as e:
-            print(f"[CacheExtractor] Error saving cache: {e}")
-
-    def check_hash_cache(self, pdf_hash: str) -> Dict[str, Any] | None:
+    def _take_legacy_fields(self, pdf_hash: str, remaining_schema: Dict[str, str]) -> Dict[str, Any]:
         """
-        Checks if an exact result for this file hash already exists.
+        Serves the fields of `remaining_schema` found in the whole-document result of the
+        legacy hash cache (cache_db.json entries), removing them from `remaining_schema`.
+        Each one served moves to the field cache under the description it was asked with.
         """
-        return self.hash_cache.get(pdf_hash)
+        legacy = self.store.get_hash(pdf_hash)
+        served = {field: legacy[field] for field in remaining_schema if field in legacy} if legacy else {}
+        if not served:
+            return {}
+        log.debug("    - [CACHE-HASH] %d field(s) served from the legacy result of %s...", len(served), pdf_hash[:10])
+        self.save_field_cache(pdf_hash, {field: remaining_schema.pop(field) for field in served}, served)
+        self.store.put_hash(pdf_hash, {field: value for field, value in legacy.items() if field not in served})
+        return served
+
+    def save_field_cache(self, pdf_hash: str, schema: Dict[str, str], results: Dict[str, Any]):
+        """Stores one entry per (field, description) resolved for this file."""
+        values = {
+            (field, self.description_fingerprint(description)): results.get(field)
+            for field, description in schema.items()
+        }
+        if values:
+            self.store.put_fields(pdf_hash, values)
 
-    def save_hash_cache(self, pdf_hash: str, result: Dict[str, Any]):
+    def content_signature(self, label: str, pdf_text: str) -> ContentSignature | None:
+        """Normalized-text hash + MinHash of the text read, or None when the content tier is off."""
+        if not self.content_cache or not pdf_text:
+            return None
+        return content_signature.compute_signature(label, pdf_text)
+
+    def check_content_cache(self, signature: ContentSignature | None,
+                            schema: Dict[str, str]) -> Tuple[Dict[str, Any], Dict[str, str]]:
         """
-        Saves a definitive result for a specific file hash.
+        Content tier: every field known for the exact same text, then, from the
+        closest near-duplicate of the same label, the non-null fields whose
+        source words (value + neighbours) still read the same.
         """
-        print(f"    - [CACHE-HASH] Saving result for hash: {pdf_hash[:10]}...")
-        self.hash_cache[pdf_hash] = result
-        self._save_cache()
+        if signature is None or not schema:
+            return {}, schema
+        keys = {field: (field, self.description_fingerprint(description)) for field, description in schema.items()}
+        exact = self.store.get_content(signature.content_hash, list(keys.values()))
+        found_results = {field: exact[key][0] for field, key in keys.items() if key in exact}
+
+        missing = [key for field, key in keys.items() if field not in found_results]
+        if missing:
+            candidates = self.store.find_similar(signature.label, signature.bands)
+            match = content_signature.best_match(signature, candidates, self.min_similarity)
+            if match:
+                near = self.store.get_content(match[0], missing)
+                reused = {field: near[key][0] for field, key in keys.items()
+                          if key in near and near[key][0] is not None
+                          and content_signature.context_unchanged(near[key][1], signature)}
+                if reused:
+                    log.debug("    - [CACHE-CONTENT] Near-duplicate %s... (similarity %.2f): reusing %s",
+                              match[0][:10], match[1], sorted(reused))
+                found_results.update(reused)
+
+        remaining_schema = {field: description for field, description in schema.items() if field not in found_results}
+        return found_results, remaining_schema
+
+    def save_content_cache(self, signature: ContentSignature | None, schema: Dict[str, str], results: Dict[str, Any]):
+        """Stores each (field, description) with the source words of its value, for near-duplicate reuse."""
+        if signature is None or not schema:
+            return
+        values = {
+            (field, self.description_fingerprint(description)):
+                (results.get(field), content_signature.value_context(signature.tokens, results.get(field)))
+            for field, description in schema.items()
+        }
+        self.store.put_content(signature.content_hash, signature.label, signature.minhash, signature.bands, values)
 
-    def learn_template(self, label: str, llm_results: Dict[str, Any]):
+    def remember_fingerprint(self, fingerprint: str, pdf_hash: str):
+        """Links a fingerprint to the file hash its fields are cached under (e.g. a copied or touched file)."""
+        if not fingerprint:
+            return
+        self.store.put_fingerprint(fingerprint, pdf_hash)
+
+    def learn_template(self, label: str, llm_results: Dict[str, Any], index: WordIndex | None = None):
         """
-        Learns from a successful LLM extraction for a specific label.
+        Learns from a successful LLM extraction for a specific label:
+        each returned value is located in the word boxes and stored as a
+        positional rule (value offset from nearby stable anchor words).
+        A rule that predicted this answer is confirmed; one that did not is relearned.
         """
-        if not label:
+        if not label or index is None:
             return
             
-        print(f"    - [CACHE-TPL] Learning from LLM for label: '{label}'")
-        
-        if label not in self.template_cache:
-            self.template_cache[label] = {}
+        log.debug("    - [CACHE-TPL] Learning layout from LLM for label: '%s'", label)
         
+        label_rules = self.store.get_templates(label)
         for field, value in llm_results.items():
-            if value and (isinstance(value, str) or isinstance(value, list)):
-                self.template_cache[label][field] = value
-        
-        self._save_cache()
+            if not value or not isinstance(value, str):
+                continue
+            rule = layout_template.learn_rule(index, value, label_rules.get(field))
+            if rule:
+                self.store.put_template(label, field, rule)
 
-    def extract_template(self, label: str, pdf_text: str, schema_to_find: Dict[str, str]) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    def template_fields(self, label: str) -> set:
+        """Fields of `label` with a confirmed layout rule (the ones Stage 2 can actually try)."""
+        return {field for field, rule in self.store.get_templates(label).items() if layout_template.is_trusted(rule)}
+
+    def extract_template(self, label: str, pdf_text: str, schema_to_find: Dict[str, str],
+                         index: WordIndex | None = None) -> Tuple[Dict[str, Any], Dict[str, str]]:
         """
-        Runs the template-based cache extraction (Stage 2).
+        Runs the template-based cache extraction (Stage 2): applies the confirmed
+        positional rules of this label to the document's words.
         """
-        if not label:
+        if not label or index is None:
             return {}, schema_to_find
 
-        print("...[LOG] Calling Stage 2: Template Cache...")
+        log.debug("...[LOG] Calling Stage 2: Template Cache...")
         
-        if label not in self.template_cache:
-            print(f"    - [CACHE-TPL] Label '{label}' not found in cache. Skipping.")
+        label_rules = self.store.get_templates(label)
+        if not label_rules:
+            log.debug("    - [CACHE-TPL] Label '%s' not found in cache. Skipping.", label)
             return {}, schema_to_find
 
-        label_rules = self.template_cache[label]
         found_results = {}
         remaining_schema = {}
 
         for field, description in schema_to_find.items():
-            if field in label_rules:
-                saved_value = label_rules[field]
-                if isinstance(saved_value, str) and re.search(re.escape(saved_value), pdf_text):
-                    print(f"    - [CACHE-TPL] Field '{field}': FOUND ('{saved_value}')")
-                    found_results[field] = saved_value
-                elif isinstance(saved_value, list):
-                     print(f"    - [CACHE-TPL] Field '{field}': FOUND (from list cache)")
-                     found_results[field] = saved_value
-                else:
-                    print(f"    - [CACHE-TPL] Field '{field}': Cache rule failed. Marking for next stage.")
-                    remaining_schema[field] = description
+            rule = label_rules.get(field)
+            if not layout_template.is_trusted(rule):
+                log.debug("    - [CACHE-TPL] Field '%s': No confirmed layout rule. Marking for next stage.", field)
+                remaining_schema[field] = description
+                continue
+
+            value = layout_template.apply_rule(index, rule)
+            if value:
+                log.debug("    - [CACHE-TPL] Field '%s': FOUND ('%s')", field, value)
+                found_results[field] = value
             else:
-                print(f"    - [CACHE-TPL] Field '{field}': No cache rule. Marking for next stage.")
+                log.debug("    - [CACHE-TPL] Field '%s': Layout rule failed. Marking for next stage.", field)
                 remaining_schema[field] = description
 
-        return found_results, remaining_schema
\ No newline at end of file
+        return found_results, remaining_schema
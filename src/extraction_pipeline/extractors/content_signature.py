@@ -0,0 +1,119 @@
+import hashlib
+from dataclasses import dataclass
+from typing import List, Tuple
+from .word_index import fold_text
+
+SHINGLE_SIZE = 3
+NUM_HASHES = 64
+BAND_ROWS = 4
+# Near-duplicate threshold on the estimated Jaccard similarity of the word shingles.
+MIN_SIMILARITY = 0.8
+# Words kept on each side of a value (its label, usually): it is reused only if this window is unchanged.
+CONTEXT_WORDS = 1
+
+# Fixed odd multipliers/offsets of the multiply-shift hash family (one per MinHash slot).
+_SEEDS = [int.from_bytes(hashlib.blake2b(f"minhash-{i}".encode(), digest_size=16).digest(), "little")
+          for i in range(NUM_HASHES)]
+_MULTIPLIERS = [(seed & 0xFFFFFFFFFFFFFFFF) | 1 for seed in _SEEDS]
+_OFFSETS = [seed >> 64 for seed in _SEEDS]
+
+
+@dataclass
+class ContentSignature:
+    """What the content tier knows about a document's visible text."""
+    label: str
+    content_hash: str
+    tokens: List[str]
+    minhash: List[int]
+
+    @property
+    def bands(self) -> List[str]:
+        return lsh_bands(self.minhash)
+
+    @property
+    def normalized_text(self) -> str:
+        return " ".join(self.tokens)
+
+
+def normalize_tokens(text: str) -> List[str]:
+    """Word stream of the text: accent-folded, uppercase, whitespace-insensitive."""
+    return fold_text(text or "").split()
+
+
+def shingle_hashes(tokens: List[str], size: int = SHINGLE_SIZE) -> List[int]:
+    """64-bit hashes of the `size`-word shingles (the whole stream when it is shorter)."""
+    if len(tokens) <= size:
+        shingles = [" ".join(tokens)] if tokens else []
+    else:
+        shingles = [" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)]
+    return [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little")
+            for s in set(shingles)]
+
+
+def minhash(tokens: List[str]) -> List[int]:
+    """NUM_HASHES-slot MinHash of the shingles (multiply-shift hashing on uint64, vectorised)."""
+    import numpy as np
+
+    hashes = shingle_hashes(tokens)
+    if not hashes:
+        return [0] * NUM_HASHES
+    x = np.array(hashes, dtype=np.uint64)
+    a = np.array(_MULTIPLIERS, dtype=np.uint64)[:, None]
+    b = np.array(_OFFSETS, dtype=np.uint64)[:, None]
+    with np.errstate(over="ignore"):
+        permuted = (a * x + b) >> np.uint64(32)
+    return permuted.min(axis=1).tolist()
+
+
+def similarity(sig_a: List[int], sig_b: List[int]) -> float:
+    """Estimated Jaccard similarity of two MinHash signatures."""
+    if not sig_a or len(sig_a) != len(sig_b):
+        return 0.0
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+def lsh_bands(signature: List[int], rows: int = BAND_ROWS) -> List[str]:
+    """Band keys for the LSH index: documents sharing any band are candidates."""
+    return [f"{i // rows}:" + hashlib.blake2b(repr(signature[i:i + rows]).encode(), digest_size=8).hexdigest()
+            for i in range(0, len(signature), rows)]
+
+
+def compute_signature(label: str, pdf_text: str) -> ContentSignature:
+    tokens = normalize_tokens(pdf_text)
+    content_hash = hashlib.sha256(f"{label}\x00{' '.join(tokens)}".encode("utf-8")).hexdigest()
+    return ContentSignature(label, content_hash, tokens, minhash(tokens))
+
+
+def value_context(tokens: List[str], value, width: int = CONTEXT_WORDS) -> str | None:
+    """
+    The source words of `value`: its first occurrence in the word stream plus
+    `width` words on each side. None when the value is not spelled out in the
+    text (e.g. an LLM-normalised date), so it can only be reused on an exact match.
+    """
+    if value is None or isinstance(value, (dict, list)):
+        return None
+    target = normalize_tokens(str(value))
+    if not target:
+        return None
+    n = len(target)
+    for start in range(len(tokens) - n + 1):
+        if tokens[start:start + n] == target:
+            return " ".join(tokens[max(0, start - width):start + n + width])
+    return None
+
+
+def context_unchanged(context: str | None, signature: ContentSignature) -> bool:
+    return bool(context) and f" {context} " in f" {signature.normalized_text} "
+
+
+def best_match(signature: ContentSignature, candidates: List[Tuple[str, List[int]]],
+               min_similarity: float = MIN_SIMILARITY) -> Tuple[str, float] | None:
+    """(content_hash, similarity) of the closest candidate at or above `min_similarity`."""
+    best = None
+    for content_hash, candidate_minhash in candidates:
+        if content_hash == signature.content_hash:
+            continue
+        score = similarity(signature.minhash, candidate_minhash)
+        if score >= min_similarity and (best is None or score > best[1]):
+            best = (content_hash, score)
+    return best
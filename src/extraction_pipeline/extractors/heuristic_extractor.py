@@ -1,249 +1,111 @@
-import re
-from typing import Dict, Any, Tuple, Callable, List
+from typing import Dict, Any, Tuple, List
+from .word_index import Word, WordIndex
+from .anchor_matcher import AnchorMatcher
+from .heuristic_rules import FirstMatch, Region, compile_rules, load_rules
+from ..time_budget import TimeBudget
+from ..telemetry import get_logger
 
-PAGE_WIDTH = 595
-PAGE_HEIGHT = 842
-
-Word = Tuple[float, float, float, float, str, int, int, int]
+log = get_logger("heuristics")
 
 class HeuristicExtractor:
     """
     [AÇÃO 17.1 - CORRIGIDA]
     Corrige os 2 bugs da Ação 17 (âncora e 'direita').
-    """
-
-    def __init__(self):
-        """
-        [AÇÃO 17.1] Configuração Híbrida (OAB="below", Tela="right")
-        """
-        self.heuristic_map: Dict[str, Callable[[List[Word]], str | None]] = {
-
-            "nome": self._extract_oab_name,
-            "inscricao": self._create_layout_extractor(key="Inscrição", direction="below"),
-            "seccional": self._create_layout_extractor(key="Seccional", direction="below"),
-            "subsecao": self._create_layout_extractor(key="Subseção", direction="below"),
-            "categoria": self._extract_oab_categoria,
-            "situacao": self._extract_oab_situacao,
-            
-            "pesquisa_por": self._create_layout_extractor(key="Pesquisar por:", direction="right"),
-            "pesquisa_tipo": self._create_layout_extractor(key="Tipo:", direction="right"),
-            "cidade": self._create_layout_extractor(key="Cidade:", direction="right"),
-            "data_base": self._create_layout_extractor(key="Data Base:", direction="right"),
-            "produto": self._create_layout_extractor(key="Produto:", direction="right"),
-            "sistema": self._create_layout_extractor(key="Sistema:", direction="right"),
-            "valor_parcela": self._create_layout_extractor(key="Valor Parcela:", direction="right"),
-            "data_referencia": self._create_layout_extractor(key="Data de Referência:", direction="right"),
-        }
-        print("[HeuristicExtractor] Initialized successfully (with FINAL Tuned Rules).")
 
-    def _find_anchor_word(self, words: List[Word], text_to_find: str) -> Word | None:
-        """
-        Helper: Encontra a *palavra* âncora.
-        [CORREÇÃO AÇÃO 17.1] Bug #1 (Falha de 10.93s)
-        Lógica robusta para âncoras multi-palavra (ex: "Data Base:").
-        """
-        anchor_parts = text_to_find.upper().split()
-        first_part = anchor_parts[0]
-
-        for i, word in enumerate(words):
-            word_text_upper = word[4].upper()
-            
-            if word_text_upper.startswith(first_part):
-                if len(anchor_parts) == 1:
-                    return word
-                
-                if i + 1 < len(words):
-                    next_word_upper = words[i+1][4].upper()
-                    if next_word_upper.startswith(anchor_parts[1]):
-                        return words[i+1]
-                
-                
-                if len(anchor_parts) > 1 and anchor_parts[1] in word_text_upper:
-                    return word
-
-        return None
-    
-    def _find_words_on_line(self, words: List[Word], y0: float, y1: float) -> List[Word]:
-        """Helper: Encontra todas as palavras em uma "linha" (coordenada Y)."""
-        line_words = []
-        for word in words:
-            wy0, wy1 = word[1], word[3]
-        
-            is_on_line = (wy0 >= y0 - 2) and (wy1 <= y1 + 2)
-            if is_on_line:
-                line_words.append(word)
-        return sorted(line_words, key=lambda w: w[0]) 
+    Rules are declared per label in a JSON file (heuristic_rules.json by
+    default: anchor + direction, zones, tolerances, value pattern) and compiled
+    once here. extract() only runs the rules of the document's label; without a
+    label, or for a label the file does not know, every rule is tried.
+    """
 
-    def _find_value_right_of(self, words: List[Word], anchor_word: Word) -> str | None:
+    def __init__(self, rules_path: str | None = None):
         """
-        Helper: Encontra o valor à DIREITA da âncora.
+        [AÇÃO 17.1] Configuração Híbrida (OAB="below", Tela="right"), now read from `rules_path`.
         """
-        ax1, ay0, ay1 = anchor_word[2], anchor_word[1], anchor_word[3]
-        
-        line_words = self._find_words_on_line(words, ay0, ay1)
-        value_words = [word for word in line_words if word[0] > (ax1 + 2)] 
-        
-        if value_words:
-            final_words = []
-            for word in value_words:
-                word_text = word[4]
-        
-                if ":" in word_text and len(final_words) > 0:
-                    break
-                final_words.append(word_text)
-            return " ".join(final_words).strip()
-            
-        return None
-
-    def _find_value_below(self, words: List[Word], anchor_word: Word) -> str | None:
+        self.rules_path = rules_path
+        self.rules_by_label: Dict[str, Dict[str, FirstMatch]] = compile_rules(load_rules(rules_path), self._find_anchor_word)
+
+        # Unlabelled documents: first rule set declaring a field wins.
+        self.heuristic_map: Dict[str, FirstMatch] = {}
+        for rules in self.rules_by_label.values():
+            for field, rule in rules.items():
+                self.heuristic_map.setdefault(field, rule)
+
+        self._anchor_matcher = AnchorMatcher(
+            anchor for rules in self.rules_by_label.values() for rule in rules.values() for anchor in rule.anchor_keys
+        )
+        log.debug("[HeuristicExtractor] Initialized successfully (%d label rule sets).", len(self.rules_by_label))
+
+    def rules_for(self, label: str | None) -> Dict[str, FirstMatch]:
+        """Rules that apply to documents of `label`."""
+        if label in self.rules_by_label:
+            return self.rules_by_label[label]
+        return self.heuristic_map
+
+    def regions_for(self, label: str | None, schema: Dict[str, str]) -> List[Region] | None:
         """
-        Helper: Encontra o valor ABAIXO da âncora.
-        (Esta é a versão da Ação 17 que funcionou para OAB)
+        The page regions that are enough to try every field of `schema` on the
+        first page, or None when a field has no rule or a rule needs the whole
+        page (anchors, word lists).
         """
-        ax0, ax1, ay1 = anchor_word[0], anchor_word[2], anchor_word[3]
-        
-        first_word_below = None
-        candidates = []
-        for word in words:
-            wx0, wy0 = word[0], word[1]
-            is_below = wy0 > (ay1 + 2)
-            is_in_column = (wx0 >= ax0 - 5) and (wx0 <= ax1 + 5) 
-            if is_below and is_in_column:
-                candidates.append(word)
-        
-        if not candidates:
-            for word in words:
-                wx0, wy0 = word[0], word[1]
-                is_below = wy0 > (ay1 + 2)
-                is_in_column = (wx0 >= ax0 - 10) and (wx0 <= ax1 + 200)
-                if is_below and is_in_column:
-                    candidates.append(word)
-            if not candidates:
-                return None
-
-        
-        first_word_below = sorted(candidates, key=lambda w: w[1])[0]
-
-        value_line_words = self._find_words_on_line(words, first_word_below[1], first_word_below[3])
-        
-        column_words = []
-        for word in value_line_words:
-            wx0 = word[0]
-            is_in_column = (wx0 >= ax0 - 5) and (wx0 <= ax1 + 5)
-            if is_in_column:
-                column_words.append(word[4])
-        
-        if column_words:
-            result_text = " ".join(column_words).strip()
-            if re.match(r"^\d+$", result_text) or len(result_text) == 2:
-                return result_text
-            
-        fallback_words = [w[4] for w in value_line_words if w[0] >= ax0 - 5]
-        if fallback_words:
-             return " ".join(fallback_words).strip()
-            
-        return None
-
-    def _create_layout_extractor(self, key: str, direction: str) -> Callable[[List[Word]], str | None]:
-        """Factory: Cria uma função de extração baseada em layout."""
-        
-        def extractor(words: List[Word]) -> str | None:
-            anchor_word = self._find_anchor_word(words, key)
-            if not anchor_word:
+        rules = self.rules_for(label)
+        regions: List[Region] = []
+        for field in schema:
+            rule = rules.get(field)
+            field_regions = rule.regions if rule is not None else None
+            if field_regions is None:
                 return None
-            
-            value_str = None
-            if direction == "below":
-                value_str = self._find_value_below(words, anchor_word)
-            elif direction == "right":
-                value_str = self._find_value_right_of(words, anchor_word)
-            
-            return value_str
-            
-        return extractor
+            regions.extend(r for r in field_regions if r not in regions)
+        return regions or None
 
-    def _extract_oab_name(self, words: List[Word]) -> str | None:
+    def _find_anchor_word(self, index: WordIndex, text_to_find: str) -> Word | None:
         """
-        Extrai por zona (canto superior esquerdo).
-        (Esta é a versão da Ação 17 que funcionou)
+        Helper: Encontra a *palavra* âncora.
+        [CORREÇÃO AÇÃO 17.1] Lógica robusta para âncoras multi-palavra (ex: "Data Base:").
+        Normally already resolved by the single pass in extract(); unknown keys
+        fall back to a one-off pass of the matcher.
         """
-        top_zone_y_limit = PAGE_HEIGHT * 0.25
-        
-        lines = {}
-        for word in words:
-            y0 = word[1]
-            if y0 > top_zone_y_limit:
-                break
-            
-            line_y = round(y0)
-            if line_y not in lines:
-                lines[line_y] = []
-            lines[line_y].append(word[4])
-        
-        if not lines: return None
-        
-        sorted_line_keys = sorted(lines.keys())
-        for y_key in sorted_line_keys:
-            line_text = " ".join(lines[y_key]).strip()
-            if not line_text: continue
-            
-            if "INSCRIÇÃO" in line_text.upper():
-                break
-                
-            if len(line_text) > 5:
-                return line_text
-        
-        return None
-
-    def _extract_oab_situacao(self, words: List[Word]) -> str | None:
-        """Extrai por zona (canto inferior direito)."""
-        bottom_right_zone_x = PAGE_WIDTH * 0.7
-        bottom_right_zone_y = PAGE_HEIGHT * 0.7
-        situacao_words = []
-        
-        for word in words:
-            (x0, y0, text) = (word[0], word[1], word[4])
-            is_in_zone = (x0 > bottom_right_zone_x and y0 > bottom_right_zone_y)
-            
-            if is_in_zone and "SITUAÇÃO" in text.upper():
-                situacao_words.append(word)
-        
-        if not situacao_words: return None
-        
-        first_word = situacao_words[0]
-        line_words = self._find_words_on_line(words, first_word[1], first_word[3])
-        return " ".join([w[4] for w in line_words]).strip()
-
-    def _extract_oab_categoria(self, words: List[Word]) -> str | None:
-        """Regra especial: Procura por 'SUPLEMENTAR' etc."""
-        for word in words:
-            text = word[4].upper()
-            if text in ["SUPLEMENTAR", "ADVOGADO", "ADVOGADA", "ESTAGIARIO", "ESTAGIARIA"]:
-                return word[4] 
-        return None
+        if text_to_find not in index.anchors:
+            index.anchors.update(self._anchor_matcher.find_all(index, [text_to_find]))
+        return index.anchors[text_to_find]
 
-    def extract(self, words: List[Word], schema_to_find: Dict[str, str]) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    def extract(self, words: List[Word], schema_to_find: Dict[str, str], budget: TimeBudget | None = None,
+                page_no: int = 0, label: str | None = None) -> Tuple[Dict[str, Any], Dict[str, str]]:
         """
         Executa o pipeline de heurísticas (agora usando 'words').
+        Com `budget`, para de tentar regras assim que o tempo acaba (campos seguem adiante).
+        `page_no` > 0: only the anchor/word rules run; zone rules are first-page only.
+        `label` selects the rule set (see rules_for()).
         """
-        print("...[LOG] Calling Stage 1: Heuristic Extractor (Word-Aware)...")
+        log.debug("...[LOG] Calling Stage 1: Heuristic Extractor (Word-Aware)...")
         
         found_results = {}
         remaining_schema = {}
+        rules = self.rules_for(label)
+        index = WordIndex(words)
+        wanted_anchors = [anchor for f in schema_to_find if f in rules for anchor in rules[f].anchor_keys]
+        if wanted_anchors:
+            index.anchors.update(self._anchor_matcher.find_all(index, wanted_anchors))
 
         for field, description in schema_to_find.items():
-            if field in self.heuristic_map:
-                extractor_function = self.heuristic_map[field]
-                result = extractor_function(words)
-                
-                if result:
-                    print(f"    - [HEURISTIC] Field '{field}': FOUND ('{result}')")
-                    found_results[field] = result
-                else:
-                    print(f"    - [HEURISTIC] Field '{field}': Not Found. Marking for next stage.")
-                    remaining_schema[field] = description
+            if budget and budget.expired():
+                remaining_schema[field] = description
+                continue
+            rule = rules.get(field)
+            if rule is None:
+                log.debug("    - [HEURISTIC] Field '%s': No heuristic. Marking for next stage.", field)
+                remaining_schema[field] = description
+                continue
+            if page_no > 0 and rule.first_page_only:
+                remaining_schema[field] = description
+                continue
+
+            result = rule(index, page_no)
+            if result:
+                log.debug("    - [HEURISTIC] Field '%s': FOUND ('%s')", field, result)
+                found_results[field] = result
             else:
-                print(f"    - [HEURISTIC] Field '{field}': No heuristic. Marking for next stage.")
+                log.debug("    - [HEURISTIC] Field '%s': Not Found. Marking for next stage.", field)
                 remaining_schema[field] = description
                 
-        return found_results, remaining_schema
\ No newline at end of file
+        return found_results, remaining_schema
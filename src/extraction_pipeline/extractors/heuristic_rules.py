@@ -0,0 +1,252 @@
+import json
+import os
+import re
+from typing import Dict, Any, List, Callable, Tuple
+from .word_index import Word, WordIndex
+
+# Zone fractions in the rules file are relative to the real page size; this
+# one (A4) is only assumed for words that do not carry it (hand-built tests).
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+
+# (x0, y0, x1, y1) as fractions of the page.
+Region = Tuple[float, float, float, float]
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(__file__), "heuristic_rules.json")
+
+Rule = Callable[[WordIndex], str | None]
+AnchorLookup = Callable[[WordIndex, str], Word | None]
+
+
+class RuleConfigError(ValueError):
+    """The rules file has an unknown kind/option or a missing setting."""
+
+
+class _BaseRule:
+    """Common options: `pattern` (regex the value must contain; group 1 or the match is returned) and `first_page_only`."""
+
+    anchor_key: str | None = None
+    # Part of the page the rule reads (None: the whole page, e.g. anchors found anywhere).
+    region: Region | None = None
+
+    def __init__(self, pattern: str | None = None, first_page_only: bool = False):
+        self.pattern = re.compile(pattern) if pattern else None
+        self.first_page_only = first_page_only
+
+    def __call__(self, index: WordIndex) -> str | None:
+        value = self.find(index)
+        if not value or not self.pattern:
+            return value
+        match = self.pattern.search(value)
+        if not match:
+            return None
+        return match.group(1) if self.pattern.groups else match.group(0)
+
+    def find(self, index: WordIndex) -> str | None:
+        raise NotImplementedError
+
+
+def page_size(index: WordIndex) -> Tuple[float, float]:
+    return index.page_size or (PAGE_WIDTH, PAGE_HEIGHT)
+
+
+class AnchorRule(_BaseRule):
+    """
+    Value next to an anchor text ("Inscrição", "Data Base:").
+    - direction "right": words after the anchor on its line, up to the next
+      'Label:' word or a gap wider than `max_gap`.
+    - direction "below": first line starting more than `min_dy` under the
+      anchor's bottom (negative for tightly packed grids), within
+      `column_tolerance` of its column (else within `fallback_tolerance`/
+      `fallback_width`), at most `max_dy` below it; the column words are kept when they look like a code
+      (digits or two letters), otherwise the line from the column on.
+    """
+
+    def __init__(self, anchor: str, direction: str, find_anchor: AnchorLookup, min_gap: float = 2,
+                 max_gap: float | None = None, column_tolerance: float = 5, fallback_tolerance: float = 10,
+                 fallback_width: float = 200, min_dy: float = 2, max_dy: float | None = None, **common):
+        super().__init__(**common)
+        if direction not in ("right", "below"):
+            raise RuleConfigError(f"unknown direction '{direction}' for anchor '{anchor}'")
+        self.anchor_key = anchor
+        self.direction = direction
+        self._find_anchor = find_anchor
+        self.min_gap = min_gap
+        self.max_gap = max_gap
+        self.column_tolerance = column_tolerance
+        self.fallback_tolerance = fallback_tolerance
+        self.fallback_width = fallback_width
+        self.min_dy = min_dy
+        self.max_dy = max_dy
+
+    def find(self, index: WordIndex) -> str | None:
+        anchor_word = self._find_anchor(index, self.anchor_key)
+        if not anchor_word:
+            return None
+        if self.direction == "right":
+            return self._right_of(index, anchor_word)
+        return self._below(index, anchor_word)
+
+    def _right_of(self, index: WordIndex, anchor_word: Word) -> str | None:
+        ax1, ay0, ay1 = anchor_word[2], anchor_word[1], anchor_word[3]
+        value_words = [word for word in index.on_line(ay0, ay1) if word[0] > ax1 + self.min_gap]
+        if not value_words:
+            return None
+
+        final_words = []
+        last_x1 = None
+        for word in value_words:
+            if ":" in word[4] and final_words:
+                break
+            if self.max_gap is not None and last_x1 is not None and word[0] - last_x1 > self.max_gap:
+                break
+            final_words.append(word[4])
+            last_x1 = word[2]
+        return " ".join(final_words).strip()
+
+    def _below(self, index: WordIndex, anchor_word: Word) -> str | None:
+        ax0, ax1, ay1 = anchor_word[0], anchor_word[2], anchor_word[3]
+        tol = self.column_tolerance
+
+        first_word_below = index.first_below(ay1 + self.min_dy, ax0 - tol, ax1 + tol)
+        if not first_word_below:
+            first_word_below = index.first_below(ay1 + self.min_dy, ax0 - self.fallback_tolerance, ax1 + self.fallback_width)
+            if not first_word_below:
+                return None
+        if self.max_dy is not None and first_word_below[1] - ay1 > self.max_dy:
+            return None
+
+        value_line_words = index.on_line(first_word_below[1], first_word_below[3])
+        column_words = [word[4] for word in value_line_words if ax0 - tol <= word[0] <= ax1 + tol]
+        if column_words:
+            result_text = " ".join(column_words).strip()
+            if re.match(r"^\d+$", result_text) or len(result_text) == 2:
+                return result_text
+
+        fallback_words = [w[4] for w in value_line_words if w[0] >= ax0 - tol]
+        if fallback_words:
+            return " ".join(fallback_words).strip()
+        return None
+
+
+class TopZoneRule(_BaseRule):
+    """First line of the top zone (y0 <= `y_max` of the page) longer than `min_length`, before `stop_text`."""
+
+    def __init__(self, y_max: float, stop_text: str | None = None, min_length: int = 1, **common):
+        super().__init__(**common)
+        self.y_max = y_max
+        self.region = (0.0, 0.0, 1.0, y_max)
+        self.stop_text = stop_text.upper() if stop_text else None
+        self.min_length = min_length
+
+    def find(self, index: WordIndex) -> str | None:
+        table = index.table
+        ids = table.leading_above(page_size(index)[1] * self.y_max)
+        lines: Dict[int, List[str]] = {}
+        for y0, text in zip(table.y0[ids].tolist(), table.text[ids].tolist()):
+            lines.setdefault(round(y0), []).append(text)
+
+        for y_key in sorted(lines):
+            line_text = " ".join(lines[y_key]).strip()
+            if not line_text:
+                continue
+            if self.stop_text and self.stop_text in line_text.upper():
+                break
+            if len(line_text) >= self.min_length:
+                return line_text
+        return None
+
+
+class ZoneLineRule(_BaseRule):
+    """
+    The line of the first word containing `contains` in the zone right of
+    `x_min` and below `y_min` (page fractions). Its region is the full-width
+    band below `y_min`, since the line may start left of the zone.
+    """
+
+    def __init__(self, contains: str, x_min: float = 0.0, y_min: float = 0.0, **common):
+        super().__init__(**common)
+        self.contains = contains.upper()
+        self.x_min = x_min
+        self.y_min = y_min
+        self.region = (0.0, y_min, 1.0, 1.0)
+
+    def find(self, index: WordIndex) -> str | None:
+        width, height = page_size(index)
+        hits = [i for i in index.in_zone(width * self.x_min, height * self.y_min) if self.contains in index.upper[i]]
+        if not hits:
+            return None
+        first_word = index.words[hits[0]]
+        return " ".join(w[4] for w in index.on_line(first_word[1], first_word[3])).strip()
+
+
+class OneOfRule(_BaseRule):
+    """First word (page order) that is exactly one of `values` (case-insensitive)."""
+
+    def __init__(self, values: List[str], **common):
+        super().__init__(**common)
+        self.values = [v.upper() for v in values]
+
+    def find(self, index: WordIndex) -> str | None:
+        word = index.first_with_text(self.values)
+        return word[4] if word else None
+
+
+class FirstMatch:
+    """Several rules for one field, tried in order until one returns a value."""
+
+    def __init__(self, rules: List[_BaseRule]):
+        self.rules = rules
+        self.first_page_only = all(rule.first_page_only for rule in rules)
+
+    @property
+    def anchor_keys(self) -> List[str]:
+        return [rule.anchor_key for rule in self.rules if rule.anchor_key]
+
+    @property
+    def regions(self) -> List[Region] | None:
+        """Page regions the rules read on the first page, or None if one of them needs the whole page."""
+        if any(rule.region is None for rule in self.rules):
+            return None
+        return [rule.region for rule in self.rules]
+
+    def __call__(self, index: WordIndex, page_no: int = 0) -> str | None:
+        for rule in self.rules:
+            if page_no > 0 and rule.first_page_only:
+                continue
+            value = rule(index)
+            if value:
+                return value
+        return None
+
+
+RULE_KINDS = {"anchor": AnchorRule, "top_zone": TopZoneRule, "zone_line": ZoneLineRule, "one_of": OneOfRule}
+
+
+def compile_rule(spec: Dict[str, Any], find_anchor: AnchorLookup) -> _BaseRule:
+    options = dict(spec)
+    kind = options.pop("kind", "anchor")
+    if kind not in RULE_KINDS:
+        raise RuleConfigError(f"unknown rule kind '{kind}'")
+    if kind == "anchor":
+        options["find_anchor"] = find_anchor
+    try:
+        return RULE_KINDS[kind](**options)
+    except TypeError as e:
+        raise RuleConfigError(f"bad options for '{kind}' rule {spec}: {e}") from None
+
+
+def compile_rules(config: Dict[str, Dict[str, Any]], find_anchor: AnchorLookup) -> Dict[str, Dict[str, FirstMatch]]:
+    """{label: {field: rule spec or list of specs}} -> {label: {field: FirstMatch}}."""
+    compiled = {}
+    for label, fields in config.items():
+        compiled[label] = {}
+        for field, specs in fields.items():
+            specs = specs if isinstance(specs, list) else [specs]
+            compiled[label][field] = FirstMatch([compile_rule(spec, find_anchor) for spec in specs])
+    return compiled
+
+
+def load_rules(path: str | None = None) -> Dict[str, Dict[str, Any]]:
+    with open(path or DEFAULT_RULES_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f)
@@ -0,0 +1,158 @@
+import math
+from typing import Dict, Any, List
+from .word_index import Word, WordIndex, fold_text
+
+RULE_KIND = "layout"
+MAX_ANCHORS = 3
+MIN_ANCHOR_LETTERS = 3
+# A rule is only served by Stage 2 after it predicted the LLM answer this many times.
+MIN_CONFIRMATIONS = 1
+
+
+def compact_text(text: str | None) -> str:
+    """Comparison form of a value: accent-folded, uppercase, no whitespace."""
+    return "".join(fold_text(text or "").split())
+
+
+def is_layout_rule(rule: Any) -> bool:
+    return isinstance(rule, dict) and rule.get("kind") == RULE_KIND
+
+
+def is_trusted(rule: Any) -> bool:
+    return is_layout_rule(rule) and rule.get("confirmed", 0) >= MIN_CONFIRMATIONS
+
+
+def locate_value(index: WordIndex, value: str) -> List[int] | None:
+    """Ids of the consecutive words (page order) that spell `value`, if it is on the page."""
+    target = compact_text(value)
+    if not target:
+        return None
+
+    texts = index.table.text.tolist()
+    for start in range(len(texts)):
+        piece = compact_text(texts[start])
+        if not piece or not target.startswith(piece):
+            continue
+        ids, built = [start], piece
+        for j in range(start + 1, len(texts)):
+            if built == target:
+                break
+            piece = compact_text(texts[j])
+            if not target.startswith(built + piece):
+                break
+            ids.append(j)
+            built += piece
+        if built == target:
+            return ids
+    return None
+
+
+def _count_lines(index: WordIndex, ids: List[int]) -> int:
+    lines, last_y0 = 0, None
+    for i in ids:
+        word = index.words[i]
+        if last_y0 is None or abs(word[1] - last_y0) > (word[3] - word[1]) / 2:
+            lines += 1
+            last_y0 = word[1]
+    return lines
+
+
+def _anchor_candidates(index: WordIndex, value_ids: List[int]) -> List[Dict[str, Any]]:
+    """Unique, word-like texts near the value, with the value's offset from each."""
+    first = index.words[value_ids[0]]
+    taken = set(value_ids)
+    candidates = []
+    for i, word in enumerate(index.words):
+        text = word[4]
+        if i in taken or sum(ch.isalpha() for ch in text) < MIN_ANCHOR_LETTERS:
+            continue
+        if len(index.ids_with_text(text)) != 1:
+            continue
+        candidates.append({"text": text, "dx": first[0] - word[0], "dy": first[1] - word[1], "seen": 1})
+    candidates.sort(key=lambda a: math.hypot(a["dx"], a["dy"]))
+    return candidates[:MAX_ANCHORS]
+
+
+def _read_line(index: WordIndex, first: Word, max_gap: float) -> List[Word]:
+    """`first` plus the words right of it on its line, up to a column gap or the next 'Label:'."""
+    line = [w for w in index.on_line(first[1], first[3]) if w[0] >= first[0] and w != first]
+    taken = [first]
+    for word in line:
+        if word[0] - taken[-1][2] > max_gap or ":" in word[4]:
+            break
+        taken.append(word)
+    return taken
+
+
+def read_region(index: WordIndex, x: float, y: float, max_lines: int, line_height: float) -> str | None:
+    """Reads up to `max_lines` left-aligned lines of text starting at (x, y)."""
+    tol = line_height / 2 + 2
+    first = index.nearest_start(x, y, line_height, tol)
+    lines = []
+    while first and len(lines) < max_lines:
+        line = _read_line(index, first, line_height)
+        lines.append(" ".join(w[4] for w in line))
+        bottom = max(w[3] for w in line)
+        first = index.nearest_start(x, bottom + line_height / 2, line_height, tol)
+        if first and first[1] < bottom - 2:
+            break
+    return " ".join(lines).strip() or None
+
+
+def apply_rule(index: WordIndex, rule: Dict[str, Any]) -> str | None:
+    """Reads the field at the position the rule learned, from the first anchor found on the page."""
+    for anchor in rule.get("anchors", []):
+        ids = index.ids_with_text(anchor["text"])
+        if len(ids) != 1:
+            continue
+        anchor_word = index.words[ids[0]]
+        value = read_region(index, anchor_word[0] + anchor["dx"], anchor_word[1] + anchor["dy"],
+                            rule["lines"], rule["line_height"])
+        if value:
+            return value
+    return None
+
+
+def learn_rule(index: WordIndex, value: str, previous: Dict[str, Any] | None = None) -> Dict[str, Any] | None:
+    """
+    Builds the positional rule for `value` in this document.
+    With a previous rule: if it predicted `value` here, it is confirmed and its
+    anchors that reappear at the same offset gain weight; otherwise it is
+    replaced by the rule learned from this document.
+    Returns None when the value cannot be located in the word boxes.
+    """
+    value_ids = locate_value(index, value)
+    if not value_ids:
+        return None
+
+    first = index.words[value_ids[0]]
+    line_height = first[3] - first[1]
+    rule = {
+        "kind": RULE_KIND,
+        "lines": _count_lines(index, value_ids),
+        "line_height": line_height,
+        "anchors": _anchor_candidates(index, value_ids),
+        "examples": 1,
+        "confirmed": 0,
+    }
+    if not is_layout_rule(previous) or compact_text(apply_rule(index, previous)) != compact_text(value):
+        return rule if rule["anchors"] else None
+
+    merged = []
+    fresh = {a["text"]: a for a in rule["anchors"]}
+    for anchor in previous["anchors"]:
+        now = fresh.pop(anchor["text"], None)
+        if now and abs(now["dx"] - anchor["dx"]) <= line_height and abs(now["dy"] - anchor["dy"]) <= line_height:
+            merged.append({**anchor, "seen": anchor["seen"] + 1})
+        else:
+            merged.append(anchor)
+    merged.extend(fresh.values())
+    merged.sort(key=lambda a: (-a["seen"], math.hypot(a["dx"], a["dy"])))
+
+    return {
+        **rule,
+        "lines": max(rule["lines"], previous["lines"]),
+        "anchors": merged[:MAX_ANCHORS],
+        "examples": previous.get("examples", 1) + 1,
+        "confirmed": previous.get("confirmed", 0) + 1,
+    }
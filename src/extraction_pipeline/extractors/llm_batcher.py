@@ -0,0 +1,109 @@
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Dict, Any, List, Tuple
+from .llm_extractor import LlmExtractor
+from ..telemetry import current_trace, get_logger
+
+log = get_logger("llm_batcher")
+
+_FALLBACK = object()
+_SOLO = object()
+
+GroupKey = Tuple[str, Tuple[Tuple[str, str], ...]]  # (label, schema items)
+
+class LlmBatcher:
+    """
+    Micro-batcher for Stage 3 in batch runs.
+
+    Drop-in for LlmExtractor.extract(): concurrent callers with the same label
+    and schema are collected for up to `window_s` seconds (or until
+    `max_batch_size` documents are waiting) and sent in ONE request via
+    LlmExtractor.extract_many. Each caller gets its own document's fields back.
+    Documents a parsed batch answer does not cover are retried with a normal
+    per-document call on the caller's own thread; when the batch call itself
+    fails, nobody retries (every caller gets None, like a failed extract()).
+
+    Grouping is by (label, schema): the label comes from the caller's document
+    trace, so one request never mixes documents of different labels.
+    """
+
+    def __init__(self, llm_extractor: LlmExtractor, max_batch_size: int = 8, window_s: float = 0.05):
+        self.llm_extractor = llm_extractor
+        self.max_batch_size = max(1, max_batch_size)
+        self.window_s = window_s
+        self._lock = threading.Lock()
+        self._groups: Dict[GroupKey, List[Tuple[str, Future]]] = {}
+
+    @property
+    def model(self) -> str:
+        return self.llm_extractor.model
+
+    def extract(self, pdf_text: str, extraction_schema: Dict[str, str], timeout_s: float | None = None) -> Dict[str, Any] | None:
+        if self.max_batch_size == 1:
+            return self.llm_extractor.extract(pdf_text, extraction_schema, timeout_s)
+        # A context already answered alone does not need a seat in a batch.
+        cached = self.llm_extractor.cached_result(pdf_text, extraction_schema)
+        if cached is not None:
+            return cached
+
+        start_time = time.perf_counter()
+
+        trace = current_trace()
+        key = (trace.label if trace else "", tuple(extraction_schema.items()))
+        future: Future = Future()
+        ready = None
+
+        with self._lock:
+            group = self._groups.setdefault(key, [])
+            group.append((pdf_text, future))
+            if len(group) >= self.max_batch_size:
+                ready = self._groups.pop(key)
+            elif len(group) == 1:
+                timer = threading.Timer(self.window_s, self._flush_group, args=(key, group, extraction_schema))
+                timer.daemon = True
+                timer.start()
+
+        if ready:
+            self._send(ready, extraction_schema)
+
+        try:
+            result = future.result(timeout=timeout_s)
+        except FutureTimeout:
+            log.info("    - [LLM-BATCH] Batch did not answer within the time budget.")
+            return None
+
+        remaining = None if timeout_s is None else max(0.0, timeout_s - (time.perf_counter() - start_time))
+        if result is _SOLO:
+            return self.llm_extractor.extract(pdf_text, extraction_schema, remaining)
+        if result is _FALLBACK:
+            log.info("    - [LLM-BATCH] Document missing from batch response. Falling back to single call.")
+            return self.llm_extractor.extract(pdf_text, extraction_schema, remaining)
+        return result
+
+    def _flush_group(self, key: GroupKey, group: list, extraction_schema: Dict[str, str]):
+        """Timer callback: sends the group it was started for, unless it already left full."""
+        with self._lock:
+            ready = self._groups.pop(key) if self._groups.get(key) is group else None
+        if ready:
+            self._send(ready, extraction_schema)
+
+    def _send(self, batch: List[Tuple[str, Future]], extraction_schema: Dict[str, str]):
+        if len(batch) == 1:
+            # Nothing to share the request with: let the caller do a normal call.
+            batch[0][1].set_result(_SOLO)
+            return
+
+        try:
+            results = self.llm_extractor.extract_many([text for text, _ in batch], extraction_schema)
+        except Exception as e:
+            log.warning("    - [LLM-BATCH] Batch call failed: %s", e)
+            results = None
+
+        if results is None:
+            # The provider did not answer: solo calls now would only double the failing traffic.
+            for _, future in batch:
+                future.set_result(None)
+            return
+        for (_, future), result in zip(batch, results):
+            future.set_result(result if result is not None else _FALLBACK)
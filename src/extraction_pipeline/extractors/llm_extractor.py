@@ -1,7 +1,59 @@
 import os
 import json
-from openai import OpenAI
-from typing import Dict, Any
+import hashlib
+import threading
+import time
+from collections import deque
+from dataclasses import replace
+from concurrent.futures import ThreadPoolExecutor, CancelledError, wait, FIRST_COMPLETED
+from typing import Dict, Any, List, Callable
+from ..stats import percentile
+from .llm_transport import TransportConfig, CircuitBreaker, CircuitOpenError, is_retryable, create_openai_client, _httpx
+from ..telemetry import DocumentTrace, MetricsRegistry, REGISTRY, current_trace, get_logger
+
+log = get_logger("llm")
+
+
+def _default_client() -> Any:
+    from openai import OpenAI
+    return OpenAI()
+
+class _Permit:
+    """
+    One request's hold on a concurrency slot. Released exactly once, either by
+    the request when it ends or by the caller when it abandons the request.
+    """
+
+    def __init__(self, slots: threading.BoundedSemaphore | None):
+        self._slots = slots
+        self._lock = threading.Lock()
+        self.held = False
+        self.abandoned = False
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """Takes a slot (if capped); False when none is free or the request was abandoned meanwhile."""
+        if self._slots is not None and not self._slots.acquire(blocking):
+            return False
+        with self._lock:
+            if self.abandoned:
+                if self._slots is not None:
+                    self._slots.release()
+                return False
+            self.held = True
+        return True
+
+    def release(self):
+        with self._lock:
+            if self.held and self._slots is not None:
+                self._slots.release()
+            self.held = False
+
+    def abandon(self):
+        """Nobody waits for this request any more: free its slot now and stop its retries."""
+        with self._lock:
+            self.abandoned = True
+        self.release()
+
 
 class LlmExtractor:
     """
@@ -9,20 +61,107 @@ class LlmExtractor:
     
     Receives the FULL PDF text and organizes it into the final JSON.
     This is the "minimum" strategy guaranteed by the manager.
+
+    Tail-latency controls:
+    - `timeout_s`: hard limit for one extract() call (also sent as the HTTP timeout).
+    - `hedge_percentile`: if the first request is still running after the
+      p-th percentile of recently observed latencies, a duplicate request is
+      sent and whichever answers first wins. Before `HEDGE_MIN_SAMPLES`
+      latencies are known, `hedge_initial_delay_s` is used.
+    A request nobody waits for any more (the losing hedge, or one past the
+    timeout) gives its concurrency slot back at once and is not retried; its
+    HTTP exchange shares the keep-alive pool, so it is left to finish or hit
+    its own read timeout on a helper thread.
+    `hedge_stats` counts calls, hedges issued/won and timeouts.
+
+    Every request is recorded in `metrics` (latency, slot wait, tokens) and in
+    the trace of the calling document, when there is one.
+
+    Prompts put the static instructions and the schema first and the document
+    last, so calls of the same schema share a long prefix (provider-side prompt
+    caching). With a `response_cache` (a CacheStore), answers are kept under
+    (model, whitespace-normalized prompt): a byte-identical context + schema
+    skips the network. Only answers that parse as JSON are stored.
+
+    With a `transport` (TransportConfig), each request retries retryable
+    errors with jittered backoff inside its time limit, and a circuit breaker
+    refuses calls while the provider keeps failing: extract() then returns None
+    right away (fields unresolved) instead of queueing behind a stalled API.
+    The default client is built on the transport's keep-alive pool, sized to
+    `max_concurrency` (x2 for hedges) unless the config says otherwise.
     """
+
+    HEDGE_MIN_SAMPLES = 10
     
-    def __init__(self, model: str = "gpt-5-mini"):
-        self.model = model 
+    def __init__(self,
+                 model: str = "gpt-5-mini",
+                 max_concurrency: int | None = None,
+                 client: Any = None,
+                 timeout_s: float | None = None,
+                 hedge_percentile: float | None = None,
+                 hedge_initial_delay_s: float = 3.0,
+                 hedge_min_delay_s: float = 0.2,
+                 metrics: MetricsRegistry | None = None,
+                 client_factory: Callable[[], Any] | None = None,
+                 response_cache: Any = None,
+                 transport: TransportConfig | None = None):
+        self.model = model
+        self.response_cache = response_cache
+        if transport and transport.max_connections is None and max_concurrency:
+            transport = replace(transport, max_connections=2 * max_concurrency)
+        self.transport = transport
+        self.breaker = (CircuitBreaker(transport.breaker_failures, transport.breaker_reset_s)
+                        if transport and transport.breaker_failures > 0 else None)
+        self.metrics = metrics or REGISTRY
+        # Caps in-flight API calls when several documents share this extractor.
+        self._slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+        self.timeout_s = timeout_s
+        self.hedge_percentile = hedge_percentile
+        self.hedge_initial_delay_s = hedge_initial_delay_s
+        self.hedge_min_delay_s = hedge_min_delay_s
+        self._latencies = deque(maxlen=200)
+        self._stats_lock = threading.Lock()
+        self.hedge_stats = {"calls": 0, "hedges_issued": 0, "hedges_won": 0, "timeouts": 0}
+        # Helper threads of timed/hedged calls, shared by all calls; abandoned requests may still be draining.
+        self._pool_workers = 4 * max_concurrency if max_concurrency else None
+        self._pool: ThreadPoolExecutor | None = None
+        self._pool_lock = threading.Lock()
+        # The OpenAI SDK is slow to import: the default client is only built
+        # by the first document that actually reaches Stage 3.
+        self._client = client
+        self._client_ready = client is not None
+        if client_factory is None and transport is not None:
+            client_factory = lambda: create_openai_client(self.transport)
+        self._client_factory = client_factory or _default_client
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self) -> Any:
+        if not self._client_ready:
+            with self._client_lock:
+                if not self._client_ready:
+                    self._client = self._create_client()
+                    self._client_ready = True
+        return self._client
+
+    @client.setter
+    def client(self, client: Any):
+        self._client = client
+        self._client_ready = True
+
+    def _create_client(self) -> Any:
         try:
-            self.client = OpenAI()
+            return self._client_factory()
         except Exception as e:
-            print(f"Critical Error: Failed to initialize OpenAI client. Is API Key set?")
-            print(f"Detail: {e}")
-            self.client = None
+            log.error("Critical Error: Failed to initialize OpenAI client. Is API Key set?")
+            log.error("Detail: %s", e)
+            return None
 
     def _create_prompt(self, pdf_text: str, extraction_schema: Dict[str, str]) -> str:
         """
         Creates the robust "full text" prompt.
+        Static instructions, then the schema, then the document: the part that
+        changes between calls comes last.
         """
         
         fields_string = []
@@ -35,11 +174,6 @@ class LlmExtractor:
         Context: You are a document data extraction assistant.
         The document text is in Portuguese.
 
-        Document (Filtered Text):
-        ---
-        {pdf_text}
-        ---
-        
         Task: Your job is to analyze the document text and extract the data
         into a valid JSON object.
         
@@ -52,33 +186,307 @@ class LlmExtractor:
         Extraction Schema:
         {fields_string}
 
+        Document (Filtered Text):
+        ---
+        {pdf_text}
+        ---
+
         Output JSON:
         """
 
-    def extract(self, pdf_text: str, extraction_schema: Dict[str, str]) -> Dict[str, Any] | None:
+    def prompt_key(self, prompt: str) -> str:
+        """Response-cache key: the model plus the prompt with whitespace runs collapsed."""
+        normalized = " ".join(prompt.split())
+        return hashlib.sha256(f"{self.model}\x00{normalized}".encode('utf-8')).hexdigest()
+
+    def _lookup(self, prompt: str) -> str | None:
+        if self.response_cache is None:
+            return None
+        content = self.response_cache.get_llm_response(self.prompt_key(prompt))
+        self.metrics.inc("llm_cache_lookups_total", model=self.model, outcome="hit" if content is not None else "miss")
+        return content
+
+    def _store(self, prompt: str, content: str):
+        if self.response_cache is not None:
+            self.response_cache.put_llm_response(self.prompt_key(prompt), content)
+
+    def cached_result(self, pdf_text: str, extraction_schema: Dict[str, str]) -> Dict[str, Any] | None:
+        """The stored answer for exactly this context + schema, without touching the network."""
+        content = self._lookup(self._create_prompt(pdf_text, extraction_schema))
+        return json.loads(content) if content is not None else None
+
+    def extract(self, pdf_text: str, extraction_schema: Dict[str, str], timeout_s: float | None = None) -> Dict[str, Any] | None:
         """
         Executes the "Organizer" call to the LLM.
         """
+        prompt = self._create_prompt(pdf_text, extraction_schema)
+        cached = self._lookup(prompt)
+        if cached is not None:
+            log.debug("    - [LLM-CACHE] Answered from the local response cache.")
+            return json.loads(cached)
+
         if not self.client:
-            print("...[LOG] LLM Extractor not initialized. Aborting extraction.")
+            log.warning("...[LOG] LLM Extractor not initialized. Aborting extraction.")
             return None
 
         # [AÇÃO 13] Nota: o pdf_text que chega aqui é o "filtered_llm_context"
         # do Orchestrator, se o Estágio 1 falhar.
-        print(f"...[LOG] Calling Stage 3: LLM (Filtered Text) (Model: {self.model})")
-        
-        prompt = self._create_prompt(pdf_text, extraction_schema)
+        log.debug("...[LOG] Calling Stage 3: LLM (Filtered Text) (Model: %s)", self.model)
         
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                response_format={"type": "json_object"}
-            )
-            
-            json_result = json.loads(response.choices[0].message.content)
-            return json_result
-            
+            content = self._complete(prompt, timeout_s)
+            result = json.loads(content)
+            self._store(prompt, content)
+            return result
+        except CircuitOpenError as e:
+            log.info("...[LOG] %s Fields stay unresolved.", e)
+            return None
+        except Exception as e:
+            log.warning("Error calling LLM API: %s", e)
+            return None
+
+    def _count(self, counter: str):
+        with self._stats_lock:
+            self.hedge_stats[counter] += 1
+
+    def hedge_delay(self) -> float:
+        """Delay before a duplicate request: p-th percentile of recent latencies."""
+        with self._stats_lock:
+            samples = list(self._latencies)
+        if len(samples) < self.HEDGE_MIN_SAMPLES:
+            return self.hedge_initial_delay_s
+        return max(self.hedge_min_delay_s, percentile(samples, self.hedge_percentile))
+
+    def _request(self, prompt: str, timeout: float | None, permit: _Permit,
+                 trace: DocumentTrace | None = None) -> str:
+        """
+        One chat completion in JSON mode; returns the raw message content.
+        With a transport, retryable failures are retried (jittered backoff)
+        while `timeout` allows, the circuit breaker stays closed and the
+        request has not been abandoned.
+        """
+        try:
+            if self.breaker and not self.breaker.allow():
+                self.metrics.inc("llm_short_circuits_total", model=self.model)
+                raise CircuitOpenError(f"LLM circuit breaker is {self.breaker.state}.")
+            if not permit.held:
+                wait_start = time.perf_counter()
+                acquired = permit.acquire()
+                waited = time.perf_counter() - wait_start
+                self.metrics.observe("llm_slot_wait_seconds", waited)
+                if trace:
+                    trace.add_span("llm_wait", wait_start, waited)
+                if not acquired:
+                    raise CancelledError("LLM request abandoned while waiting for a slot.")
+            deadline = None if timeout is None else time.perf_counter() + timeout
+            attempt = 0
+            while True:
+                start_time = time.perf_counter()
+                try:
+                    response = self.client.chat.completions.create(
+                        model=self.model,
+                        messages=[{"role": "user", "content": prompt}],
+                        response_format={"type": "json_object"},
+                        **self._timeout_kwargs(deadline)
+                    )
+                except Exception as e:
+                    delay = self._retry_delay(e, attempt, deadline)
+                    if delay is None or permit.abandoned:
+                        raise
+                    log.info("    - [LLM] Attempt %d failed (%s). Retrying in %.2fs.", attempt + 1, e, delay)
+                    self.metrics.inc("llm_retries_total", model=self.model)
+                    time.sleep(delay)
+                    attempt += 1
+                    continue
+
+                if self.breaker:
+                    self.breaker.record_success()
+                elapsed = time.perf_counter() - start_time
+                with self._stats_lock:
+                    self._latencies.append(elapsed)
+                self._record_usage(response, elapsed, trace)
+                return response.choices[0].message.content
+        finally:
+            permit.release()
+
+    def _timeout_kwargs(self, deadline: float | None) -> Dict[str, Any]:
+        """HTTP timeout of one attempt: the transport's connect/read limits, capped by what is left of the call."""
+        remaining = None if deadline is None else max(0.001, deadline - time.perf_counter())
+        if self.transport is None:
+            return {"timeout": remaining} if remaining else {}
+        read_s, connect_s = self.transport.read_timeout_s, self.transport.connect_timeout_s
+        if remaining is not None:
+            read_s, connect_s = min(read_s, remaining), min(connect_s, remaining)
+        return {"timeout": _httpx().Timeout(read_s, connect=connect_s)}
+
+    def _retry_delay(self, error: Exception, attempt: int, deadline: float | None) -> float | None:
+        """Backoff before the next attempt, or None to give up (not retryable, out of retries/time, breaker open)."""
+        if self.transport is None:
+            return None
+        retryable = is_retryable(error)
+        if self.breaker:
+            if retryable and self.breaker.record_failure():
+                log.warning("[LLM] Circuit breaker opened after %d failure(s).", self.breaker.failures)
+                self.metrics.inc("llm_breaker_opened_total", model=self.model)
+            elif not retryable and self.breaker.state == "half_open":
+                self.breaker.release_probe()
+        if not retryable or attempt >= self.transport.max_retries:
+            return None
+        if self.breaker and self.breaker.state != "closed":
+            return None
+        delay = self.transport.backoff(attempt)
+        if deadline is not None and time.perf_counter() + delay >= deadline:
+            return None
+        return delay
+
+    def _record_usage(self, response: Any, elapsed: float, trace: DocumentTrace | None):
+        usage = getattr(response, "usage", None)
+        prompt_tokens = getattr(usage, "prompt_tokens", None) or 0
+        completion_tokens = getattr(usage, "completion_tokens", None) or 0
+        self.metrics.observe("llm_request_seconds", elapsed, model=self.model)
+        self.metrics.inc("llm_requests_total", model=self.model)
+        if prompt_tokens:
+            self.metrics.inc("llm_tokens_total", prompt_tokens, model=self.model, kind="prompt")
+        if completion_tokens:
+            self.metrics.inc("llm_tokens_total", completion_tokens, model=self.model, kind="completion")
+        if trace:
+            trace.add_llm_usage(prompt_tokens, completion_tokens)
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self._pool_workers, thread_name_prefix="llm")
+        return self._pool
+
+    def _maybe_hedge(self, prompt: str, pending: set, permits: List[_Permit], remaining,
+                     trace: DocumentTrace | None = None):
+        """Waits the hedge delay; if the primary is still running, adds a duplicate request."""
+        delay = self.hedge_delay()
+        budget = remaining()
+        done, _ = wait(pending, timeout=delay if budget is None else min(delay, budget))
+
+        # Only hedge if there is time left and, when capped, a free slot (never queue a hedge).
+        if not done and (budget is None or budget > delay):
+            permit = _Permit(self._slots)
+            if permit.acquire(blocking=False):
+                permits.append(permit)
+                pending.add(self._executor().submit(self._request, prompt, remaining(), permit, trace))
+                self._count("hedges_issued")
+
+    def _complete(self, prompt: str, timeout_s: float | None = None) -> str:
+        """
+        Runs the request, hedged when enabled, within the hard timeout (per-call
+        override wins). With a timeout the request runs on a helper thread so the
+        caller always gets control back on time, even if the client retries.
+        Whatever is still running when the call returns is abandoned.
+        """
+        self._count("calls")
+        # Captured here: the helper threads below do not inherit the context.
+        trace = current_trace()
+        if timeout_s is None:
+            timeout_s = self.timeout_s
+        if self.hedge_percentile is None and timeout_s is None:
+            return self._request(prompt, None, _Permit(self._slots), trace)
+
+        start_time = time.perf_counter()
+
+        def remaining() -> float | None:
+            if timeout_s is None:
+                return None
+            return max(0.0, timeout_s - (time.perf_counter() - start_time))
+
+        permits = [_Permit(self._slots)]
+        primary = self._executor().submit(self._request, prompt, timeout_s, permits[0], trace)
+        pending = {primary}
+        try:
+            if self.hedge_percentile is not None:
+                self._maybe_hedge(prompt, pending, permits, remaining, trace)
+
+            last_error: Exception | None = None
+            while pending:
+                done, pending = wait(pending, timeout=remaining(), return_when=FIRST_COMPLETED)
+                if not done:
+                    self._count("timeouts")
+                    self.metrics.inc("llm_timeouts_total", model=self.model)
+                    raise TimeoutError(f"LLM call exceeded {timeout_s}s")
+                for future in done:
+                    if future.exception() is None:
+                        if future is not primary:
+                            self._count("hedges_won")
+                        return future.result()
+                    last_error = future.exception()
+            raise last_error
+        finally:
+            for future in pending:
+                future.cancel()
+            for permit in permits:
+                permit.abandon()
+
+    def _create_batch_prompt(self, pdf_texts: List[str], extraction_schema: Dict[str, str]) -> str:
+        """
+        Same task as _create_prompt, for several documents that share one schema.
+        Each document is delimited and the answer is one array entry per document.
+        """
+        fields_string = "\n".join(f'- "{key}": ({description})' for key, description in extraction_schema.items())
+        documents_string = "\n".join(
+            f"=== DOCUMENT {i} ===\n{text}\n=== END DOCUMENT {i} ===" for i, text in enumerate(pdf_texts)
+        )
+
+        return f"""
+        Context: You are a document data extraction assistant.
+        The documents are in Portuguese. Each one is independent.
+
+        Task: For EACH document, extract the data described in the Extraction Schema.
+
+        Rules:
+        1.  Respond ONLY with a valid JSON object of the form
+            {{"documents": [{{"document_id": <number>, "fields": {{...}}}}, ...]}}
+            with exactly one entry per document.
+        2.  "fields" must contain every key of the Extraction Schema.
+        3.  If a field is not found in that document, return null.
+        4.  Return the exact string from the document (e.g., "JOANA D'ARC", "SITUAÇÃO REGULAR").
+
+        Extraction Schema:
+        {fields_string}
+
+        Documents (Filtered Text):
+        {documents_string}
+
+        Output JSON:
+        """
+
+    def extract_many(self, pdf_texts: List[str], extraction_schema: Dict[str, str]) -> List[Dict[str, Any] | None] | None:
+        """
+        One API call for several documents. Returns one entry per input document;
+        an entry is None when the response for that document is missing or malformed
+        (callers fall back to extract() for those). Returns None when the call
+        itself failed or its answer is not JSON.
+        """
+        prompt = self._create_batch_prompt(pdf_texts, extraction_schema)
+        cached = self._lookup(prompt)
+        if cached is None and not self.client:
+            log.warning("...[LOG] LLM Extractor not initialized. Aborting extraction.")
+            return None
+
+        log.debug("...[LOG] Calling Stage 3: LLM batch of %d documents (Model: %s)", len(pdf_texts), self.model)
+        try:
+            content = cached if cached is not None else self._complete(prompt)
+            payload = json.loads(content)
+            if cached is None:
+                self._store(prompt, content)
         except Exception as e:
-            print(f"Error calling LLM API: {e}")
-            return None
\ No newline at end of file
+            log.warning("Error calling LLM API (batch): %s", e)
+            return None
+
+        results: List[Dict[str, Any] | None] = [None] * len(pdf_texts)
+        entries = payload.get("documents") if isinstance(payload, dict) else None
+        for entry in entries if isinstance(entries, list) else []:
+            if not isinstance(entry, dict):
+                continue
+            doc_id, fields = entry.get("document_id"), entry.get("fields")
+            if not isinstance(doc_id, int) or not 0 <= doc_id < len(pdf_texts) or not isinstance(fields, dict):
+                continue
+            if all(key in fields for key in extraction_schema):
+                results[doc_id] = {key: fields[key] for key in extraction_schema}
+        return results
@@ -0,0 +1,134 @@
+import importlib
+import random
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+# HTTP statuses worth another attempt: timeouts, conflicts, rate limits and server errors.
+RETRYABLE_STATUS = {408, 409, 429}
+
+
+@dataclass
+class TransportConfig:
+    """
+    How LlmExtractor talks to the provider.
+
+    - Connection pool: `max_connections` keep-alive connections (None: sized
+      by LlmExtractor from its concurrency, hedges included), idle ones closed
+      after `keepalive_expiry_s`.
+    - `connect_timeout_s` / `read_timeout_s`: per attempt. A per-call budget,
+      when shorter, still wins.
+    - Retry: up to `max_retries` extra attempts on retryable errors, with full
+      jitter backoff between `backoff_base_s` and `backoff_max_s`.
+    - Circuit breaker: opens after `breaker_failures` consecutive retryable
+      failures and lets one probe through every `breaker_reset_s` (0 disables).
+    """
+    max_connections: int | None = None
+    keepalive_expiry_s: float = 30.0
+    connect_timeout_s: float = 3.0
+    read_timeout_s: float = 60.0
+    max_retries: int = 2
+    backoff_base_s: float = 0.25
+    backoff_max_s: float = 4.0
+    breaker_failures: int = 5
+    breaker_reset_s: float = 30.0
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter delay before retry number `attempt` (0-based)."""
+        return random.uniform(0, min(self.backoff_max_s, self.backoff_base_s * (2 ** attempt)))
+
+
+class CircuitOpenError(RuntimeError):
+    """The provider is failing: calls are refused until the breaker lets a probe through."""
+
+
+class CircuitBreaker:
+    """
+    closed -> (N consecutive failures) -> open -> (reset_s) -> half_open: one
+    probe request; its success closes the breaker, its failure re-opens it.
+    Thread-safe.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_s: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_s = reset_s
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        """True if a request may go out now (in half_open, only the single probe)."""
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and self._clock() - self.opened_at >= self.reset_s:
+                self.state = "half_open"
+                self._probe_in_flight = False
+            if self.state == "half_open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> bool:
+        """Counts a failure; returns True when this one opened the breaker."""
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or (self.state == "closed" and self.failures >= self.failure_threshold):
+                self.state = "open"
+                self.opened_at = self._clock()
+                self._probe_in_flight = False
+                return True
+            return False
+
+    def release_probe(self):
+        """The probe ended without telling anything about the provider (e.g. a 400)."""
+        with self._lock:
+            self._probe_in_flight = False
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Connection problems, timeouts, 408/409/429 and 5xx. Client errors (4xx) are not retried."""
+    status = getattr(error, "status_code", None)
+    if isinstance(status, int):
+        return status in RETRYABLE_STATUS or status >= 500
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    # Only look at the OpenAI exception types if the SDK is already loaded.
+    openai = sys.modules.get("openai")
+    return openai is not None and isinstance(error, openai.APIConnectionError)
+
+
+def _httpx() -> Any:
+    """The HTTP library the installed OpenAI SDK is built on (httpx2 in newer releases)."""
+    try:
+        return importlib.import_module("httpx2")
+    except ImportError:
+        return importlib.import_module("httpx")
+
+
+def build_http_client(config: TransportConfig) -> Any:
+    """Keep-alive pooled HTTP client with the configured connect/read timeouts."""
+    httpx = _httpx()
+    return httpx.Client(
+        limits=httpx.Limits(max_connections=config.max_connections,
+                            max_keepalive_connections=config.max_connections,
+                            keepalive_expiry=config.keepalive_expiry_s),
+        timeout=httpx.Timeout(config.read_timeout_s, connect=config.connect_timeout_s),
+    )
+
+
+def create_openai_client(config: TransportConfig, **client_kwargs) -> Any:
+    """OpenAI client on the pooled transport. The SDK's own retries are off: LlmExtractor retries."""
+    from openai import OpenAI
+    return OpenAI(http_client=build_http_client(config), max_retries=0, **client_kwargs)
@@ -0,0 +1,84 @@
+import unicodedata
+from functools import lru_cache
+from typing import Dict, List, Tuple, Iterable
+
+Word = Tuple[float, float, float, float, str, int, int, int]
+
+
+@lru_cache(maxsize=65536)
+def fold_text(text: str) -> str:
+    """Uppercase + accent-folded form used for anchor matching ("Inscrição" -> "INSCRICAO")."""
+    if text.isascii():
+        return text.upper()
+    decomposed = unicodedata.normalize("NFKD", text.upper())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+class WordIndex:
+    """
+    Per-document spatial index over page words, built once per extraction.
+
+    - `table`: the columnar WordTable (built by PdfParser, or here from plain
+      word tuples); line, column and zone queries are NumPy masks over it.
+      `page_size` is the real page size when the parser provided it.
+    - `words`: the same table seen as a sequence of Word tuples.
+    - `upper`: pre-uppercased texts, so rules never re-normalize words.
+    - `anchors`: anchor positions found for this document (filled by the
+      AnchorMatcher in one pass).
+    - `ids_with_text()`: exact-text lookup, built on first use (layout templates).
+    Queries return words in the same order the old linear scans did
+    (ties keep the original page order), so results are unchanged.
+    """
+
+    def __init__(self, words: Iterable[Word]):
+        # NumPy is only imported once a document is actually laid out.
+        from .word_table import WordTable
+        self.table = WordTable.from_words(words)
+        self.words = self.table
+        # Plain list: the rules read it one word at a time.
+        self.upper: List[str] = self.table.upper.tolist()
+
+        self._first_by_text: Dict[str, int] = {}
+        for i, text in enumerate(self.upper):
+            self._first_by_text.setdefault(text, i)
+
+        self.anchors: Dict[str, Word | None] = {}
+        self._ids_by_text: Dict[str, List[int]] | None = None
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    @property
+    def page_size(self) -> Tuple[float, float] | None:
+        """(width, height) of the page, when the parser provided it."""
+        return self.table.page_size
+
+    def on_line(self, y0: float, y1: float, tolerance: float = 2) -> List[Word]:
+        """Words with wy0 >= y0 - tol and wy1 <= y1 + tol, sorted by x0."""
+        return self.table.rows(self.table.on_line(y0, y1, tolerance))
+
+    def first_below(self, y: float, x_min: float, x_max: float) -> Word | None:
+        """Top-most word with wy0 > y and x_min <= wx0 <= x_max (first in page order on ties)."""
+        i = self.table.first_below(y, x_min, x_max)
+        return self.table[i] if i is not None else None
+
+    def in_zone(self, x_after: float, y_after: float) -> List[int]:
+        """Ids (in page order) of words with wx0 > x_after and wy0 > y_after."""
+        return self.table.in_zone(x_after, y_after).tolist()
+
+    def first_with_text(self, options: Iterable[str]) -> Word | None:
+        """First word (page order) whose uppercased text is one of `options`."""
+        hits = [self._first_by_text[o] for o in options if o in self._first_by_text]
+        return self.table[min(hits)] if hits else None
+
+    def ids_with_text(self, text: str) -> List[int]:
+        """Ids (page order) of the words whose text is exactly `text`."""
+        if self._ids_by_text is None:
+            self._ids_by_text = {}
+            for i, word_text in enumerate(self.table.text):
+                self._ids_by_text.setdefault(word_text, []).append(i)
+        return self._ids_by_text.get(text, [])
+
+    def nearest_start(self, x: float, y: float, tol_x: float, tol_y: float) -> Word | None:
+        """Word whose top-left corner is within (tol_x, tol_y) of (x, y), closest in x first."""
+        i = self.table.nearest_start(x, y, tol_x, tol_y)
+        return self.table[i] if i is not None else None
@@ -0,0 +1,126 @@
+import sys
+from typing import List, Iterable, Iterator, Tuple
+import numpy as np
+from .word_index import Word
+
+
+class WordTable:
+    """
+    Columnar form of a page's words (the 8-tuples of get_text("words")).
+
+    - `x0`, `y0`, `x1`, `y1`: float64 arrays; `block`, `line`, `word_no`: int32.
+    - `text` / `upper`: object arrays of interned strings (upper reuses `text`
+      when the word is already uppercase).
+    - `page_size`: (width, height) of the page the words come from, when known
+      (None for hand-built words).
+    Built once per page by PdfParser and picklable, so it is also what the
+    batch workers send back. Indexing still yields the classic Word tuple, so
+    code that reads a handful of words keeps working unchanged; the spatial
+    queries below run as NumPy masks over the columns.
+    """
+
+    __slots__ = ("x0", "y0", "x1", "y1", "block", "line", "word_no", "text", "upper",
+                 "_by_y0", "_by_x0", "_y0_sorted", "_x0_sorted", "page_size")
+
+    def __init__(self, x0, y0, x1, y1, block, line, word_no, text, upper,
+                 page_size: Tuple[float, float] | None = None):
+        self.x0, self.y0, self.x1, self.y1 = x0, y0, x1, y1
+        self.block, self.line, self.word_no = block, line, word_no
+        self.text, self.upper = text, upper
+        self.page_size = page_size
+        # Stable sort: ties keep page order, like the sorted() lists they replace.
+        self._by_y0 = np.argsort(y0, kind="stable")
+        self._by_x0 = np.argsort(x0, kind="stable")
+        self._y0_sorted = y0[self._by_y0]
+        self._x0_sorted = x0[self._by_x0]
+
+    @classmethod
+    def from_words(cls, words: Iterable[Word], page_size: Tuple[float, float] | None = None) -> "WordTable":
+        if isinstance(words, WordTable):
+            return words
+        words = list(words)
+        n = len(words)
+        coords = np.array([w[:4] for w in words], dtype=np.float64).reshape(n, 4)
+        # Hand-built words may omit the block/line/word numbers.
+        ids = np.array([(tuple(w[5:8]) + (0, 0, 0))[:3] for w in words], dtype=np.int32).reshape(n, 3)
+        text = np.empty(n, dtype=object)
+        upper = np.empty(n, dtype=object)
+        for i, word in enumerate(words):
+            text[i] = sys.intern(word[4])
+            up = word[4].upper()
+            upper[i] = text[i] if up == word[4] else sys.intern(up)
+        return cls(coords[:, 0].copy(), coords[:, 1].copy(), coords[:, 2].copy(), coords[:, 3].copy(),
+                   ids[:, 0].copy(), ids[:, 1].copy(), ids[:, 2].copy(), text, upper, page_size)
+
+    def __getstate__(self):
+        return (self.x0, self.y0, self.x1, self.y1, self.block, self.line, self.word_no, self.text, self.upper,
+                self.page_size)
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    def __getitem__(self, i: int) -> Word:
+        return (float(self.x0[i]), float(self.y0[i]), float(self.x1[i]), float(self.y1[i]), self.text[i],
+                int(self.block[i]), int(self.line[i]), int(self.word_no[i]))
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (WordTable, list, tuple)):
+            return len(self) == len(other) and list(self) == [tuple(w) for w in other]
+        return NotImplemented
+
+    __hash__ = None
+
+    def __iter__(self) -> Iterator[Word]:
+        return iter(self.rows(range(len(self))))
+
+    def rows(self, ids: Iterable[int]) -> List[Word]:
+        ids = np.fromiter(ids, dtype=np.intp) if not isinstance(ids, np.ndarray) else ids
+        return list(zip(self.x0[ids].tolist(), self.y0[ids].tolist(), self.x1[ids].tolist(), self.y1[ids].tolist(),
+                        self.text[ids].tolist(), self.block[ids].tolist(), self.line[ids].tolist(),
+                        self.word_no[ids].tolist()))
+
+    def nbytes(self) -> int:
+        """Bytes held by the arrays (the interned strings themselves excluded)."""
+        return sum(getattr(self, name).nbytes for name in self.__slots__ if name != "page_size")
+
+    def on_line(self, y0: float, y1: float, tolerance: float = 2) -> np.ndarray:
+        """Ids with wy0 >= y0 - tol and wy1 <= y1 + tol, sorted by x0 (page order on ties)."""
+        lo = np.searchsorted(self._y0_sorted, y0 - tolerance, side="left")
+        hi = np.searchsorted(self._y0_sorted, y1 + tolerance, side="right")
+        ids = self._by_y0[lo:hi]
+        ids = ids[self.y1[ids] <= y1 + tolerance]
+        return ids[np.lexsort((ids, self.x0[ids]))]
+
+    def first_below(self, y: float, x_min: float, x_max: float) -> int | None:
+        """Id of the top-most word with wy0 > y and x_min <= wx0 <= x_max (page order on ties)."""
+        lo = np.searchsorted(self._x0_sorted, x_min, side="left")
+        hi = np.searchsorted(self._x0_sorted, x_max, side="right")
+        ids = self._by_x0[lo:hi]
+        ids = ids[self.y0[ids] > y]
+        if not len(ids):
+            return None
+        return int(ids[np.lexsort((ids, self.y0[ids]))[0]])
+
+    def in_zone(self, x_after: float, y_after: float) -> np.ndarray:
+        """Ids (page order) of the words with wx0 > x_after and wy0 > y_after."""
+        return np.flatnonzero((self.x0 > x_after) & (self.y0 > y_after))
+
+    def leading_above(self, y_limit: float) -> np.ndarray:
+        """Ids of the words before the first one (page order) with wy0 > y_limit."""
+        below = np.flatnonzero(self.y0 > y_limit)
+        return np.arange(below[0] if len(below) else len(self))
+
+    def nearest_start(self, x: float, y: float, tol_x: float, tol_y: float) -> int | None:
+        """Id of the word whose top-left corner is within (tol_x, tol_y) of (x, y), closest in x first."""
+        lo = np.searchsorted(self._y0_sorted, y - tol_y, side="left")
+        hi = np.searchsorted(self._y0_sorted, y + tol_y, side="right")
+        ids = self._by_y0[lo:hi]
+        dx = np.abs(self.x0[ids] - x)
+        keep = dx <= tol_x
+        ids, dx = ids[keep], dx[keep]
+        if not len(ids):
+            return None
+        return int(ids[np.lexsort((ids, dx))[0]])
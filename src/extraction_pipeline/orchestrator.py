@@ -1,139 +1,485 @@
+import threading
 import time
-from typing import Dict, Any, Tuple
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+from typing import Dict, Any, Tuple, List, Iterable
 from .pdf_parser import PdfParser
+from .context_filter import ContextFilter
+from .time_budget import TimeBudget
+from .speculation import FieldHitRates, Speculation
+from .stage_router import StageRouter
+from .telemetry import DocumentTrace, MetricsRegistry, REGISTRY, activate, get_logger
 from .extractors.llm_extractor import LlmExtractor
 from .extractors.heuristic_extractor import HeuristicExtractor
 from .extractors.cache_extractor import CacheExtractor
+from .extractors.word_index import WordIndex
+
+# Below this much remaining budget an LLM call is not worth starting.
+LLM_MIN_BUDGET_S = 1.0
+
+log = get_logger("orchestrator")
+
+
+@dataclass
+class DocumentRun:
+    """Result of one document plus how the time was spent."""
+    result: Dict[str, Any]
+    time_taken: float
+    stage_times: Dict[str, float] = field(default_factory=dict)
+    timed_out_fields: List[str] = field(default_factory=list)
+    pages_read: int = 0
+    field_sources: Dict[str, str] = field(default_factory=dict)
+    trace: DocumentTrace | None = None
+
+
+@dataclass
+class PageScan:
+    """What Stage 1 got out of the pages it had to read."""
+    stage_1_results: Dict[str, Any]
+    remaining_schema: Dict[str, str]
+    pdf_text: str
+    first_page_words: list
+    pages_read: int
+
+
+def scan_pages(heuristic_extractor: HeuristicExtractor, parser: PdfParser, schema: Dict[str, str],
+               budget: TimeBudget | None = None, label: str | None = None,
+               skip_fields: Iterable[str] = ()) -> PageScan:
+    """
+    Lazy multi-page Stage 1: pages are laid out one at a time and the heuristics
+    only look for the fields still missing. Stops at the first page after which
+    every field is resolved (or the budget is gone), so fields on page 1 cost the
+    same whatever the page count. Only the current page's words are alive, plus
+    page 1's words, kept for the Stage 2 layout rules. The text of the pages read
+    is kept for the LLM context. `skip_fields` (routed around Stage 1) are
+    passed on untouched and do not keep later pages being read.
+    When every field has a zone rule, only those regions of page 1 are laid
+    out first; the full page is only laid out if one of them is not found.
+    """
+    budget = budget or TimeBudget()
+    found: Dict[str, Any] = {}
+    skipped = set(skip_fields)
+    remaining = {f: d for f, d in schema.items() if f not in skipped}
+
+    regions = heuristic_extractor.regions_for(label, remaining) if remaining and not skipped and not parser.parsed else None
+    if regions:
+        with budget.stage("parse"):
+            region_words = parser.extract_region_words(regions)
+        if region_words:
+            with budget.stage("stage_1"):
+                found, remaining = heuristic_extractor.extract(region_words, remaining, budget, 0, label)
+            if not remaining:
+                log.debug("[Orchestrator] Stage 1 resolved every field from %d page region(s).", len(regions))
+                return PageScan(found, {}, " ".join(w[4] for w in region_words), region_words, 1)
+
+    texts: List[str] = []
+    first_page_words = None
+    pages_read = 0
+    pages = parser.iter_pages()
+    try:
+        while True:
+            with budget.stage("parse"):
+                page = next(pages, None)
+            if page is None:
+                break
+
+            page_no, text, words = page
+            pages_read += 1
+            if text:
+                texts.append(text)
+            if first_page_words is None:
+                first_page_words = words
+            if words and remaining:
+                with budget.stage("stage_1"):
+                    page_results, remaining = heuristic_extractor.extract(words, remaining, budget, page_no, label)
+                found.update(page_results)
+            if not remaining or budget.expired():
+                break
+    finally:
+        pages.close()
+    remaining = {f: d for f, d in schema.items() if f in remaining or f in skipped}
+
+    if pages_read > 1:
+        log.info("[Orchestrator] Stage 1 read %d of %d page(s).", pages_read, parser.page_count)
+    return PageScan(found, remaining, "\n".join(texts), first_page_words or [], pages_read)
+
 
 class Orchestrator:
     """
     [AÇÃO 17] Pipeline 0-1-2-3 (Heurística "Word-Aware")
+
+    With `speculative`, run_document starts the LLM call for the fields the
+    cheap stages usually miss for the label (see FieldHitRates, computed from
+    the router's per-stage counters; an in-memory, non-adaptive router is
+    created when none is given) as soon as the first page is laid out, so Stage 1/2 run while the request is in flight.
+    Fields they resolve after all are dropped from the answer; a speculation
+    nothing needs any more is cancelled (or left to finish and discarded).
+
+    With a `router` (StageRouter), per-(label, field, stage) outcomes are
+    recorded and fields skip the stages that keep failing for them.
     """
     
     def __init__(self, 
                  heuristic_extractor: HeuristicExtractor, 
                  cache_extractor: CacheExtractor, 
-                 llm_extractor: LlmExtractor):
+                 llm_extractor: LlmExtractor,
+                 context_filter: ContextFilter | None = None,
+                 metrics: MetricsRegistry | None = None,
+                 speculative: bool = False,
+                 hit_rates: FieldHitRates | None = None,
+                 speculation_workers: int = 4,
+                 router: StageRouter | None = None):
         
         self.heuristic_extractor = heuristic_extractor 
         self.cache_extractor = cache_extractor     
         self.llm_extractor = llm_extractor       
-        print("[Orchestrator] Initialized successfully (FINAL 4-Stage Pipeline).")
-
-    def _get_hardcoded_clues(self) -> set:
-        FIXED_CLUES = [
-            "inscrição", "seccional", "subseção", "categoria", "situação",
-            "endereço profissional", "telefone profissional",
-            "pesquisar por", "tipo:", "cidade:", "data base:", "produto:", "sistema:",
-            "valor parcela", "data de referência"
-        ]
-        return set(FIXED_CLUES)
+        self.context_filter = context_filter or ContextFilter()
+        self.metrics = metrics or REGISTRY
+        self.speculative = speculative
+        # Speculation reads the router's outcome counters; without a router they are only kept in memory.
+        if router is None and speculative:
+            router = StageRouter(adaptive=False)
+        self.router = router
+        self.hit_rates = hit_rates or (FieldHitRates(router) if router is not None else None)
+        self.speculation_workers = speculation_workers
+        self._speculation_pool: ThreadPoolExecutor | None = None
+        self._pool_lock = threading.Lock()
+        log.debug("[Orchestrator] Initialized successfully (FINAL 4-Stage Pipeline).")
 
     def _build_filtered_llm_context(self, label: str, pdf_text: str, schema_to_find: Dict[str, str]) -> str:
-        print("    - [Orchestrator] Building ADAPTIVE filtered context for LLM...")
-        lines = pdf_text.split('\n')
-        context_lines = set()
-        if label == 'carteira_oab':
-            for line in lines[:10]: context_lines.add(line)
-            for line in lines[-3:]: context_lines.add(line)
-        else:
-            clues = self._get_hardcoded_clues()
-            for key in schema_to_find.keys():
-                clues.add(key.replace("_", " "))
-            for i, line in enumerate(lines):
-                if not line.strip(): continue
-                line_lower = line.lower()
-                for clue in clues:
-                    if clue in line_lower:
-                        if i > 0: context_lines.add(lines[i-1])
-                        context_lines.add(line)
-                        if i + 1 < len(lines): context_lines.add(lines[i+1])
-                        if i + 2 < len(lines): context_lines.add(lines[i+2])
-                        break
-        if not context_lines: return pdf_text
-        final_lines = [line for line in lines if line in context_lines and line.strip()]
-        filtered_context = "\n".join(final_lines)
-        print(f"    - [Orchestrator] Context reduced from {len(pdf_text)} chars to {len(filtered_context)} chars.")
+        filtered_context = self.context_filter.build(label, pdf_text, schema_to_find)
+        log.debug("    - [Orchestrator] Context reduced from %d chars to %d chars.", len(pdf_text), len(filtered_context))
         return filtered_context
 
-    def process_document(self, label: str, pdf_path: str, original_schema: Dict[str, str]) -> Tuple[Dict[str, Any], float]:
+    def new_budget(self, label: str, pdf_path: str, budget_s: float | None = None) -> TimeBudget:
+        """Budget + trace for one document; hand it back to finish_document()."""
+        return TimeBudget(budget_s, DocumentTrace(label, pdf_path))
+
+    def finish_document(self, budget: TimeBudget, original_schema: Dict[str, str], result: Dict[str, Any],
+                        pages_read: int = 0) -> DocumentRun:
+        """Closes the document's trace, records it in the metrics registry and builds the report."""
+        trace = budget.trace or DocumentTrace()
+        for field in original_schema:
+            if field in budget.timed_out_fields:
+                trace.field_sources[field] = "timed_out"
+            else:
+                trace.field_sources.setdefault(field, "not_found")
+        time_taken = trace.finish()
+        self.metrics.record_trace(trace)
+        return DocumentRun(result, time_taken, budget.stage_times, budget.timed_out_fields, pages_read,
+                           dict(trace.field_sources), trace)
+
+    def plan_stage_1(self, label: str, schema: Dict[str, str]) -> Tuple[List[str], List[str]]:
+        """(fields Stage 1 will try, fields routed around it) among those the label has a rule for."""
+        rules = self.heuristic_extractor.rules_for(label)
+        with_rule = [f for f in schema if f in rules]
+        if self.router is None:
+            return with_rule, []
+        skipped = self.router.skipped_fields(label, with_rule, "stage_1")
+        return [f for f in with_rule if f not in skipped], skipped
+
+    def record_stage_1(self, label: str, tried: List[str], found: Dict[str, Any], budget: TimeBudget):
+        """Stage 1 outcome per tried field; misses are not counted when the budget cut the scan short."""
+        if self.router is None:
+            return
+        outcomes = {f: f in found for f in tried if f in found or not budget.expired()}
+        self.router.record(label, "stage_1", outcomes, budget.stage_times.get("stage_1", 0.0))
+
+    def start_speculation(self, label: str, pdf_text: str, schema: Dict[str, str], budget: TimeBudget) -> Speculation | None:
+        """Submits the LLM call for `schema` on `pdf_text` to the speculation pool (runs with the document's trace)."""
+        if not pdf_text or budget.expired(LLM_MIN_BUDGET_S):
+            return None
+        with budget.stage("context_filter"):
+            filtered_llm_context = self._build_filtered_llm_context(label, pdf_text, schema)
+        llm_kwargs = {"timeout_s": budget.remaining()} if budget.budget_s is not None else {}
+        trace = budget.trace or DocumentTrace(label)
+
+        def call():
+            with activate(trace), trace.span("stage_3_speculative", fields=len(schema)):
+                return self.llm_extractor.extract(filtered_llm_context, schema, **llm_kwargs)
+
+        with self._pool_lock:
+            if self._speculation_pool is None:
+                self._speculation_pool = ThreadPoolExecutor(max_workers=self.speculation_workers,
+                                                            thread_name_prefix="llm-speculation")
+        log.debug("[Orchestrator] Speculative LLM call for %d field(s).", len(schema))
+        return Speculation(schema, pdf_text, self._speculation_pool.submit(call))
+
+    def settle_speculation(self, speculation: Speculation, label: str, outcome: str):
+        """Records how a speculation ended; unless it was used, cancels it if it has not started yet."""
+        if speculation.outcome is not None:
+            return
+        speculation.outcome = outcome
+        if outcome not in ("used", "partial", "failed"):
+            speculation.future.cancel()
+        self.metrics.inc("llm_speculation_total", label=label, outcome=outcome)
+
+    def collect_speculation(self, speculation: Speculation, budget: TimeBudget) -> Dict[str, Any] | None:
         """
-        [AÇÃO 17] Executa a pipeline 0-1-2-3 CORRETA.
+        The speculative answer, waiting at most what is left of the budget (or the
+        LLM timeout without one); None when the call failed or is still running.
         """
-        start_time = time.perf_counter()
-        
-        print(f"\n[Orchestrator] Starting pipeline for Label: '{label}' ({pdf_path})")
-        
-        parser = PdfParser(pdf_path)
+        timeout = budget.remaining() if budget.budget_s is not None else getattr(self.llm_extractor, "timeout_s", None)
+        try:
+            return speculation.future.result(timeout=timeout)
+        except FutureTimeoutError:
+            log.info("[Orchestrator] Speculative LLM call still running after %.2fs; giving up on it.", timeout)
+            return None
 
-        print("...[LOG] Calling Stage 0: Hash Cache...")
-        pdf_hash = parser.get_file_hash()
-        cached_result = self.cache_extractor.check_hash_cache(pdf_hash)
-        
-        if cached_result:
-            end_time = time.perf_counter()
-            time_taken = end_time - start_time
-            print(f"[Orchestrator] 100% resolved by Stage 0 (Hash Cache). Finished. (Took {time_taken:.4f}s)")
-            return cached_result, time_taken
-
-        pdf_text = parser.extract_text() 
-        pdf_words = parser.extract_words() 
-        
-        if not pdf_text or not pdf_words:
-            end_time = time.perf_counter()
-            time_taken = end_time - start_time
-            print(f"[Orchestrator] Failed to extract text/words. Aborting. (Took {time_taken:.4f}s)")
-            return {field: None for field in original_schema}, time_taken
-
-        final_results = {}
-        remaining_schema = original_schema.copy()
-
-        print("...[LOG] Calling Stage 1: Heuristic Extractor (Word-Aware)...")
-        stage_1_results, stage_2_schema = self.heuristic_extractor.extract(
-            pdf_words,
-            remaining_schema
-        )
-        final_results.update(stage_1_results)
-        remaining_schema = stage_2_schema
-        
-        if remaining_schema:
-            stage_2_results, stage_3_schema = self.cache_extractor.extract_template(
+    def run_stage_3(self, label: str, pdf_text: str, schema: Dict[str, str], budget: TimeBudget) -> Dict[str, Any] | None:
+        """The LLM call for `schema` on the filtered context, within what is left of the budget; None without an answer."""
+        with budget.stage("context_filter"):
+            filtered_llm_context = self._build_filtered_llm_context(
                 label,
                 pdf_text,
-                remaining_schema
+                schema
+            )
+
+        llm_kwargs = {"timeout_s": budget.remaining()} if budget.budget_s is not None else {}
+        with budget.stage("stage_3"), activate(budget.trace):
+            return self.llm_extractor.extract(
+                filtered_llm_context,
+                schema,
+                **llm_kwargs
             )
+
+    def check_stage_0(self, parser: PdfParser, schema: Dict[str, str], budget: TimeBudget | None = None) -> Tuple[str, Dict[str, Any], Dict[str, str]]:
+        """
+        Stage 0 (schema-aware): resolves the file hash (quick fingerprint first,
+        no full read on a hit), then serves every field already known for this
+        (hash, field, description). Returns (pdf_hash, cached_results, schema_still_to_find).
+        Never lays out the PDF. Safe to call from many threads.
+        """
+        log.debug("...[LOG] Calling Stage 0: Hash Cache...")
+        fingerprint = parser.get_quick_fingerprint()
+        pdf_hash = self.cache_extractor.lookup_fingerprint(fingerprint)
+        fingerprint_known = pdf_hash is not None
+        if not pdf_hash:
+            with (budget or TimeBudget()).stage("hash"):
+                pdf_hash = parser.get_file_hash()
+
+        cached_results, remaining_schema = self.cache_extractor.check_field_cache(pdf_hash, schema)
+        if cached_results and not fingerprint_known:
+            self.cache_extractor.remember_fingerprint(fingerprint, pdf_hash)
+        if cached_results and remaining_schema:
+            log.info("[Orchestrator] %d field(s) served by Stage 0; %d new field(s) continue down the pipeline.",
+                     len(cached_results), len(remaining_schema))
+        if budget is not None and budget.trace is not None:
+            budget.trace.set_source(cached_results, "stage_0")
+        return pdf_hash, cached_results, remaining_schema
+
+    def run_stage_1(self, pdf_words: list, schema: Dict[str, str], budget: TimeBudget | None = None,
+                    label: str | None = None) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """Stage 1: word-aware heuristics (the label's rules). Pure function of the words, so it can run in worker processes."""
+        return self.heuristic_extractor.extract(pdf_words, schema, budget, label=label)
+
+    def resolve_remaining(self,
+                          label: str,
+                          pdf_hash: str,
+                          pdf_text: str,
+                          original_schema: Dict[str, str],
+                          partial_results: Dict[str, Any],
+                          remaining_schema: Dict[str, str],
+                          fingerprint: str | None = None,
+                          cached_results: Dict[str, Any] | None = None,
+                          budget: TimeBudget | None = None,
+                          pdf_words: list | None = None,
+                          speculation: Speculation | None = None) -> Dict[str, Any]:
+        """
+        Runs the content cache, Stage 2 (Template Cache) and Stage 3 (LLM) for
+        the fields Stage 1 left open, then stores the newly resolved fields in
+        the Stage 0 and content caches.
+        `cached_results` are the fields Stage 0 already served; `pdf_words` feed
+        the positional rules of Stage 2 (learned from every LLM answer).
+        With a budget, the LLM only gets the remaining time and is skipped when
+        too little is left; fields given up on (no time, or no answer from the LLM)
+        are recorded in budget.timed_out_fields and are NOT cached.
+        A `speculation` started on the same text answers the fields it covers;
+        only the others get a new LLM call. One that fails, or is still running
+        when the budget (or the LLM timeout) runs out, is given up on and its
+        fields go through a regular call if time allows.
+        """
+        budget = budget or TimeBudget()
+        if budget.trace is None:
+            budget.trace = DocumentTrace(label)
+        trace = budget.trace
+        cached_results = cached_results or {}
+        trace.set_source(cached_results, "stage_0")
+        trace.set_source(partial_results, "stage_1")
+        final_results = {**cached_results, **partial_results}
+        index = WordIndex(pdf_words) if pdf_words else None
+
+        signature = None
+        if remaining_schema and not budget.expired():
+            with budget.stage("content_cache"):
+                signature = self.cache_extractor.content_signature(label, pdf_text)
+                content_results, remaining_schema = self.cache_extractor.check_content_cache(signature, remaining_schema)
+            if content_results:
+                log.info("[Orchestrator] %d field(s) served by the content cache.", len(content_results))
+            final_results.update(content_results)
+            trace.set_source(content_results, "content")
+
+        if remaining_schema and budget.expired():
+            budget.mark_timed_out(remaining_schema)
+            remaining_schema = {}
+        elif remaining_schema:
+            stage_2_schema, stage_2_tried = remaining_schema, []
+            if self.router is not None and index is not None:
+                template_fields = self.cache_extractor.template_fields(label)
+                stage_2_tried = [f for f in remaining_schema if f in template_fields]
+                skipped = self.router.skipped_fields(label, stage_2_tried, "stage_2")
+                stage_2_tried = [f for f in stage_2_tried if f not in skipped]
+                stage_2_schema = {f: d for f, d in remaining_schema.items() if f not in skipped}
+            with budget.stage("stage_2"):
+                stage_2_results, _ = self.cache_extractor.extract_template(
+                    label,
+                    pdf_text,
+                    stage_2_schema,
+                    index
+                )
             final_results.update(stage_2_results)
-            remaining_schema = stage_3_schema
+            trace.set_source(stage_2_results, "stage_2")
+            if self.router is not None:
+                self.router.record(label, "stage_2", {f: f in stage_2_results for f in stage_2_tried},
+                                   budget.stage_times.get("stage_2", 0.0))
+            remaining_schema = {f: d for f, d in remaining_schema.items() if f not in stage_2_results}
         else:
-            print("[Orchestrator] 100% of fields resolved by Stage 1.")
+            log.debug("[Orchestrator] 100% of fields resolved by Stage 1.")
 
-        if remaining_schema:
-            print(f"[Orchestrator] {len(remaining_schema)} field(s) to resolve via LLM.")
-            
-            filtered_llm_context = self._build_filtered_llm_context(
-                label,
-                pdf_text,
-                remaining_schema
-            )
-            
-            stage_3_results = self.llm_extractor.extract(
-                filtered_llm_context, 
-                remaining_schema
-            )
-            
+        if remaining_schema and budget.expired(LLM_MIN_BUDGET_S):
+            log.info("[Orchestrator] Budget nearly exhausted. Returning partial result; %d field(s) timed out.",
+                     len(remaining_schema))
+            budget.mark_timed_out(remaining_schema)
+        elif remaining_schema:
+            log.debug("[Orchestrator] %d field(s) to resolve via LLM.", len(remaining_schema))
+
+            speculative_fields = []
+            if speculation is not None:
+                if speculation.pdf_text != pdf_text:
+                    self.settle_speculation(speculation, label, "stale")
+                else:
+                    speculative_fields = [f for f in remaining_schema if f in speculation.schema]
+            llm_schema = {f: d for f, d in remaining_schema.items() if f not in speculative_fields}
+
+            stage_3_results = {}
+            # Fields the LLM gave no answer for (error, open circuit breaker, out of time).
+            unanswered = []
+            if llm_schema:
+                answer = self.run_stage_3(label, pdf_text, llm_schema, budget)
+                if answer is None:
+                    unanswered.extend(llm_schema)
+                else:
+                    stage_3_results.update(answer)
+
+            if speculative_fields:
+                with budget.stage("stage_3"):
+                    speculative_results = self.collect_speculation(speculation, budget)
+                if speculative_results:
+                    stage_3_results.update({f: speculative_results.get(f) for f in speculative_fields})
+                    self.settle_speculation(speculation, label, "partial" if llm_schema else "used")
+                else:
+                    self.settle_speculation(speculation, label, "failed")
+                    answer = None
+                    if not budget.expired(LLM_MIN_BUDGET_S):
+                        answer = self.run_stage_3(
+                            label, pdf_text, {f: remaining_schema[f] for f in speculative_fields}, budget)
+                    if answer is None:
+                        unanswered.extend(speculative_fields)
+                    else:
+                        stage_3_results.update(answer)
+
+            if unanswered:
+                # Like a timeout: returned as null but not cached, so the next run asks again.
+                log.info("[Orchestrator] No LLM answer for %d field(s); they are not cached.", len(unanswered))
+                budget.mark_timed_out(unanswered)
+            if stage_3_results and self.router is not None:
+                self.router.record(label, "stage_3", {f: stage_3_results.get(f) is not None
+                                                      for f in remaining_schema if f not in unanswered},
+                                   budget.stage_times.get("stage_3", 0.0))
             if stage_3_results:
                 final_results.update(stage_3_results)
-                self.cache_extractor.learn_template(label, stage_3_results)
-        else:
-            print("[Orchestrator] 100% of fields resolved by Stage 1 or 2. Skipping LLM.")
+                trace.set_source((f for f, v in stage_3_results.items() if v is not None), "stage_3")
+                self.cache_extractor.learn_template(label, stage_3_results, index)
+            elif budget.expired():
+                budget.mark_timed_out(remaining_schema)
+        elif not budget.timed_out_fields:
+            log.debug("[Orchestrator] 100% of fields resolved by Stage 1 or 2. Skipping LLM.")
+        if speculation is not None:
+            self.settle_speculation(speculation, label, "wasted")
 
-        for field in original_schema:
-            if field not in final_results:
-                final_results[field] = None 
+        final_results = {field: final_results.get(field) for field in original_schema}
+        
+        with budget.stage("cache_write"):
+            new_fields = {f: d for f, d in original_schema.items()
+                          if f not in cached_results and f not in budget.timed_out_fields}
+            self.cache_extractor.save_field_cache(pdf_hash, new_fields, final_results)
+            self.cache_extractor.save_content_cache(
+                signature, {f: d for f, d in original_schema.items() if f not in budget.timed_out_fields}, final_results)
+            self.cache_extractor.remember_fingerprint(fingerprint, pdf_hash)
+        return final_results
+
+    def run_document(self, label: str, pdf_path: str, original_schema: Dict[str, str], budget_s: float | None = None) -> DocumentRun:
+        """
+        [AÇÃO 17] Executa a pipeline 0-1-2-3 CORRETA.
+        With `budget_s`, every stage checks the remaining time and the pipeline
+        returns the best partial result instead of overrunning.
+        The run is traced (spans, field sources, LLM tokens) into self.metrics.
+        """
+        budget = self.new_budget(label, pdf_path, budget_s)
         
-        self.cache_extractor.save_hash_cache(pdf_hash, final_results)
+        log.info("[Orchestrator] Starting pipeline for Label: '%s' (%s)", label, pdf_path)
         
-        end_time = time.perf_counter()
-        time_taken = end_time - start_time
-        print(f"[Orchestrator] Pipeline finished. (Took {time_taken:.4f}s)")
-        return final_results, time_taken
\ No newline at end of file
+        parser = PdfParser(pdf_path)
+
+        with budget.stage("stage_0"):
+            pdf_hash, cached_results, schema_to_resolve = self.check_stage_0(parser, original_schema, budget)
+        
+        if not schema_to_resolve:
+            log.info("[Orchestrator] 100%% resolved by Stage 0 (Hash Cache). Finished. (Took %.4fs)", budget.elapsed())
+            return self.finish_document(budget, original_schema, cached_results)
+
+        if budget.expired():
+            budget.mark_timed_out(schema_to_resolve)
+            result = {field: cached_results.get(field) for field in original_schema}
+            return self.finish_document(budget, original_schema, result)
+
+        speculation = None
+        if self.speculative:
+            likely_unresolved = self.hit_rates.likely_unresolved(label, schema_to_resolve)
+            if likely_unresolved:
+                with budget.stage("parse"):
+                    _, first_page_text, _ = parser.parse()
+                speculation = self.start_speculation(label, first_page_text, likely_unresolved, budget)
+
+        stage_1_tried, stage_1_skipped = self.plan_stage_1(label, schema_to_resolve)
+        scan = scan_pages(self.heuristic_extractor, parser, schema_to_resolve, budget, label, stage_1_skipped)
+        
+        if not scan.pdf_text or not scan.first_page_words:
+            if speculation is not None:
+                self.settle_speculation(speculation, label, "wasted")
+            log.warning("[Orchestrator] Failed to extract text/words from %s. Aborting. (Took %.4fs)", pdf_path, budget.elapsed())
+            result = {field: cached_results.get(field) for field in original_schema}
+            return self.finish_document(budget, original_schema, result, scan.pages_read)
+        self.record_stage_1(label, stage_1_tried, scan.stage_1_results, budget)
+
+        final_results = self.resolve_remaining(
+            label,
+            pdf_hash,
+            scan.pdf_text,
+            original_schema,
+            scan.stage_1_results,
+            scan.remaining_schema,
+            parser.get_quick_fingerprint(),
+            cached_results,
+            budget,
+            scan.first_page_words,
+            speculation
+        )
+        
+        log.info("[Orchestrator] Pipeline finished. (Took %.4fs)", budget.elapsed())
+        return self.finish_document(budget, original_schema, final_results, scan.pages_read)
+
+    def process_document(self, label: str, pdf_path: str, original_schema: Dict[str, str], budget_s: float | None = None) -> Tuple[Dict[str, Any], float]:
+        """Runs the pipeline and returns (result, time_taken). See run_document for the full report."""
+        run = self.run_document(label, pdf_path, original_schema, budget_s)
+        return run.result, run.time_taken
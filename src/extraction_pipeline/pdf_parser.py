@@ -1,65 +1,214 @@
-import fitz  # PyMuPDF
 import hashlib
-from typing import List, Tuple, Any
+import importlib
+import os
+from typing import Sequence, Tuple, Any, Iterator, List
+from .telemetry import get_logger
+
+HASH_CHUNK_SIZE = 1024 * 1024
+FINGERPRINT_SAMPLE_SIZE = 64 * 1024
+# Points added around each clip region, so words straddling its edge are not cut.
+CLIP_PADDING = 36
+
+log = get_logger("pdf_parser")
+
+
+def _fitz():
+    """PyMuPDF, imported on the first real parse: Stage 0 hits never pay for it."""
+    return importlib.import_module("fitz")
+
+
+def _word_table(words: list, page: Any = None) -> Any:
+    """Columnar WordTable of a page's words (NumPy, imported with the first layout), tagged with the page size."""
+    from .extractors.word_table import WordTable
+    return WordTable.from_words(words, (page.rect.width, page.rect.height) if page is not None else None)
 
 class PdfParser:
     """
     [AÇÃO 17] Parser (get_text("words"))
+
+    Single-pass: the file is read once, hashed while it is read, opened once
+    from that buffer, and page 0 is laid out once for both text and words.
+    Later pages are only laid out on demand, one at a time (iter_pages()).
+    Words come back as a columnar WordTable (a sequence of the usual tuples).
+    extract_region_words() lays out only some regions of page 0 (clip rects),
+    for heuristics that never look at the rest of the page.
     """
 
     def __init__(self, pdf_path: str):
         self.pdf_path = pdf_path
         self._text_cache = None
         self._hash_cache = None
-        self._words_cache = None 
+        self._words_cache = None
+        self._fingerprint_cache = None
+        self._pdf_bytes = None
+        self._parsed = False
+        self.page_count = 0
+
+    def get_quick_fingerprint(self) -> str:
+        """
+        Cheap pre-check key: size + mtime + hash of the first/last 64KB.
+        Never reads the whole file, so Stage 0 hits skip the PDF content.
+        """
+        if self._fingerprint_cache:
+            return self._fingerprint_cache
+
+        try:
+            stat = os.stat(self.pdf_path)
+            digest = hashlib.sha256()
+            with open(self.pdf_path, 'rb') as f:
+                digest.update(f.read(FINGERPRINT_SAMPLE_SIZE))
+                if stat.st_size > FINGERPRINT_SAMPLE_SIZE:
+                    f.seek(max(FINGERPRINT_SAMPLE_SIZE, stat.st_size - FINGERPRINT_SAMPLE_SIZE))
+                    digest.update(f.read(FINGERPRINT_SAMPLE_SIZE))
+            self._fingerprint_cache = f"{stat.st_size}:{stat.st_mtime_ns}:{digest.hexdigest()[:32]}"
+            return self._fingerprint_cache
+        except Exception as e:
+            log.warning("Error generating fingerprint for %s: %s", self.pdf_path, e)
+            return ""
 
     def get_file_hash(self) -> str:
-        """Calculates the SHA256 hash of the PDF file content."""
+        """Calculates the SHA256 hash of the PDF file content (streamed in chunks)."""
         if self._hash_cache:
             return self._hash_cache
-        
+
         try:
+            digest = hashlib.sha256()
             with open(self.pdf_path, 'rb') as f:
-                file_bytes = f.read()
-                self._hash_cache = hashlib.sha256(file_bytes).hexdigest()
-                return self._hash_cache
+                while chunk := f.read(HASH_CHUNK_SIZE):
+                    digest.update(chunk)
+            self._hash_cache = digest.hexdigest()
+            return self._hash_cache
         except Exception as e:
-            print(f"Error generating hash for {self.pdf_path}: {e}")
+            log.warning("Error generating hash for %s: %s", self.pdf_path, e)
             return ""
 
-    def extract_text(self) -> str:
-        """Extracts plain text from the first page of the PDF."""
-        if self._text_cache:
-            return self._text_cache
+    @property
+    def parsed(self) -> bool:
+        """True once page 0 has been fully laid out (parse())."""
+        return self._parsed
+
+    def _read(self) -> bytes | None:
+        """
+        Reads the file once, hashing it on the way unless the hash is known.
+        The bytes are kept until parse() has laid them out.
+        """
+        if self._pdf_bytes is not None:
+            return self._pdf_bytes
+        try:
+            digest = hashlib.sha256() if not self._hash_cache else None
+            chunks = []
+            with open(self.pdf_path, 'rb') as f:
+                while chunk := f.read(HASH_CHUNK_SIZE):
+                    if digest:
+                        digest.update(chunk)
+                    chunks.append(chunk)
+            if digest:
+                self._hash_cache = digest.hexdigest()
+            self._pdf_bytes = b"".join(chunks)
+            return self._pdf_bytes
+        except Exception as e:
+            log.warning("Error reading PDF %s: %s", self.pdf_path, e)
+            return None
+
+    def parse(self) -> Tuple[str, str, Sequence[Tuple[float, float, float, float, str, int, int, int]]]:
+        """
+        Single-open parse: returns (hash, text, words) from one read of the
+        file and one layout pass of page 0. Results are cached on the parser.
+        The hash is computed on the same read unless get_file_hash() ran first.
+        """
+        if self._parsed:
+            return self._hash_cache or "", self._text_cache or "", self._words_cache or []
+
+        self._parsed = True
+        pdf_bytes = self._read()
+        self._pdf_bytes = None
+        if pdf_bytes is None:
+            return "", "", []
 
         try:
-            with fitz.open(self.pdf_path) as doc:
+            with _fitz().open(stream=pdf_bytes, filetype="pdf") as doc:
+                self.page_count = len(doc)
                 if len(doc) == 0:
-                    print(f"Error: PDF {self.pdf_path} is empty.")
-                    return ""
-                
-                page = doc[0] 
-                self._text_cache = page.get_text("text", sort=True) 
-                return self._text_cache
+                    log.warning("Error: PDF %s is empty.", self.pdf_path)
+                    return self._hash_cache, "", []
+
+                page = doc[0]
+                textpage = page.get_textpage()
+                self._text_cache = page.get_text("text", sort=True, textpage=textpage)
+                self._words_cache = _word_table(page.get_text("words", sort=True, textpage=textpage), page)
         except Exception as e:
-            print(f"Error reading PDF {self.pdf_path}: {e}")
-            return ""
+            log.warning("Error reading PDF %s: %s", self.pdf_path, e)
+
+        return self._hash_cache, self._text_cache or "", self._words_cache or []
 
-    def extract_words(self) -> List[Tuple[float, float, float, float, str, int, int, int]]:
+    def iter_pages(self) -> Iterator[Tuple[int, str, Sequence[Tuple[float, float, float, float, str, int, int, int]]]]:
         """
-        [AÇÃO 17] Extrai todas as PALAVRAS com suas coordenadas.
+        Lazy multi-page layout: yields (page_no, text, words) one page at a time.
+        Page 0 comes from parse(); each later page is laid out only when the
+        caller asks for it and nothing of the previous page is kept, so a caller
+        that stops early never pays for the rest of the document.
         """
-        if self._words_cache:
-            return self._words_cache
+        _, text, words = self.parse()
+        yield 0, text, words
+        if self.page_count <= 1:
+            return
 
         try:
-            with fitz.open(self.pdf_path) as doc:
+            with _fitz().open(self.pdf_path) as doc:
+                for page_no in range(1, len(doc)):
+                    page = doc[page_no]
+                    textpage = page.get_textpage()
+                    yield (page_no,
+                           page.get_text("text", sort=True, textpage=textpage),
+                           _word_table(page.get_text("words", sort=True, textpage=textpage), page))
+        except Exception as e:
+            log.warning("Error reading PDF %s: %s", self.pdf_path, e)
+
+    def extract_region_words(self, regions: List[Tuple[float, float, float, float]],
+                             padding: float = CLIP_PADDING) -> Sequence[Tuple[float, float, float, float, str, int, int, int]]:
+        """
+        Words of page 0 inside `regions` ((x0, y0, x1, y1) as fractions of the
+        real page size, each widened by `padding` points), in page order and in
+        page coordinates. Only the clipped areas are laid out; the file read is
+        shared with a later parse(). Empty on errors.
+        """
+        pdf_bytes = self._read()
+        if pdf_bytes is None:
+            return []
+        try:
+            fitz = _fitz()
+            with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+                self.page_count = len(doc)
                 if len(doc) == 0:
                     return []
-                
                 page = doc[0]
-                self._words_cache = page.get_text("words", sort=True) 
-                return self._words_cache
+                rect = page.rect
+                words, seen = [], set()
+                for x0, y0, x1, y1 in regions:
+                    clip = fitz.Rect(rect.x0 + x0 * rect.width - padding, rect.y0 + y0 * rect.height - padding,
+                                     rect.x0 + x1 * rect.width + padding, rect.y0 + y1 * rect.height + padding)
+                    for word in page.get_text("words", sort=True, clip=clip):
+                        if word[:5] not in seen:
+                            seen.add(word[:5])
+                            words.append(word)
+                words.sort(key=lambda w: (w[3], w[0]))
+                return _word_table(words, page)
         except Exception as e:
-            print(f"Error extracting text words from {self.pdf_path}: {e}")
-            return []
\ No newline at end of file
+            log.warning("Error reading PDF %s: %s", self.pdf_path, e)
+            return []
+
+    def extract_text(self) -> str:
+        """Extracts plain text from the first page of the PDF."""
+        if self._text_cache:
+            return self._text_cache
+
+        return self.parse()[1]
+
+    def extract_words(self) -> Sequence[Tuple[float, float, float, float, str, int, int, int]]:
+        """
+        [AÇÃO 17] Extrai todas as PALAVRAS com suas coordenadas.
+        """
+        if self._words_cache:
+            return self._words_cache
+
+        return self.parse()[2]
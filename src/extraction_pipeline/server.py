@@ -0,0 +1,187 @@
+import json
+import math
+import os
+import socketserver
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Tuple
+
+from .orchestrator import Orchestrator
+from .stats import percentile
+from .telemetry import get_logger
+
+log = get_logger("server")
+
+MAX_BODY_BYTES = 1024 * 1024
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class ExtractionServer:
+    """
+    Long-running front end for ONE warm Orchestrator: heuristics compiled,
+    cache store open and LLM client connected once, reused by every request.
+
+        POST /extract  {"label", "pdf_path", "extraction_schema", "budget_s"?}
+        GET  /health   liveness + uptime
+        GET  /stats    request counters/latencies and the metrics snapshot (JSON)
+        GET  /metrics  the metrics registry in Prometheus text format
+
+    Requests run concurrently, one thread each (the pipeline is thread-safe, as
+    in BatchRunner; LLM calls are capped by the extractor's own semaphore).
+    Listens on (host, port), or on a Unix socket when `unix_socket` is set.
+    """
+
+    def __init__(self,
+                 orchestrator: Orchestrator,
+                 host: str = "127.0.0.1",
+                 port: int = 8080,
+                 unix_socket: str | None = None,
+                 default_budget_s: float | None = None):
+        self.orchestrator = orchestrator
+        self.default_budget_s = default_budget_s
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=1000)
+        self.counters = {"requests": 0, "errors": 0, "in_flight": 0}
+        self._thread: threading.Thread | None = None
+
+        handler = self._handler_class()
+        if unix_socket:
+            if os.path.exists(unix_socket):
+                os.unlink(unix_socket)
+            self._httpd = _UnixHTTPServer(unix_socket, handler)
+            self.address = unix_socket
+        else:
+            self._httpd = ThreadingHTTPServer((host, port), handler)
+            self._httpd.daemon_threads = True
+            self.address = f"http://{host}:{self._httpd.server_address[1]}"
+        self.unix_socket = unix_socket
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, fmt, *args):
+                log.debug("[Server] " + fmt, *args)
+
+            def do_GET(self):
+                if self.path == "/health":
+                    self._send(200, {"status": "ok", "uptime_s": round(time.time() - server.started_at, 3)})
+                elif self.path == "/stats":
+                    self._send(200, server.stats())
+                elif self.path == "/metrics":
+                    self._send(200, server.orchestrator.metrics.to_prometheus(), "text/plain; version=0.0.4")
+                else:
+                    self._send(404, {"error": f"unknown path '{self.path}'"})
+
+            def do_POST(self):
+                if self.path != "/extract":
+                    self._send(404, {"error": f"unknown path '{self.path}'"})
+                    return
+                length = int(self.headers.get("Content-Length") or 0)
+                if length > MAX_BODY_BYTES:
+                    self._send(413, {"error": "request body too large"})
+                    return
+                try:
+                    payload = json.loads(self.rfile.read(length) or b"{}")
+                except json.JSONDecodeError:
+                    self._send(400, {"error": "body is not valid JSON"})
+                    return
+                self._send(*server.handle_extract(payload))
+
+            def _send(self, status: int, body: Any, content_type: str = "application/json"):
+                data = body.encode() if isinstance(body, str) else json.dumps(body, ensure_ascii=False).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", content_type)
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def address_string(self):
+                # Unix-socket peers have no (host, port).
+                return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+        return Handler
+
+    def handle_extract(self, payload: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        """Validates one /extract request and runs it through the warm orchestrator."""
+        label = payload.get("label") if isinstance(payload, dict) else None
+        pdf_path = payload.get("pdf_path") if isinstance(payload, dict) else None
+        schema = payload.get("extraction_schema") if isinstance(payload, dict) else None
+        if not label or not pdf_path or not isinstance(schema, dict) or not schema:
+            return 400, {"error": "'label', 'pdf_path' and 'extraction_schema' are required"}
+        budget_s = payload.get("budget_s", self.default_budget_s)
+        if budget_s is not None and (isinstance(budget_s, bool) or not isinstance(budget_s, (int, float))
+                                     or not 0 < budget_s < math.inf):
+            return 400, {"error": "'budget_s' must be a positive number of seconds"}
+        if not os.path.exists(pdf_path):
+            return 404, {"error": f"PDF not found at '{pdf_path}'"}
+
+        with self._lock:
+            self.counters["requests"] += 1
+            self.counters["in_flight"] += 1
+        try:
+            run = self.orchestrator.run_document(label, pdf_path, schema, budget_s)
+        except Exception as e:
+            log.error("[Server] Extraction failed for %s: %s", pdf_path, e)
+            with self._lock:
+                self.counters["errors"] += 1
+            return 500, {"error": str(e)}
+        finally:
+            with self._lock:
+                self.counters["in_flight"] -= 1
+
+        with self._lock:
+            self._latencies.append(run.time_taken)
+        return 200, {
+            "result": run.result,
+            "time_taken": round(run.time_taken, 6),
+            "field_sources": run.field_sources,
+            "timed_out_fields": run.timed_out_fields,
+            "stage_times": {stage: round(seconds, 6) for stage, seconds in run.stage_times.items()},
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = list(self._latencies)
+            counters = dict(self.counters)
+        llm_stats = getattr(getattr(self.orchestrator, "llm_extractor", None), "hedge_stats", None)
+        return {
+            "uptime_s": round(time.time() - self.started_at, 3),
+            **counters,
+            "latency_s": {"p50": round(percentile(latencies, 50), 6), "p95": round(percentile(latencies, 95), 6)},
+            "llm": dict(llm_stats) if llm_stats else None,
+            "metrics": self.orchestrator.metrics.snapshot(),
+        }
+
+    def serve_forever(self):
+        log.info("[Server] Listening on %s", self.address)
+        self._httpd.serve_forever()
+
+    def start(self) -> "ExtractionServer":
+        """Serves on a background thread (tests, embedding)."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def shutdown(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self.unix_socket and os.path.exists(self.unix_socket):
+            os.unlink(self.unix_socket)
+
+    def __enter__(self) -> "ExtractionServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.shutdown()
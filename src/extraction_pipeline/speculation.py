@@ -0,0 +1,55 @@
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Dict, Any
+
+from .stage_router import StageRouter, ROUTABLE_STAGES
+
+# Observations of a (label, field) needed before its miss rate is trusted.
+MIN_OBSERVATIONS = 5
+# Speculate on a field when the cheap stages missed it at least this often.
+MISS_RATE_THRESHOLD = 0.6
+
+
+class FieldHitRates:
+    """
+    Per (label, field): how often Stage 1 and Stage 2 resolved a field versus
+    how often it was left for the LLM, read from the StageRouter's persisted
+    per-stage counters (successes of the routable stages, attempts of Stage 3).
+    Stage 0 and content-cache hits reach neither and are not counted.
+    """
+
+    def __init__(self, router: StageRouter, min_observations: int = MIN_OBSERVATIONS,
+                 miss_threshold: float = MISS_RATE_THRESHOLD):
+        self.router = router
+        self.min_observations = min_observations
+        self.miss_threshold = miss_threshold
+
+    def miss_rate(self, label: str, field: str) -> float | None:
+        """Share of the observations the cheap stages missed; None until MIN_OBSERVATIONS."""
+        resolved = sum(stats.successes for stats in
+                       (self.router.stats(label, field, stage) for stage in ROUTABLE_STAGES) if stats)
+        llm = self.router.stats(label, field, "stage_3")
+        missed = llm.attempts if llm else 0
+        seen = resolved + missed
+        if seen < self.min_observations:
+            return None
+        return missed / seen
+
+    def likely_unresolved(self, label: str, schema: Dict[str, str]) -> Dict[str, str]:
+        """The fields of `schema` the cheap stages will probably leave for the LLM."""
+        likely = {}
+        for field, description in schema.items():
+            rate = self.miss_rate(label, field)
+            if rate is not None and rate >= self.miss_threshold:
+                likely[field] = description
+        return likely
+
+
+@dataclass
+class Speculation:
+    """An LLM call started before Stage 1/2 finished, on the text of the first page."""
+    schema: Dict[str, str]
+    pdf_text: str
+    future: "Future[Dict[str, Any] | None]"
+    # used / partial / failed / stale (the text changed after page 1) / wasted (nothing needed it).
+    outcome: str | None = None
@@ -0,0 +1,143 @@
+import threading
+from dataclasses import dataclass, asdict, fields
+from typing import Dict, Any, Iterable, List, Tuple
+
+from .cache_store import CacheStore, StageKey
+from .telemetry import get_logger
+
+# Stages whose per-field work can be skipped. Stage 3 (the LLM) is the last resort and always runs.
+ROUTABLE_STAGES = ("stage_1", "stage_2")
+
+# Attempts of a (label, field, stage) before it may be routed around.
+MIN_ATTEMPTS = 20
+# Recent success rate under which a stage counts as hopeless for the field.
+MIN_SUCCESS_RATE = 0.05
+# A hopeless stage still runs once every this many documents, to notice layout changes.
+EXPLORE_EVERY = 50
+# Weight of the past in the recent success rate (~1 / (1 - DECAY) = 50 attempts of memory).
+DECAY = 0.98
+
+log = get_logger("stage_router")
+
+
+@dataclass
+class StageStats:
+    """Outcome counters of one stage for one (label, field)."""
+    attempts: int = 0
+    successes: int = 0
+    total_seconds: float = 0.0
+    recent_attempts: float = 0.0
+    recent_successes: float = 0.0
+    skipped: int = 0
+
+    @property
+    def success_rate(self) -> float:
+        return self.successes / self.attempts if self.attempts else 0.0
+
+    @property
+    def recent_success_rate(self) -> float:
+        return self.recent_successes / self.recent_attempts if self.recent_attempts else 0.0
+
+    @property
+    def mean_latency_ms(self) -> float:
+        return 1000 * self.total_seconds / self.attempts if self.attempts else 0.0
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "StageStats":
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in known})
+
+
+class StageRouter:
+    """
+    Per-(label, field, stage) success rates and latencies, persisted in the
+    CacheStore (stage_stats). Stage 1 and Stage 2 are skipped for a field once
+    they have been tried MIN_ATTEMPTS times and their recent success rate fell
+    under MIN_SUCCESS_RATE; the field then goes straight to the next stage.
+    Every EXPLORE_EVERY skips the stage runs anyway, and a success there
+    restarts its recent rate, so a layout change brings it back.
+    With `adaptive=False` outcomes are still recorded but nothing is skipped.
+    Thread-safe.
+    """
+
+    def __init__(self, store: CacheStore | None = None, adaptive: bool = True,
+                 min_attempts: int = MIN_ATTEMPTS, min_success_rate: float = MIN_SUCCESS_RATE,
+                 explore_every: int = EXPLORE_EVERY):
+        self.store = store
+        self.adaptive = adaptive
+        self.min_attempts = min_attempts
+        self.min_success_rate = min_success_rate
+        self.explore_every = explore_every
+        self._lock = threading.Lock()
+        self._stats: Dict[StageKey, StageStats] = {}
+        if store is not None:
+            for key, data in store.get_stage_stats().items():
+                self._stats[key] = StageStats.from_dict(data)
+
+    def _hopeless(self, stats: StageStats | None) -> bool:
+        return (stats is not None and stats.attempts >= self.min_attempts
+                and stats.recent_success_rate < self.min_success_rate)
+
+    def should_run(self, label: str, field: str, stage: str) -> bool:
+        """False when `stage` is hopeless for the field (counts the skip), except on exploration turns."""
+        if not self.adaptive or stage not in ROUTABLE_STAGES:
+            return True
+        key = (label, field, stage)
+        with self._lock:
+            stats = self._stats.get(key)
+            if not self._hopeless(stats):
+                return True
+            stats.skipped += 1
+            if stats.skipped % self.explore_every == 0:
+                log.debug("[StageRouter] Exploring %s for %s/%s.", stage, label, field)
+                return True
+            self._persist(key, stats)
+            return False
+
+    def skipped_fields(self, label: str, fields_to_try: Iterable[str], stage: str) -> List[str]:
+        """The fields of `fields_to_try` that should not go through `stage` this time."""
+        return [field for field in fields_to_try if not self.should_run(label, field, stage)]
+
+    def record(self, label: str, stage: str, outcomes: Dict[str, bool], seconds: float = 0.0):
+        """One attempt of `stage` on each field of `outcomes` ({field: resolved}); `seconds` is split evenly."""
+        if not outcomes:
+            return
+        share = seconds / len(outcomes)
+        with self._lock:
+            for field, success in outcomes.items():
+                key = (label, field, stage)
+                stats = self._stats.setdefault(key, StageStats())
+                if success and self._hopeless(stats):
+                    stats.recent_attempts = stats.recent_successes = 0.0
+                stats.attempts += 1
+                stats.successes += bool(success)
+                stats.total_seconds += share
+                stats.recent_attempts = stats.recent_attempts * DECAY + 1
+                stats.recent_successes = stats.recent_successes * DECAY + bool(success)
+                self._persist(key, stats)
+
+    def stats(self, label: str, field: str, stage: str) -> StageStats | None:
+        """A copy of the counters of `stage` for (label, field), if it ever ran."""
+        with self._lock:
+            stats = self._stats.get((label, field, stage))
+            return StageStats(**asdict(stats)) if stats else None
+
+    def _persist(self, key: StageKey, stats: StageStats):
+        if self.store is not None:
+            self.store.put_stage_stats(key, asdict(stats))
+
+    def rows(self, label: str | None = None) -> List[Tuple[StageKey, StageStats, bool]]:
+        """(key, stats, routed) for every known (label, field, stage), sorted; `routed` is False when it is being skipped."""
+        with self._lock:
+            return [(key, StageStats(**asdict(stats)), not (self.adaptive and key[2] in ROUTABLE_STAGES and self._hopeless(stats)))
+                    for key, stats in sorted(self._stats.items()) if label is None or key[0] == label]
+
+    def format_table(self, label: str | None = None) -> str:
+        """Plain-text report of rows() for the CLI."""
+        lines = [f"{'label':<16} {'field':<24} {'stage':<8} {'attempts':>8} {'success':>8} {'recent':>8} "
+                 f"{'avg ms':>8} {'skipped':>8}  route"]
+        for (row_label, field, stage), stats, routed in self.rows(label):
+            lines.append(f"{row_label:<16} {field:<24} {stage:<8} {stats.attempts:>8} {stats.success_rate:>8.1%} "
+                         f"{stats.recent_success_rate:>8.1%} {stats.mean_latency_ms:>8.2f} {stats.skipped:>8}  "
+                         f"{'run' if routed else 'skip'}")
+        return "\n".join(lines)
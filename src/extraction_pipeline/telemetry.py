@@ -0,0 +1,252 @@
+import bisect
+import contextvars
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Any, List, Tuple, Iterator, Iterable
+
+LOGGER_NAME = "extraction_pipeline"
+# Library code never prints: without configure_logging() nothing is emitted.
+logging.getLogger(LOGGER_NAME).addHandler(logging.NullHandler())
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Child logger of the pipeline ("extraction_pipeline.<name>")."""
+    return logging.getLogger(f"{LOGGER_NAME}.{name}")
+
+
+def configure_logging(level: str | None):
+    """Sends pipeline logs to stderr at `level` (e.g. "INFO", "DEBUG"); None keeps them silent."""
+    if not level:
+        return
+    logger = logging.getLogger(LOGGER_NAME)
+    if not any(isinstance(h, logging.StreamHandler) and not isinstance(h, logging.NullHandler) for h in logger.handlers):
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+    logger.setLevel(level.upper())
+
+
+class DocumentTrace:
+    """
+    Everything recorded for one document: spans (name, start offset, duration),
+    the source that resolved each field and the LLM token usage.
+    """
+
+    def __init__(self, label: str = "", pdf_path: str = ""):
+        self.label = label
+        self.pdf_path = pdf_path
+        self.start = time.perf_counter()
+        self.started_at = time.time()
+        self.spans: List[Dict[str, Any]] = []
+        self.field_sources: Dict[str, str] = {}
+        self.llm_tokens = {"prompt": 0, "completion": 0}
+        self.llm_requests = 0
+        self.duration_s: float | None = None
+        self._lock = threading.Lock()
+
+    def add_span(self, name: str, start: float, duration: float, **attrs):
+        """`start` is a perf_counter() value."""
+        span = {"name": name, "start_s": round(start - self.start, 6), "duration_s": round(duration, 6), **attrs}
+        with self._lock:
+            self.spans.append(span)
+
+    @contextmanager
+    def span(self, name: str, **attrs) -> Iterator[None]:
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_span(name, start_time, time.perf_counter() - start_time, **attrs)
+
+    def set_source(self, fields: Iterable[str], source: str):
+        for field in fields:
+            self.field_sources[field] = source
+
+    def add_llm_usage(self, prompt_tokens: int, completion_tokens: int):
+        with self._lock:
+            self.llm_requests += 1
+            self.llm_tokens["prompt"] += prompt_tokens or 0
+            self.llm_tokens["completion"] += completion_tokens or 0
+
+    def finish(self) -> float:
+        self.duration_s = time.perf_counter() - self.start
+        return self.duration_s
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "type": "trace",
+            "label": self.label,
+            "pdf_path": self.pdf_path,
+            "started_at": round(self.started_at, 3),
+            "duration_s": round(self.duration_s if self.duration_s is not None else time.perf_counter() - self.start, 6),
+            "spans": list(self.spans),
+            "field_sources": dict(self.field_sources),
+            "llm_requests": self.llm_requests,
+            "llm_tokens": dict(self.llm_tokens),
+        }
+
+
+_current_trace: contextvars.ContextVar[DocumentTrace | None] = contextvars.ContextVar("current_trace", default=None)
+
+
+def current_trace() -> DocumentTrace | None:
+    """Trace of the document being processed on this thread, if any."""
+    return _current_trace.get()
+
+
+@contextmanager
+def activate(trace: DocumentTrace) -> Iterator[DocumentTrace]:
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+class MetricsRegistry:
+    """
+    In-process metrics: counters, histograms (Prometheus-style cumulative
+    buckets) and the most recent document traces. Thread-safe; cheap enough
+    to leave on. Dump with to_prometheus() or to_json_lines().
+    """
+
+    def __init__(self, max_traces: int = 1000, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.max_traces = max_traces
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, LabelSet], float] = {}
+        self._histograms: Dict[Tuple[str, LabelSet], List[Any]] = {}
+        self._traces: deque = deque(maxlen=max_traces)
+
+    @staticmethod
+    def _key(name: str, labels: Dict[str, Any]) -> Tuple[str, LabelSet]:
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * len(self.buckets), 0.0, 0]
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                histogram[0][index] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def counter(self, name: str, **labels) -> float:
+        with self._lock:
+            return self._counters.get(self._key(name, labels), 0.0)
+
+    def histogram_count(self, name: str, **labels) -> int:
+        with self._lock:
+            histogram = self._histograms.get(self._key(name, labels))
+            return histogram[2] if histogram else 0
+
+    def record_trace(self, trace: DocumentTrace):
+        """Stores the trace and folds it into the aggregate metrics."""
+        duration = trace.duration_s if trace.duration_s is not None else trace.finish()
+        self.observe("document_duration_seconds", duration, label=trace.label)
+        for span in trace.spans:
+            self.observe("stage_duration_seconds", span["duration_s"], stage=span["name"])
+        for source in trace.field_sources.values():
+            self.inc("fields_resolved_total", label=trace.label, source=source)
+        self.inc("documents_total", label=trace.label)
+        with self._lock:
+            self._traces.append(trace.as_dict())
+
+    def traces(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._traces)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self._traces.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = [{"name": n, "labels": dict(l), "value": v} for (n, l), v in sorted(self._counters.items())]
+            histograms = [
+                {"name": n, "labels": dict(l), "count": h[2], "sum": round(h[1], 6),
+                 "buckets": dict(zip([str(b) for b in self.buckets], _cumulative(h[0])))}
+                for (n, l), h in sorted(self._histograms.items())
+            ]
+        return {"type": "metrics", "timestamp": round(time.time(), 3), "counters": counters, "histograms": histograms}
+
+    def to_json_lines(self, include_traces: bool = True) -> str:
+        """One JSON object per line: every kept trace, then the metrics snapshot."""
+        lines = [json.dumps(t, ensure_ascii=False) for t in self.traces()] if include_traces else []
+        lines.append(json.dumps(self.snapshot(), ensure_ascii=False))
+        return "\n".join(lines) + "\n"
+
+    def to_prometheus(self, prefix: str = "extraction_") -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        out: List[str] = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((k, (list(h[0]), h[1], h[2])) for k, h in self._histograms.items())
+
+        typed = set()
+        for (name, labels), value in counters:
+            metric = prefix + name
+            if metric not in typed:
+                out.append(f"# TYPE {metric} counter")
+                typed.add(metric)
+            out.append(f"{metric}{_format_labels(labels)} {_format_value(value)}")
+
+        for (name, labels), (counts, total, count) in histograms:
+            metric = prefix + name
+            if metric not in typed:
+                out.append(f"# TYPE {metric} histogram")
+                typed.add(metric)
+            for bound, cumulative in zip(self.buckets, _cumulative(counts)):
+                out.append(f"{metric}_bucket{_format_labels(labels + (('le', _format_value(bound)),))} {cumulative}")
+            out.append(f"{metric}_bucket{_format_labels(labels + (('le', '+Inf'),))} {count}")
+            out.append(f"{metric}_sum{_format_labels(labels)} {_format_value(total)}")
+            out.append(f"{metric}_count{_format_labels(labels)} {count}")
+        return "\n".join(out) + "\n"
+
+    def dump(self, path: str, fmt: str = "jsonl"):
+        """Writes the registry to `path` ("jsonl" or "prometheus")."""
+        content = self.to_prometheus() if fmt == "prometheus" else self.to_json_lines()
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+
+
+def _cumulative(counts: List[int]) -> List[int]:
+    total, out = 0, []
+    for c in counts:
+        total += c
+        out.append(total)
+    return out
+
+
+def _format_labels(labels: LabelSet) -> str:
+    if not labels:
+        return ""
+    escaped = (f'{k}="' + v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+               for k, v in labels)
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+# Process-wide default registry.
+REGISTRY = MetricsRegistry()
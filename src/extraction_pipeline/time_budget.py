@@ -0,0 +1,51 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Iterator
+from .telemetry import DocumentTrace
+
+class TimeBudget:
+    """
+    Per-document clock shared by every stage.
+
+    - `remaining()` / `expired()` let stages decide whether to start work.
+    - `stage(name)` records how long each stage took (`stage_times`).
+    - `timed_out_fields` collects the fields given up on because time ran out
+      (or the LLM gave no answer): they are returned as null but not cached.
+    A budget of None never expires but still records stage times.
+    With a `trace`, every stage is also recorded there as a span.
+    """
+
+    def __init__(self, budget_s: float | None = None, trace: DocumentTrace | None = None):
+        self.budget_s = budget_s
+        self.trace = trace
+        self.start = time.perf_counter()
+        self.stage_times: Dict[str, float] = {}
+        self.timed_out_fields: List[str] = []
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def remaining(self) -> float | None:
+        if self.budget_s is None:
+            return None
+        return max(0.0, self.budget_s - self.elapsed())
+
+    def expired(self, margin_s: float = 0.0) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= margin_s
+
+    def mark_timed_out(self, fields):
+        for field in fields:
+            if field not in self.timed_out_fields:
+                self.timed_out_fields.append(field)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start_time
+            self.stage_times[name] = self.stage_times.get(name, 0.0) + duration
+            if self.trace is not None:
+                self.trace.add_span(name, start_time, duration)
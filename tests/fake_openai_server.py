@@ -0,0 +1,82 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List, Set, Tuple
+
+
+class FakeOpenAIServer:
+    """
+    Minimal OpenAI-compatible /v1/chat/completions server for tests.
+
+    `latency(n)` returns the delay in seconds for the n-th request (0-based),
+    `status(n)` its HTTP status, and `content(prompt)` the JSON payload the
+    "model" answers with. Speaks HTTP/1.1 keep-alive; `connections` holds the
+    client address of every TCP connection a request arrived on.
+    """
+
+    def __init__(self,
+                 latency: Callable[[int], float] = lambda n: 0.0,
+                 content: Callable[[str], dict] = lambda prompt: {"ok": True},
+                 status: Callable[[int], int] = lambda n: 200):
+        self.latency = latency
+        self.content = content
+        self.status = status
+        self.requests: List[str] = []
+        self.connections: Set[Tuple[str, int]] = set()
+        self._lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                prompt = body["messages"][0]["content"]
+                with server._lock:
+                    n = len(server.requests)
+                    server.requests.append(prompt)
+                    server.connections.add(self.client_address)
+
+                time.sleep(server.latency(n))
+                status = server.status(n)
+                if status != 200:
+                    payload = json.dumps({"error": {"message": "injected failure", "type": "server_error"}}).encode()
+                else:
+                    payload = json.dumps({
+                        "id": f"chatcmpl-{n}",
+                        "object": "chat.completion",
+                        "created": 0,
+                        "model": body["model"],
+                        "choices": [{
+                            "index": 0,
+                            "finish_reason": "stop",
+                            "message": {"role": "assistant", "content": json.dumps(server.content(prompt))},
+                        }],
+                        "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": 5, "total_tokens": len(prompt) // 4 + 5},
+                    }).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self._httpd.server_address[1]}/v1"
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    def __enter__(self) -> "FakeOpenAIServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._httpd.shutdown()
+        self._httpd.server_close()
@@ -0,0 +1,32 @@
+from src.extraction_pipeline.extractors.anchor_matcher import AnchorMatcher
+from src.extraction_pipeline.extractors.word_index import WordIndex
+
+WORDS = [
+    (10.0, 10.0, 60.0, 20.0, "INSCRICAO", 0, 0, 0),
+    (10.0, 50.0, 40.0, 60.0, "Data", 1, 0, 0),
+    (45.0, 50.0, 90.0, 60.0, "Base:", 1, 0, 1),
+    (95.0, 50.0, 150.0, 60.0, "05/09/2025", 1, 0, 2),
+    (10.0, 70.0, 90.0, 80.0, "Valor", 2, 0, 0),
+    (95.0, 70.0, 150.0, 80.0, "Parcela:", 2, 0, 1),
+]
+
+
+def test_finds_all_anchors_in_one_pass_with_accent_folding():
+    matcher = AnchorMatcher(["Inscrição", "Data Base:", "Valor Parcela:", "Cidade:"])
+    anchors = matcher.find_all(WordIndex(WORDS))
+
+    assert anchors["Inscrição"][4] == "INSCRICAO"
+    assert anchors["Data Base:"][4] == "Base:"
+    assert anchors["Valor Parcela:"][4] == "Parcela:"
+    assert anchors["Cidade:"] is None
+
+
+def test_unknown_anchor_is_compiled_on_demand():
+    matcher = AnchorMatcher([])
+    assert matcher.find_all(WordIndex(WORDS), ["Base:"])["Base:"][4] == "Base:"
+
+
+def test_many_anchors_share_the_trie():
+    matcher = AnchorMatcher([f"Rotulo{i}:" for i in range(500)] + ["Data Base:"])
+    anchors = matcher.find_all(WordIndex(WORDS), ["Data Base:", "Rotulo7:"])
+    assert anchors == {"Data Base:": WORDS[2], "Rotulo7:": None}
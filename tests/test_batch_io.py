@@ -0,0 +1,79 @@
+import json
+import os
+import subprocess
+import sys
+import pytest
+from src.extraction_pipeline import batch_io
+from src.extraction_pipeline.batch_io import DatasetError, JsonlResultWriter, iter_dataset
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_json_array_is_streamed_item_by_item(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch_io, "READ_CHUNK", 7)
+    items = [{"label": "a", "n": 10 ** i, "s": "ç [x], {y}"} for i in range(6)]
+    path = tmp_path / "dataset.json"
+    path.write_text(json.dumps(items, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    assert [item for _, item in iter_dataset(str(path))] == items
+    assert [index for index, _ in iter_dataset(str(path), start=4)] == [4, 5]
+
+
+def test_jsonl_keeps_indices_stable_across_broken_lines(tmp_path):
+    path = tmp_path / "dataset.jsonl"
+    path.write_text('{"n": 0}\n{broken\n\n{"n": 2}\n', encoding="utf-8")
+    assert list(iter_dataset(str(path))) == [(0, {"n": 0}), (1, None), (2, {"n": 2})]
+
+
+def test_resume_drops_lines_after_the_checkpoint(tmp_path):
+    out = str(tmp_path / "out.jsonl")
+    writer = JsonlResultWriter(out, checkpoint_every=2, checkpoint_interval=3600)
+    for index in range(3):
+        writer.write(index, {"result": index})
+    # Crash: the third line is on disk but was never checkpointed.
+
+    resumed = JsonlResultWriter(out, resume=True)
+    assert resumed.next_index == 2
+    resumed.write(2, {"result": 2})
+    resumed.close()
+    with open(out, encoding="utf-8") as f:
+        assert [json.loads(line)["index"] for line in f] == [0, 1, 2]
+
+
+def test_resume_without_checkpoint_keeps_the_output(tmp_path):
+    out = tmp_path / "out.jsonl"
+    with JsonlResultWriter(str(out)) as writer:
+        for index in range(3):
+            writer.write(index, {"result": index})
+    os.remove(f"{out}.checkpoint")
+    with open(out, "a", encoding="utf-8") as f:
+        f.write('{"index": 3, "res')
+
+    resumed = JsonlResultWriter(str(out), resume=True)
+    assert resumed.next_index == 3
+    resumed.close()
+    with open(out, encoding="utf-8") as f:
+        assert [json.loads(line)["index"] for line in f] == [0, 1, 2]
+
+    os.remove(f"{out}.checkpoint")
+    out.write_text("not results\n", encoding="utf-8")
+    with pytest.raises(DatasetError):
+        JsonlResultWriter(str(out), resume=True)
+    assert out.read_text(encoding="utf-8") == "not results\n"
+
+
+def test_cli_resume_skips_completed_items(tmp_path):
+    os.symlink(os.path.join(ROOT, "data"), tmp_path / "data")
+    item = {"label": "carteira_oab", "pdf_path": "oab_1.pdf", "extraction_schema": {"inscricao": "Número"}}
+    (tmp_path / "items.jsonl").write_text("\n".join(json.dumps(item) for _ in range(3)) + "\n", encoding="utf-8")
+    run = [sys.executable, os.path.join(ROOT, "main.py"), "--input", "items.jsonl", "--output", "out.jsonl"]
+
+    subprocess.run(run, cwd=tmp_path, check=True, capture_output=True)
+    with open(tmp_path / "items.jsonl", "a", encoding="utf-8") as f:
+        f.write(json.dumps(item) + "\n")
+    second = subprocess.run(run + ["--resume"], cwd=tmp_path, check=True, capture_output=True, text=True)
+
+    assert "skipping the first 3 item(s)" in second.stdout
+    lines = [json.loads(line) for line in (tmp_path / "out.jsonl").read_text(encoding="utf-8").splitlines()]
+    assert [line["index"] for line in lines] == [0, 1, 2, 3]
+    assert all(line["result"] == {"inscricao": "101943"} for line in lines)
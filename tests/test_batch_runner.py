@@ -0,0 +1,92 @@
+import pytest
+from src.extraction_pipeline.batch_runner import BatchRunner, BatchSummary
+from src.extraction_pipeline.stats import percentile
+from src.extraction_pipeline.orchestrator import Orchestrator
+from src.extraction_pipeline.extractors.heuristic_extractor import HeuristicExtractor
+
+
+class InMemoryCache:
+    """Stands in for CacheExtractor without touching the cache files."""
+
+    def __init__(self):
+        self.field_cache = {}
+
+    def lookup_fingerprint(self, fingerprint):
+        return None
+
+    def remember_fingerprint(self, fingerprint, pdf_hash):
+        pass
+
+    def check_field_cache(self, pdf_hash, schema):
+        known = self.field_cache.get(pdf_hash, {})
+        found = {f: known[f] for f in schema if f in known}
+        return found, {f: d for f, d in schema.items() if f not in known}
+
+    def save_field_cache(self, pdf_hash, schema, results):
+        self.field_cache.setdefault(pdf_hash, {}).update({f: results.get(f) for f in schema})
+
+    def content_signature(self, label, pdf_text):
+        return None
+
+    def check_content_cache(self, signature, schema):
+        return {}, schema
+
+    def save_content_cache(self, signature, schema, results):
+        pass
+
+    def extract_template(self, label, pdf_text, schema_to_find, index=None):
+        return {}, schema_to_find
+
+    def learn_template(self, label, llm_results, index=None):
+        pass
+
+
+class NoLlm:
+    def extract(self, pdf_text, extraction_schema):
+        return None
+
+
+@pytest.fixture
+def orchestrator() -> Orchestrator:
+    return Orchestrator(HeuristicExtractor(), InMemoryCache(), NoLlm())
+
+
+def test_percentile_nearest_rank():
+    values = [0.1 * i for i in range(1, 21)]
+    assert percentile(values, 50) == pytest.approx(1.0)
+    assert percentile(values, 95) == pytest.approx(1.9)
+    assert percentile([], 95) == 0.0
+
+
+def test_summary_docs_per_second():
+    summary = BatchSummary(documents=10, wall_time=2.0, latencies=[0.2] * 10)
+    assert summary.as_dict()["docs_per_s"] == 5.0
+
+
+def test_batch_results_keep_input_order(orchestrator: Orchestrator):
+    items = [
+        ("tela_sistema", "data/tela_sistema_1.pdf", {"data_referencia": "Data"}),
+        ("carteira_oab", "data/oab_1.pdf", {"inscricao": "Número"}),
+        ("carteira_oab", "data/oab_1.pdf", {"inscricao": "Número"}),
+    ]
+    runner = BatchRunner(orchestrator, workers=2, llm_concurrency=1)
+    outputs = list(runner.run(items))
+
+    assert [item for item, _, _ in outputs] == items
+    assert outputs[1][1]["inscricao"] == "101943"
+    assert runner.summary.documents == 3
+
+
+def test_batch_pulls_items_lazily(orchestrator: Orchestrator):
+    pulled = []
+
+    def items():
+        for i in range(20):
+            pulled.append(i)
+            yield ("carteira_oab", "data/oab_1.pdf", {"inscricao": "Número"})
+
+    runner = BatchRunner(orchestrator, workers=1, llm_concurrency=1, max_in_flight=3)
+    results = runner.run(items())
+    next(results)
+    assert len(pulled) <= 3
+    assert len(list(results)) == 19
@@ -0,0 +1,36 @@
+import random
+from benchmarks.run import run_benchmark, compare
+from benchmarks.synthetic import make_oab, make_tela
+from src.extraction_pipeline.pdf_parser import PdfParser
+
+
+def test_synthetic_pdfs_have_requested_pages_and_ground_truth(tmp_path):
+    path = str(tmp_path / "oab.pdf")
+    expected = make_oab(path, random.Random(1), pages=3, words_per_page=200)
+    parser = PdfParser(path)
+    _, text, words = parser.parse()
+    assert parser.page_count == 3
+    assert expected["inscricao"] in text
+    assert len(words) >= 150
+
+    path = str(tmp_path / "tela.pdf")
+    expected = make_tela(path, random.Random(1))
+    assert f"Data Base: {expected['data_base']}" in PdfParser(path).parse()[1]
+
+
+def test_benchmark_report_is_machine_readable(tmp_path):
+    report = run_benchmark(documents=4, pages=2, words_per_page=80, work_dir=str(tmp_path))
+    assert report["documents_processed"] == 4
+    assert {"stage_0", "parse", "stage_1"} <= set(report["stages_s"])
+    assert set(report["latency_s"]) == {"p50", "p95", "p99", "max", "total"}
+    assert report["llm"]["calls"] >= 1
+    assert report["memory"]["max_rss_mb"] > 0
+    assert 0 < report["accuracy"]["rate"] <= 1
+
+
+def test_compare_flags_only_regressions_beyond_tolerance():
+    baseline = {"docs_per_s": 10.0, "latency_s": {"p50": 0.1, "p95": 0.2}, "llm": {"calls": 4}}
+    assert compare(baseline, baseline, 0.1) == []
+    slower = {"docs_per_s": 7.0, "latency_s": {"p50": 0.105, "p95": 0.3}, "llm": {"calls": 4}}
+    messages = compare(slower, baseline, 0.1)
+    assert [m.split(":")[0] for m in messages] == ["docs_per_s", "latency_s.p95"]
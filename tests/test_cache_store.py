@@ -0,0 +1,202 @@
+import json
+import pytest
+from src.extraction_pipeline.cache_store import CacheStore, SqliteCacheStore, JsonCacheStore
+from src.extraction_pipeline.extractors.cache_extractor import CacheExtractor
+from src.extraction_pipeline.extractors.word_index import WordIndex
+
+
+def make_store(tmp_path, **kwargs) -> SqliteCacheStore:
+    kwargs.setdefault("migrate_from", None)
+    return SqliteCacheStore(str(tmp_path / "cache.sqlite"), **kwargs)
+
+
+def test_sqlite_roundtrip_survives_reopen(tmp_path):
+    store = make_store(tmp_path)
+    store.put_hash("abc", {"nome": "JOANA D'ARC"})
+    store.put_fingerprint("fp-1", "abc")
+    store.put_template("carteira_oab", "seccional", "PR")
+    assert store.get_hash("abc") == {"nome": "JOANA D'ARC"}
+    store.close()
+
+    reopened = make_store(tmp_path)
+    assert reopened.get_hash("abc") == {"nome": "JOANA D'ARC"}
+    assert reopened.get_fingerprint("fp-1") == "abc"
+    assert reopened.get_templates("carteira_oab") == {"seccional": "PR"}
+    reopened.close()
+
+
+def test_buffered_writes_visible_across_connections_after_flush(tmp_path):
+    writer = make_store(tmp_path, flush_every=1000, flush_interval=3600)
+    reader = make_store(tmp_path)
+
+    writer.put_hash("abc", {"x": 1})
+    assert reader.get_hash("abc") is None
+    writer.flush()
+    assert reader.get_hash("abc") == {"x": 1}
+
+    writer.close()
+    reader.close()
+
+
+def test_lru_eviction_keeps_recently_used(tmp_path):
+    store = make_store(tmp_path, max_hash_entries=2, flush_every=1)
+    store.put_hash("a", {"v": "a"})
+    store.put_hash("b", {"v": "b"})
+    store.get_hash("a")
+    store.put_fingerprint("fp-b", "b")
+    store.put_hash("c", {"v": "c"})
+    store.evict()
+
+    assert store.get_hash("a") is not None
+    assert store.get_hash("b") is None
+    assert store.get_hash("c") is not None
+    assert store.get_fingerprint("fp-b") is None
+    store.close()
+
+
+def test_eviction_uses_running_counts_and_drops_only_evicted_rows(tmp_path):
+    store = make_store(tmp_path, max_hash_entries=2, max_llm_entries=1, flush_every=100)
+    for h in ("a", "b", "a", "c"):
+        store.put_hash(h, {"v": h})
+    store.put_fingerprint("fp-c", "c")
+    store.put_llm_response("k1", "old")
+    store.put_llm_response("k1", "new")
+    store.flush()
+    counts = dict(store._conn.execute("SELECT tbl, n FROM entry_counts"))
+    assert counts["hash_cache"] == 3
+    assert counts["llm_cache"] == 1
+
+    store.evict()
+    counts = dict(store._conn.execute("SELECT tbl, n FROM entry_counts"))
+    assert counts["hash_cache"] == 2
+    assert store.get_hash("b") is None
+    assert store.get_fingerprint("fp-c") == "c"
+    assert store.get_llm_response("k1") == "new"
+    store.close()
+
+    reopened = make_store(tmp_path)
+    assert dict(reopened._conn.execute("SELECT tbl, n FROM entry_counts"))["hash_cache"] == 2
+    reopened.close()
+
+
+def test_field_rows_without_a_hash_result_survive_eviction(tmp_path):
+    store = make_store(tmp_path, max_hash_entries=1, flush_every=100)
+    store.put_fields("old", {("nome", "fp"): "A"})
+    store.flush()
+    store.put_fields("new", {("nome", "fp"): "B"})
+    store.put_fingerprint("fp-new", "new")
+    store.evict()
+
+    assert store.get_fields("old", [("nome", "fp")]) == {}
+    assert store.get_fields("new", [("nome", "fp")]) == {("nome", "fp"): "B"}
+    assert store.get_fingerprint("fp-new") == "new"
+    store.close()
+
+
+def test_store_filled_only_through_field_rows_is_trimmed(tmp_path):
+    store = make_store(tmp_path, max_hash_entries=10, flush_every=4)
+    for n in range(200):
+        store.put_fields(f"doc-{n}", {("nome", "fp"): n})
+    store.flush()
+
+    (count,) = store._conn.execute("SELECT COUNT(*) FROM hash_cache").fetchone()
+    assert count <= 10 + 4
+    assert store.get_fields("doc-0", [("nome", "fp")]) == {}
+    assert store.get_fields("doc-199", [("nome", "fp")]) == {("nome", "fp"): 199}
+    store.close()
+
+
+def test_ttl_expires_entries(tmp_path):
+    store = make_store(tmp_path, ttl_seconds=0)
+    store.put_hash("a", {"v": "a"})
+    store.flush()
+    assert store.get_hash("a") is None
+    store.close()
+
+
+def test_ttl_applies_to_field_and_content_rows(tmp_path):
+    store = make_store(tmp_path, ttl_seconds=0)
+    store.put_fields("a", {("nome", "fp"): "A"})
+    store.put_content("c", "tela", [1, 2], ["b1"], {("nome", "fp"): ("A", None)})
+    store.flush()
+    assert store.get_fields("a", [("nome", "fp")]) == {}
+    assert store.get_content("c", [("nome", "fp")]) == {}
+    store.close()
+
+
+def test_incomplete_backend_fails_when_built():
+    class Partial(CacheStore):
+        def get_hash(self, pdf_hash):
+            return None
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_json_migration_runs_once(tmp_path):
+    json_path = tmp_path / "cache_db.json"
+    json_path.write_text(json.dumps({
+        "hash_cache": {"abc": {"nome": "X"}},
+        "template_cache": {"tela_sistema": {"sistema": "CONSIGNADO"}}
+    }), encoding="utf-8")
+
+    store = make_store(tmp_path, migrate_from=str(json_path))
+    assert store.get_hash("abc") == {"nome": "X"}
+    assert store.get_templates("tela_sistema") == {"sistema": "CONSIGNADO"}
+    store.close()
+
+    json_path.write_text(json.dumps({"hash_cache": {"new": {"nome": "Y"}}}), encoding="utf-8")
+    store = make_store(tmp_path, migrate_from=str(json_path))
+    assert store.get_hash("new") is None
+    store.close()
+
+
+def test_legacy_hash_results_are_served_once_per_field(tmp_path):
+    json_path = tmp_path / "cache_db.json"
+    json_path.write_text(json.dumps({"hash_cache": {"abc": {"nome": "X", "cpf": "123"}}}), encoding="utf-8")
+    cache = CacheExtractor(make_store(tmp_path, migrate_from=str(json_path)))
+
+    found, remaining = cache.check_field_cache("abc", {"nome": "Nome", "inscricao": "Inscrição"})
+    assert found == {"nome": "X"}
+    assert remaining == {"inscricao": "Inscrição"}
+
+    found, remaining = cache.check_field_cache("abc", {"nome": "Nome", "cpf": "CPF"})
+    assert found == {"nome": "X", "cpf": "123"}
+    assert remaining == {}
+
+    # The legacy value was taken under the first description; a new one is a new field.
+    found, remaining = cache.check_field_cache("abc", {"nome": "Nome completo"})
+    assert found == {}
+    assert remaining == {"nome": "Nome completo"}
+    cache.close()
+
+
+def test_cache_extractor_works_with_json_store(tmp_path):
+    cache = CacheExtractor(JsonCacheStore(str(tmp_path / "cache_db.json")))
+    cache.remember_fingerprint("fp", "abc")
+    assert cache.lookup_fingerprint("fp") == "abc"
+    index = WordIndex([(10, 10, 60, 20, "Seccional", 0, 0, 0), (10, 25, 25, 35, "PR", 1, 0, 0)])
+    cache.learn_template("carteira_oab", {"seccional": "PR", "nome": None}, index)
+    cache.learn_template("carteira_oab", {"seccional": "PR"}, index)
+    found, remaining = cache.extract_template("carteira_oab", "... PR ...", {"seccional": "s", "nome": "n"}, index)
+    assert found == {"seccional": "PR"}
+    assert remaining == {"nome": "n"}
+
+
+def test_field_cache_is_keyed_by_field_and_description(tmp_path):
+    cache = CacheExtractor(make_store(tmp_path))
+    cache.save_field_cache("abc", {"nome": "Nome do profissional", "telefone": "Telefone"},
+                           {"nome": "JOANA D'ARC", "telefone": None})
+
+    found, remaining = cache.check_field_cache("abc", {
+        "nome": "Nome do profissional",
+        "telefone": "Telefone",
+        "inscricao": "Número de inscrição",
+    })
+    assert found == {"nome": "JOANA D'ARC", "telefone": None}
+    assert remaining == {"inscricao": "Número de inscrição"}
+
+    found, remaining = cache.check_field_cache("abc", {"nome": "Nome completo, em maiúsculas"})
+    assert found == {}
+    assert remaining == {"nome": "Nome completo, em maiúsculas"}
+    cache.close()
@@ -0,0 +1,104 @@
+import fitz
+import pytest
+from src.extraction_pipeline.cache_store import JsonCacheStore, SqliteCacheStore
+from src.extraction_pipeline.orchestrator import Orchestrator
+from src.extraction_pipeline.extractors import content_signature
+from src.extraction_pipeline.extractors.cache_extractor import CacheExtractor
+from src.extraction_pipeline.extractors.heuristic_extractor import HeuristicExtractor
+from tests.test_orchestrator import RecordingLlm
+
+SCHEMA = {"cliente": "Nome do cliente", "contrato": "Número do contrato", "cidade": "Cidade"}
+
+
+def statement(cliente: str, contrato: str, cidade: str = "Curitiba") -> str:
+    lines = [f"Extrato de operação {i}: parcela {i} de 48, situação em dia, sem encargos" for i in range(12)]
+    return "\n".join([f"Cliente {cliente}", f"Contrato {contrato} vigente", f"Cidade {cidade} PR", *lines])
+
+
+def answer(text: str):
+    fields = dict(line.split(" ", 1) for line in text.splitlines()[:3])
+    return {"cliente": fields["Cliente"], "contrato": fields["Contrato"].split()[0], "cidade": fields["Cidade"].split()[0]}
+
+
+class TextLlm(RecordingLlm):
+    """Answers from the text it was given, so reused values can be told apart from fresh ones."""
+
+    def extract(self, pdf_text, extraction_schema):
+        self.calls.append(dict(extraction_schema))
+        return {field: answer(pdf_text)[field] for field in extraction_schema}
+
+
+@pytest.fixture
+def cache(tmp_path) -> CacheExtractor:
+    cache = CacheExtractor(SqliteCacheStore(str(tmp_path / "cache.sqlite"), migrate_from=None))
+    yield cache
+    cache.close()
+
+
+def resolve(orchestrator: Orchestrator, label: str, pdf_hash: str, text: str):
+    run_budget = orchestrator.new_budget(label, pdf_hash)
+    result = orchestrator.resolve_remaining(label, pdf_hash, text, SCHEMA, {}, dict(SCHEMA), budget=run_budget)
+    return result, run_budget.trace.field_sources
+
+
+def test_near_duplicate_reuses_only_fields_with_unchanged_source_words(cache: CacheExtractor):
+    llm = TextLlm()
+    orchestrator = Orchestrator(HeuristicExtractor(), cache, llm)
+    resolve(orchestrator, "extrato", "hash-a", statement("MARIA SOUZA", "12345"))
+
+    result, sources = resolve(orchestrator, "extrato", "hash-b", statement("MARIA SOUZA", "99999"))
+    assert result == {"cliente": "MARIA SOUZA", "contrato": "99999", "cidade": "Curitiba"}
+    assert sources == {"cliente": "content", "cidade": "content", "contrato": "stage_3"}
+    assert llm.calls[-1] == {"contrato": "Número do contrato"}
+
+    # Same visible text, different bytes (re-export): everything comes from the content tier.
+    result, sources = resolve(orchestrator, "extrato", "hash-c", statement("MARIA SOUZA", "99999"))
+    assert result["contrato"] == "99999"
+    assert set(sources.values()) == {"content"}
+    assert len(llm.calls) == 2
+
+
+def test_other_labels_and_dissimilar_documents_do_not_match(cache: CacheExtractor):
+    llm = TextLlm()
+    orchestrator = Orchestrator(HeuristicExtractor(), cache, llm)
+    resolve(orchestrator, "extrato", "hash-a", statement("MARIA SOUZA", "12345"))
+
+    _, sources = resolve(orchestrator, "boleto", "hash-b", statement("MARIA SOUZA", "12345"))
+    assert set(sources.values()) == {"stage_3"}
+    _, sources = resolve(orchestrator, "extrato", "hash-c", "Cliente JOSE\nContrato 1 vigente\nCidade Lapa PR")
+    assert set(sources.values()) == {"stage_3"}
+
+
+def test_reexported_pdf_skips_the_llm(cache: CacheExtractor, tmp_path):
+    llm = RecordingLlm()
+    orchestrator = Orchestrator(HeuristicExtractor(), cache, llm)
+    paths = []
+    for i, author in enumerate(["original", "re-signed"]):
+        doc = fitz.open()
+        page = doc.new_page()
+        page.insert_text((72, 72), "Cliente MARIA SOUZA")
+        page.insert_text((72, 90), "Contrato 12345 vigente")
+        doc.set_metadata({"author": author})
+        paths.append(str(tmp_path / f"doc_{i}.pdf"))
+        doc.save(paths[-1])
+        doc.close()
+
+    first = orchestrator.run_document("extrato", paths[0], {"contrato": "Número do contrato"})
+    second = orchestrator.run_document("extrato", paths[1], {"contrato": "Número do contrato"})
+    assert first.result == second.result
+    assert second.field_sources == {"contrato": "content"}
+    assert len(llm.calls) == 1
+
+
+def test_json_store_finds_similar_documents(tmp_path):
+    store = JsonCacheStore(str(tmp_path / "cache_db.json"))
+    signature = content_signature.compute_signature("extrato", statement("MARIA SOUZA", "12345"))
+    store.put_content(signature.content_hash, "extrato", signature.minhash, signature.bands,
+                      {("cliente", "fp"): ("MARIA SOUZA", "CLIENTE MARIA SOUZA CONTRATO")})
+
+    reopened = JsonCacheStore(str(tmp_path / "cache_db.json"))
+    near = content_signature.compute_signature("extrato", statement("MARIA SOUZA", "99999"))
+    assert [h for h, _ in reopened.find_similar("extrato", near.bands)] == [signature.content_hash]
+    assert reopened.find_similar("boleto", near.bands) == []
+    assert reopened.get_content(signature.content_hash, [("cliente", "fp")]) == {
+        ("cliente", "fp"): ("MARIA SOUZA", "CLIENTE MARIA SOUZA CONTRATO")}
@@ -0,0 +1,22 @@
+from src.extraction_pipeline.context_filter import ContextFilter, estimate_tokens
+
+NOISE = "\n".join(f"linha de ruído {i} sem nada relevante" for i in range(2000))
+PAGE = NOISE + "\nCabeçalho\nData Base: 05/09/2025\n12/10/2025\nrodapé\n" + NOISE
+
+
+def test_keeps_clue_window_in_page_order():
+    context = ContextFilter().build("tela_sistema", PAGE, {"data_base": "Data base"})
+    assert context.split("\n") == ["Cabeçalho", "Data Base: 05/09/2025", "12/10/2025", "rodapé"]
+
+
+def test_output_never_exceeds_token_budget():
+    page = "\n".join(f"Produto: item {i}" for i in range(5000))
+    context = ContextFilter(max_tokens=100).build("tela_sistema", page, {"produto": "Produto"})
+    assert 0 < sum(estimate_tokens(line) for line in context.split("\n")) <= 100
+
+
+def test_higher_scoring_windows_win_under_budget():
+    page = "ver profissional\n\n\n\n\n\nTelefone Profissional: 3333-3333"
+    context = ContextFilter(max_tokens=12, window_before=0, window_after=0).build(
+        "tela_sistema", page, {"telefone_profissional": "Telefone do profissional"})
+    assert context == "Telefone Profissional: 3333-3333"
@@ -0,0 +1,81 @@
+import json
+import pytest
+from src.extraction_pipeline.extractors.heuristic_extractor import HeuristicExtractor
+from src.extraction_pipeline.extractors.heuristic_rules import RuleConfigError
+
+GRID_WORDS = [
+    (10.0, 100.0, 32.0, 112.0, "Data", 0, 0, 0),
+    (34.0, 100.0, 58.0, 112.0, "Base", 0, 0, 1),
+    (120.0, 100.0, 138.0, 112.0, "Qtd.", 0, 0, 2),
+    (140.0, 100.0, 182.0, 114.0, "Parcelas", 0, 0, 3),
+    # Values start above the labels' bottom edge (tightly packed grid).
+    (11.0, 112.5, 60.0, 124.0, "04/02/2021", 1, 0, 0),
+    (121.0, 112.5, 133.0, 124.0, "96", 1, 0, 1),
+]
+
+
+def _write_rules(tmp_path, rules) -> str:
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps(rules), encoding="utf-8")
+    return str(path)
+
+
+def test_label_selects_its_own_rules():
+    extractor = HeuristicExtractor()
+    words = [(10.0, 50.0, 60.0, 60.0, "Cidade:", 0, 0, 0), (70.0, 50.0, 160.0, 60.0, "Mozarlândia", 0, 0, 1)]
+
+    assert extractor.extract(words, {"cidade": "Cidade"}, label="tela_sistema")[0] == {"cidade": "Mozarlândia"}
+    assert extractor.extract(words, {"cidade": "Cidade"}, label="carteira_oab")[0] == {}
+    # Unknown label: every rule set is tried.
+    assert extractor.extract(words, {"cidade": "Cidade"}, label="novo_layout")[0] == {"cidade": "Mozarlândia"}
+
+
+def test_custom_rules_file_adds_a_label(tmp_path):
+    path = _write_rules(tmp_path, {
+        "boleto": {"vencimento": {"anchor": "Vencimento", "direction": "right", "pattern": r"\d{2}/\d{2}/\d{4}"}}
+    })
+    extractor = HeuristicExtractor(path)
+    words = [(10.0, 50.0, 80.0, 60.0, "Vencimento", 0, 0, 0), (90.0, 50.0, 160.0, 60.0, "10/01/2026", 0, 0, 1)]
+
+    found, remaining = extractor.extract(words, {"vencimento": "Data", "valor": "Valor"}, label="boleto")
+    assert found == {"vencimento": "10/01/2026"}
+    assert remaining == {"valor": "Valor"}
+
+
+def test_rule_list_falls_back_and_pattern_rejects_labels():
+    extractor = HeuristicExtractor()
+    schema = {"data_base": "Data base", "quantidade_parcelas": "Parcelas", "pesquisa_tipo": "Tipo"}
+    words = GRID_WORDS + [(10.0, 20.0, 40.0, 30.0, "Tipo:", 2, 0, 0), (50.0, 20.0, 90.0, 30.0, "Contrato:", 2, 0, 1)]
+
+    found, remaining = extractor.extract(words, schema, label="tela_sistema")
+    assert found == {"data_base": "04/02/2021", "quantidade_parcelas": "96"}
+    assert list(remaining) == ["pesquisa_tipo"]
+
+
+@pytest.mark.parametrize("rules", [
+    {"x": {"f": {"kind": "regex_soup"}}},
+    {"x": {"f": {"anchor": "A", "direction": "left"}}},
+    {"x": {"f": {"anchor": "A", "direction": "right", "colour": "red"}}},
+])
+def test_invalid_rules_fail_at_startup(tmp_path, rules):
+    with pytest.raises(RuleConfigError):
+        HeuristicExtractor(_write_rules(tmp_path, rules))
+
+
+def test_zone_rules_use_the_real_page_size():
+    from src.extraction_pipeline.extractors.word_table import WordTable
+    extractor = HeuristicExtractor()
+    schema = {"nome": "Nome", "situacao": "Situação"}
+    words = [(5.0, 6.0, 88.0, 40.0, "JOANA", 0, 0, 0),
+             (95.0, 6.0, 171.0, 40.0, "D'ARC", 0, 0, 1),
+             (770.0, 480.0, 888.0, 512.0, "SITUAÇÃO", 1, 0, 0),
+             (894.0, 480.0, 1005.0, 512.0, "REGULAR", 1, 0, 1)]
+
+    found, _ = extractor.extract(WordTable.from_words(words, (1056.0, 552.0)), schema, label="carteira_oab")
+    assert found == {"nome": "JOANA D'ARC", "situacao": "SITUAÇÃO REGULAR"}
+    # Without the page size an A4 page is assumed, and y=480 is not in its bottom 30%.
+    found, _ = extractor.extract(words, schema, label="carteira_oab")
+    assert "situacao" not in found
+
+    assert extractor.regions_for("carteira_oab", schema) == [(0.0, 0.0, 1.0, 0.25), (0.0, 0.7, 1.0, 1.0)]
+    assert extractor.regions_for("carteira_oab", {**schema, "inscricao": "Inscrição"}) is None
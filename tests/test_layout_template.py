@@ -0,0 +1,46 @@
+from src.extraction_pipeline.extractors.word_index import WordIndex
+from src.extraction_pipeline.extractors import layout_template
+
+
+def card(name, address_lines, shift=0.0):
+    """Same layout, different values (optionally shifted down the page)."""
+    words = [(10, 10 + shift, 120, 30 + shift, name, 0, 0, 0),
+             (10, 100 + shift, 90, 120 + shift, "Endereço", 1, 0, 0),
+             (95, 100 + shift, 180, 120 + shift, "Profissional", 1, 0, 1)]
+    for line_no, line in enumerate(address_lines):
+        x = 10.0
+        for word in line.split():
+            y0 = 125 + 25 * line_no + shift
+            words.append((x, y0, x + 10 * len(word), y0 + 20, word, 2 + line_no, 0, 0))
+            x += 10 * len(word) + 5
+    words.append((10, 250 + shift, 80, 270 + shift, "Telefone", 9, 0, 0))
+    return WordIndex(words)
+
+
+def test_locate_value_spans_words_and_lines():
+    index = card("JOANA", ["RUA DAS FLORES, 10", "CURITIBA - PR"])
+    ids = layout_template.locate_value(index, "Rua das Flores, 10 Curitiba - PR")
+    assert [index.words[i][4] for i in ids] == ["RUA", "DAS", "FLORES,", "10", "CURITIBA", "-", "PR"]
+    assert layout_template.locate_value(index, "AVENIDA BRASIL") is None
+
+
+def test_rule_is_trusted_only_after_it_predicts_a_new_document():
+    first = card("JOANA", ["RUA DAS FLORES, 10", "CURITIBA - PR"])
+    rule = layout_template.learn_rule(first, "RUA DAS FLORES, 10 CURITIBA - PR")
+    assert rule["anchors"][0]["text"] == "Endereço"
+    assert not layout_template.is_trusted(rule)
+
+    second = card("PEDRO", ["AV. BRASIL 500", "LONDRINA - PR"], shift=12)
+    assert layout_template.apply_rule(second, rule) == "AV. BRASIL 500 LONDRINA - PR"
+    rule = layout_template.learn_rule(second, "AV. BRASIL 500 LONDRINA - PR", rule)
+    assert layout_template.is_trusted(rule)
+    assert rule["anchors"][0]["seen"] == 2
+
+    third = card("MARIA", ["RUA XV DE NOVEMBRO 1", "MARINGA - PR"], shift=-5)
+    assert layout_template.apply_rule(third, rule) == "RUA XV DE NOVEMBRO 1 MARINGA - PR"
+
+
+def test_wrong_prediction_resets_the_rule():
+    rule = layout_template.learn_rule(card("JOANA", ["RUA A 1"]), "RUA A 1")
+    rule = layout_template.learn_rule(card("PEDRO", ["RUA B 2"]), "PEDRO", rule)
+    assert rule["confirmed"] == 0
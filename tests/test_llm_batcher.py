@@ -0,0 +1,101 @@
+import json
+import threading
+from types import SimpleNamespace
+from src.extraction_pipeline.extractors.llm_extractor import LlmExtractor
+from src.extraction_pipeline.extractors.llm_batcher import LlmBatcher
+from src.extraction_pipeline.telemetry import DocumentTrace, activate
+
+SCHEMA = {"cidade": "Cidade", "produto": "Produto"}
+
+
+class FakeClient:
+    """OpenAI-shaped client; `responder(prompt)` returns the JSON payload to send back."""
+
+    def __init__(self, responder):
+        self.prompts = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+        self._responder = responder
+
+    def _create(self, model, messages, response_format):
+        prompt = messages[0]["content"]
+        self.prompts.append(prompt)
+        content = json.dumps(self._responder(prompt))
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def batch_answer(prompt):
+    if "=== DOCUMENT" not in prompt:
+        return {"cidade": "single", "produto": "single"}
+    count = prompt.count("=== END DOCUMENT")
+    return {"documents": [{"document_id": i, "fields": {"cidade": f"doc{i}", "produto": "X"}} for i in range(count)]}
+
+
+def run_concurrently(batcher, texts, labels=None):
+    results = [None] * len(texts)
+
+    def call(i):
+        with activate(DocumentTrace(labels[i] if labels else "tela")):
+            results[i] = batcher.extract(texts[i], SCHEMA)
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(len(texts))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_full_batch_is_sent_as_one_request():
+    client = FakeClient(batch_answer)
+    batcher = LlmBatcher(LlmExtractor(client=client), max_batch_size=3, window_s=5)
+
+    results = run_concurrently(batcher, ["a", "b", "c"])
+
+    assert len(client.prompts) == 1
+    assert sorted(r["cidade"] for r in results) == ["doc0", "doc1", "doc2"]
+
+
+def test_partial_batch_response_falls_back_per_document():
+    def partial(prompt):
+        if "=== DOCUMENT" in prompt:
+            return {"documents": [{"document_id": 0, "fields": {"cidade": "doc0", "produto": "X"}}]}
+        return {"cidade": "single", "produto": "single"}
+
+    client = FakeClient(partial)
+    batcher = LlmBatcher(LlmExtractor(client=client), max_batch_size=2, window_s=5)
+
+    results = run_concurrently(batcher, ["a", "b"])
+
+    assert len(client.prompts) == 2
+    assert sorted(r["cidade"] for r in results) == ["doc0", "single"]
+
+
+def test_lone_document_uses_plain_call_after_window():
+    client = FakeClient(batch_answer)
+    batcher = LlmBatcher(LlmExtractor(client=client), max_batch_size=4, window_s=0.01)
+
+    assert batcher.extract("a", SCHEMA) == {"cidade": "single", "produto": "single"}
+    assert "=== DOCUMENT" not in client.prompts[0]
+
+
+def test_documents_of_different_labels_never_share_a_request():
+    client = FakeClient(batch_answer)
+    batcher = LlmBatcher(LlmExtractor(client=client), max_batch_size=2, window_s=5)
+
+    labels = ["tela", "oab", "tela", "oab"]
+    results = run_concurrently(batcher, [f"{label} {n}" for n, label in enumerate(labels)], labels)
+
+    assert len(client.prompts) == 2
+    assert sorted(("tela 0" in p and "tela 2" in p) or ("oab 1" in p and "oab 3" in p) for p in client.prompts) == [True, True]
+    assert sorted(r["cidade"] for r in results) == ["doc0", "doc0", "doc1", "doc1"]
+
+
+def test_failed_batch_call_is_not_retried_per_document():
+    def broken(prompt):
+        raise RuntimeError("provider down")
+
+    client = FakeClient(broken)
+    batcher = LlmBatcher(LlmExtractor(client=client), max_batch_size=3, window_s=5)
+
+    assert run_concurrently(batcher, ["a", "b", "c"]) == [None, None, None]
+    assert len(client.prompts) == 1
@@ -0,0 +1,61 @@
+import os
+from openai import OpenAI
+from src.extraction_pipeline.cache_store import SqliteCacheStore
+from src.extraction_pipeline.telemetry import MetricsRegistry
+from src.extraction_pipeline.extractors.llm_extractor import LlmExtractor
+from tests.fake_openai_server import FakeOpenAIServer
+
+SCHEMA = {"cidade": "Cidade", "produto": "Produto"}
+
+
+def make_extractor(server: FakeOpenAIServer, store, **kwargs) -> LlmExtractor:
+    client = OpenAI(base_url=server.base_url, api_key="test", max_retries=0)
+    return LlmExtractor(client=client, timeout_s=5, response_cache=store, **kwargs)
+
+
+def test_repeated_context_skips_the_network_across_instances(tmp_path):
+    db = str(tmp_path / "cache.sqlite")
+    registry = MetricsRegistry()
+    with FakeOpenAIServer(content=lambda prompt: {"cidade": "Curitiba", "produto": "X"}) as server:
+        store = SqliteCacheStore(db, migrate_from=None)
+        assert make_extractor(server, store).extract("Cidade: Curitiba", SCHEMA) == {"cidade": "Curitiba", "produto": "X"}
+        store.close()
+
+        reopened = SqliteCacheStore(db, migrate_from=None)
+        extractor = make_extractor(server, reopened, metrics=registry)
+        # Whitespace-only differences hit the same entry.
+        assert extractor.extract("Cidade:   Curitiba\n", SCHEMA) == {"cidade": "Curitiba", "produto": "X"}
+        assert extractor.extract("Cidade: Lapa", SCHEMA) is not None
+        reopened.close()
+
+    assert len(server.requests) == 2
+    assert registry.counter("llm_cache_lookups_total", model=extractor.model, outcome="hit") == 1
+    assert registry.counter("llm_cache_lookups_total", model=extractor.model, outcome="miss") == 1
+
+
+def test_document_comes_after_the_static_prefix():
+    extractor = LlmExtractor(client=object())
+    first = extractor._create_prompt("Cidade: Curitiba", SCHEMA)
+    second = extractor._create_prompt("Produto: CONSIGNADO", SCHEMA)
+    shared = os.path.commonprefix([first, second])
+
+    assert "Extraction Schema" in shared and '"produto"' in shared
+    assert "Curitiba" not in shared
+    assert first.index("Curitiba") > first.index('"produto"')
+
+
+def test_llm_entries_expire_and_are_size_capped(tmp_path):
+    store = SqliteCacheStore(str(tmp_path / "cache.sqlite"), migrate_from=None, llm_ttl_seconds=0.0)
+    store.put_llm_response("k", '{"a": 1}')
+    store.flush()
+    assert store.get_llm_response("k") is None
+    store.close()
+
+    store = SqliteCacheStore(str(tmp_path / "capped.sqlite"), migrate_from=None, max_llm_entries=2)
+    for key in ("a", "b", "c"):
+        store.put_llm_response(key, "{}")
+        store.flush()
+    store.evict()
+    assert store.get_llm_response("a") is None
+    assert store.get_llm_response("c") == "{}"
+    store.close()
@@ -0,0 +1,64 @@
+import time
+from openai import OpenAI
+from src.extraction_pipeline.extractors.llm_extractor import LlmExtractor
+from tests.fake_openai_server import FakeOpenAIServer
+
+SCHEMA = {"cidade": "Cidade"}
+
+
+def make_extractor(server: FakeOpenAIServer, **kwargs) -> LlmExtractor:
+    client = OpenAI(base_url=server.base_url, api_key="test", max_retries=0)
+    return LlmExtractor(client=client, **kwargs)
+
+
+def test_hedge_wins_when_first_request_stalls():
+    latencies = [2.0, 0.01]
+    with FakeOpenAIServer(latency=lambda n: latencies[n] if n < len(latencies) else 0.01,
+                          content=lambda prompt: {"cidade": "Mozarlândia"}) as server:
+        extractor = make_extractor(server, hedge_percentile=95, hedge_initial_delay_s=0.1, timeout_s=5)
+
+        start = time.perf_counter()
+        result = extractor.extract("Cidade: Mozarlândia", SCHEMA)
+        elapsed = time.perf_counter() - start
+
+    assert result == {"cidade": "Mozarlândia"}
+    assert elapsed < 1.0
+    assert extractor.hedge_stats["hedges_issued"] == 1
+    assert extractor.hedge_stats["hedges_won"] == 1
+
+
+def test_fast_responses_never_hedge():
+    with FakeOpenAIServer(latency=lambda n: 0.01, content=lambda prompt: {"cidade": "X"}) as server:
+        extractor = make_extractor(server, hedge_percentile=95, hedge_initial_delay_s=0.5, timeout_s=5)
+        for _ in range(12):
+            extractor.extract("Cidade: X", SCHEMA)
+
+    assert extractor.hedge_stats["hedges_issued"] == 0
+    assert extractor.hedge_delay() == extractor.hedge_min_delay_s
+
+
+def test_hard_timeout_returns_none():
+    with FakeOpenAIServer(latency=lambda n: 2.0, content=lambda prompt: {"cidade": "X"}) as server:
+        extractor = make_extractor(server, hedge_percentile=95, hedge_initial_delay_s=0.1, timeout_s=0.4)
+
+        start = time.perf_counter()
+        assert extractor.extract("Cidade: X", SCHEMA) is None
+        assert time.perf_counter() - start < 1.0
+
+    assert extractor.hedge_stats["timeouts"] == 1
+
+
+def test_losing_hedge_gives_its_slot_back():
+    latencies = [2.0, 0.01, 2.0, 0.01]
+    with FakeOpenAIServer(latency=lambda n: latencies[n] if n < len(latencies) else 0.01,
+                          content=lambda prompt: {"cidade": "X"}) as server:
+        extractor = make_extractor(server, max_concurrency=2, hedge_percentile=95,
+                                   hedge_initial_delay_s=0.1, timeout_s=5)
+        extractor.extract("Cidade: X", SCHEMA)
+
+        start = time.perf_counter()
+        assert extractor.extract("Cidade: X", SCHEMA) == {"cidade": "X"}
+        assert time.perf_counter() - start < 1.0
+
+    assert extractor.hedge_stats["hedges_issued"] == 2
+
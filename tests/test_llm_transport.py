@@ -0,0 +1,74 @@
+import time
+from src.extraction_pipeline.extractors.llm_extractor import LlmExtractor
+from src.extraction_pipeline.extractors.llm_transport import CircuitBreaker, TransportConfig, create_openai_client
+from src.extraction_pipeline.telemetry import MetricsRegistry
+from tests.fake_openai_server import FakeOpenAIServer
+
+SCHEMA = {"cidade": "Cidade"}
+
+
+def make_extractor(server: FakeOpenAIServer, transport: TransportConfig, **kwargs) -> LlmExtractor:
+    kwargs.setdefault("metrics", MetricsRegistry())
+    return LlmExtractor(client_factory=lambda: create_openai_client(transport, base_url=server.base_url, api_key="test"),
+                        transport=transport, **kwargs)
+
+
+def test_retryable_errors_are_retried_with_backoff():
+    statuses = [503, 429]
+    with FakeOpenAIServer(status=lambda n: statuses[n] if n < len(statuses) else 200,
+                          content=lambda prompt: {"cidade": "Goiás"}) as server:
+        extractor = make_extractor(server, TransportConfig(max_retries=2, backoff_base_s=0.01))
+        assert extractor.extract("Cidade: Goiás", SCHEMA) == {"cidade": "Goiás"}
+        assert len(server.requests) == 3
+        assert extractor.metrics.counter("llm_retries_total", model=extractor.model) == 2
+
+
+def test_client_errors_are_not_retried():
+    with FakeOpenAIServer(status=lambda n: 400) as server:
+        extractor = make_extractor(server, TransportConfig(max_retries=3, backoff_base_s=0.01))
+        assert extractor.extract("Cidade: X", SCHEMA) is None
+        assert len(server.requests) == 1
+        assert extractor.breaker.state == "closed"
+
+
+def test_breaker_short_circuits_during_an_outage_and_recovers():
+    healthy = {"up": False}
+    with FakeOpenAIServer(status=lambda n: 200 if healthy["up"] else 500,
+                          content=lambda prompt: {"cidade": "X"}) as server:
+        transport = TransportConfig(max_retries=0, breaker_failures=2, breaker_reset_s=0.3)
+        extractor = make_extractor(server, transport)
+        assert extractor.extract("Cidade: A", SCHEMA) is None
+        assert extractor.extract("Cidade: B", SCHEMA) is None
+        assert extractor.breaker.state == "open"
+
+        start = time.perf_counter()
+        assert extractor.extract("Cidade: C", SCHEMA) is None
+        assert time.perf_counter() - start < 0.1
+        assert len(server.requests) == 2
+        assert extractor.metrics.counter("llm_short_circuits_total", model=extractor.model) == 1
+
+        healthy["up"] = True
+        time.sleep(0.35)
+        assert extractor.extract("Cidade: D", SCHEMA) == {"cidade": "X"}
+        assert extractor.breaker.state == "closed"
+
+
+def test_half_open_breaker_lets_a_single_probe_through():
+    now = {"t": 0.0}
+    breaker = CircuitBreaker(failure_threshold=1, reset_s=10, clock=lambda: now["t"])
+    assert breaker.record_failure() is True
+    assert not breaker.allow()
+    now["t"] = 10.0
+    assert breaker.allow() and not breaker.allow()
+    assert breaker.record_failure() is True
+    assert breaker.state == "open" and not breaker.allow()
+
+
+def test_sequential_requests_reuse_one_keep_alive_connection():
+    with FakeOpenAIServer(content=lambda prompt: {"cidade": "X"}) as server:
+        extractor = make_extractor(server, TransportConfig(), max_concurrency=2, response_cache=None)
+        for i in range(5):
+            assert extractor.extract(f"Cidade: {i}", SCHEMA) == {"cidade": "X"}
+        assert len(server.requests) == 5
+        assert len(server.connections) == 1
+        assert extractor.transport.max_connections == 4
@@ -0,0 +1,158 @@
+import time
+import fitz
+import pytest
+from openai import OpenAI
+from src.extraction_pipeline.cache_store import SqliteCacheStore
+from src.extraction_pipeline.orchestrator import Orchestrator, scan_pages
+from src.extraction_pipeline.pdf_parser import PdfParser
+from src.extraction_pipeline.extractors.cache_extractor import CacheExtractor
+from src.extraction_pipeline.extractors.heuristic_extractor import HeuristicExtractor
+from src.extraction_pipeline.extractors.llm_extractor import LlmExtractor
+from src.extraction_pipeline.extractors.llm_transport import TransportConfig
+from src.extraction_pipeline.telemetry import MetricsRegistry
+from tests.fake_openai_server import FakeOpenAIServer
+
+
+class RecordingLlm:
+    """Fake LLM: answers every field with a fixed value and records the schemas it saw."""
+
+    def __init__(self):
+        self.calls = []
+
+    def extract(self, pdf_text, extraction_schema):
+        self.calls.append(dict(extraction_schema))
+        return {field: f"llm:{field}" for field in extraction_schema}
+
+
+@pytest.fixture
+def llm() -> RecordingLlm:
+    return RecordingLlm()
+
+
+@pytest.fixture
+def orchestrator(tmp_path, llm) -> Orchestrator:
+    store = SqliteCacheStore(str(tmp_path / "cache.sqlite"), migrate_from=None)
+    return Orchestrator(HeuristicExtractor(), CacheExtractor(store), llm)
+
+
+def test_stage_0_serves_known_fields_and_only_resolves_new_ones(orchestrator: Orchestrator, llm: RecordingLlm):
+    schema = {"inscricao": "Número de inscrição", "telefone_profissional": "Telefone"}
+    first, _ = orchestrator.process_document("carteira_oab", "data/oab_1.pdf", schema)
+    assert first["inscricao"] == "101943"
+    assert llm.calls == [{"telefone_profissional": "Telefone"}]
+
+    extended = {**schema, "endereco_profissional": "Endereço"}
+    second, _ = orchestrator.process_document("carteira_oab", "data/oab_1.pdf", extended)
+    assert second["inscricao"] == "101943"
+    assert second["telefone_profissional"] == "llm:telefone_profissional"
+    assert llm.calls[-1] == {"endereco_profissional": "Endereço"}
+
+    third, _ = orchestrator.process_document("carteira_oab", "data/oab_1.pdf", extended)
+    assert third == second
+    assert len(llm.calls) == 2
+
+
+class SlowLlm:
+    """Fake LLM that honours the timeout the way LlmExtractor does: gives up and returns None."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.timeouts = []
+
+    def extract(self, pdf_text, extraction_schema, timeout_s=None):
+        self.timeouts.append(timeout_s)
+        if timeout_s is not None and timeout_s < self.latency:
+            time.sleep(timeout_s)
+            return None
+        time.sleep(self.latency)
+        return {field: f"llm:{field}" for field in extraction_schema}
+
+
+def test_budget_returns_partial_result_and_does_not_cache_timed_out_fields(tmp_path):
+    store = SqliteCacheStore(str(tmp_path / "cache.sqlite"), migrate_from=None)
+    llm = SlowLlm(latency=5.0)
+    orchestrator = Orchestrator(HeuristicExtractor(), CacheExtractor(store), llm)
+    schema = {"inscricao": "Número de inscrição", "telefone_profissional": "Telefone"}
+
+    run = orchestrator.run_document("carteira_oab", "data/oab_1.pdf", schema, budget_s=1.5)
+    assert run.result == {"inscricao": "101943", "telefone_profissional": None}
+    assert run.timed_out_fields == ["telefone_profissional"]
+    assert run.time_taken < 3.0
+    assert llm.timeouts and llm.timeouts[0] <= 1.5
+    assert {"stage_0", "parse", "stage_1", "stage_3"} <= set(run.stage_times)
+
+    llm.latency = 0.0
+    second = orchestrator.run_document("carteira_oab", "data/oab_1.pdf", schema)
+    assert second.result["telefone_profissional"] == "llm:telefone_profissional"
+    assert second.timed_out_fields == []
+
+
+def test_llm_is_skipped_when_budget_is_nearly_spent(orchestrator: Orchestrator, llm: RecordingLlm):
+    schema = {"inscricao": "Número de inscrição", "telefone_profissional": "Telefone"}
+    run = orchestrator.run_document("carteira_oab", "data/oab_1.pdf", schema, budget_s=0.5)
+    assert run.result["inscricao"] == "101943"
+    assert run.timed_out_fields == ["telefone_profissional"]
+    assert llm.calls == []
+
+
+def make_statement(path, field_page, pages):
+    doc = fitz.open()
+    for page_no in range(pages):
+        page = doc.new_page()
+        page.insert_text((50, 60), f"Extrato pagina {page_no + 1}")
+        if page_no == field_page:
+            page.insert_text((50, 100), "Data Base: 01/02/2025")
+            page.insert_text((50, 120), "Sistema: CONSIGNADO")
+    doc.save(path)
+    doc.close()
+
+
+def test_stage_1_reads_later_pages_and_stops_once_resolved(orchestrator: Orchestrator, llm: RecordingLlm, tmp_path):
+    schema = {"data_base": "Data base", "sistema": "Sistema"}
+
+    on_third = str(tmp_path / "third.pdf")
+    make_statement(on_third, field_page=2, pages=5)
+    run = orchestrator.run_document("tela_sistema", on_third, schema)
+    assert run.result == {"data_base": "01/02/2025", "sistema": "CONSIGNADO"}
+    assert run.pages_read == 3
+    assert llm.calls == []
+
+    on_first = str(tmp_path / "first.pdf")
+    make_statement(on_first, field_page=0, pages=200)
+    run = orchestrator.run_document("tela_sistema", on_first, schema)
+    assert run.result["sistema"] == "CONSIGNADO"
+    assert run.pages_read == 1
+
+
+def test_zone_only_schema_lays_out_just_the_regions():
+    parser = PdfParser("data/oab_1.pdf")
+    scan = scan_pages(HeuristicExtractor(), parser, {"nome": "Nome", "situacao": "Situação"}, label="carteira_oab")
+    assert scan.stage_1_results == {"nome": "JOANA D'ARC", "situacao": "SITUAÇÃO REGULAR"}
+    assert not parser.parsed
+
+    parser = PdfParser("data/oab_1.pdf")
+    scan = scan_pages(HeuristicExtractor(), parser, {"nome": "Nome", "endereco": "Endereço"}, label="carteira_oab")
+    assert scan.stage_1_results == {"nome": "JOANA D'ARC"}
+    assert list(scan.remaining_schema) == ["endereco"]
+    assert parser.parsed and "Inscrição" in scan.pdf_text
+
+
+def test_fields_left_open_by_an_llm_outage_are_not_cached(tmp_path):
+    store = SqliteCacheStore(str(tmp_path / "cache.sqlite"), migrate_from=None)
+    with FakeOpenAIServer(content=lambda prompt: {"telefone_profissional": "(41) 3333-4444"}) as server:
+        llm = LlmExtractor(client=OpenAI(base_url=server.base_url, api_key="test", max_retries=0),
+                           transport=TransportConfig(breaker_failures=1, breaker_reset_s=60), metrics=MetricsRegistry())
+        orchestrator = Orchestrator(HeuristicExtractor(), CacheExtractor(store), llm, metrics=MetricsRegistry())
+        schema = {"inscricao": "Número de inscrição", "telefone_profissional": "Telefone"}
+
+        llm.breaker.record_failure()
+        run = orchestrator.run_document("carteira_oab", "data/oab_1.pdf", schema)
+        assert run.result == {"inscricao": "101943", "telefone_profissional": None}
+        assert run.timed_out_fields == ["telefone_profissional"]
+        assert server.requests == []
+
+        llm.breaker.record_success()
+        second = orchestrator.run_document("carteira_oab", "data/oab_1.pdf", schema)
+        assert second.result == {"inscricao": "101943", "telefone_profissional": "(41) 3333-4444"}
+        assert second.field_sources["telefone_profissional"] == "stage_3"
+        assert len(server.requests) == 1
@@ -0,0 +1,69 @@
+import hashlib
+import os
+import shutil
+import fitz
+from src.extraction_pipeline.pdf_parser import PdfParser
+
+PDF_PATH = "data/oab_1.pdf"
+
+
+def test_parse_matches_file_hash_and_accessors():
+    pdf_hash, text, words = PdfParser(PDF_PATH).parse()
+
+    with open(PDF_PATH, 'rb') as f:
+        assert pdf_hash == hashlib.sha256(f.read()).hexdigest()
+
+    fresh = PdfParser(PDF_PATH)
+    assert fresh.get_file_hash() == pdf_hash
+    assert fresh.extract_text() == text
+    assert fresh.extract_words() == words
+    assert "Inscrição" in [w[4] for w in words]
+
+
+def test_quick_fingerprint_tracks_mtime(tmp_path):
+    copy_path = tmp_path / "copy.pdf"
+    shutil.copyfile(PDF_PATH, copy_path)
+
+    first = PdfParser(str(copy_path)).get_quick_fingerprint()
+    assert first == PdfParser(str(copy_path)).get_quick_fingerprint()
+
+    stat = os.stat(copy_path)
+    os.utime(copy_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert PdfParser(str(copy_path)).get_quick_fingerprint() != first
+
+
+def make_pdf(path, pages):
+    doc = fitz.open()
+    for lines in pages:
+        page = doc.new_page()
+        for i, line in enumerate(lines):
+            page.insert_text((50, 80 + 20 * i), line)
+    doc.save(path)
+    doc.close()
+
+
+def test_iter_pages_lays_out_pages_on_demand(tmp_path):
+    path = str(tmp_path / "multi.pdf")
+    make_pdf(path, [["Primeira pagina"], ["Segunda pagina"], ["Terceira pagina"]])
+
+    parser = PdfParser(path)
+    pages = parser.iter_pages()
+    page_no, text, words = next(pages)
+    assert page_no == 0 and "Primeira" in text
+    assert parser.page_count == 3
+    assert [w[4] for w in next(pages)[2]] == ["Segunda", "pagina"]
+    pages.close()
+    assert [p[0] for p in PdfParser(path).iter_pages()] == [0, 1, 2]
+
+
+def test_region_words_are_a_clipped_subset_in_page_coordinates():
+    parser = PdfParser(PDF_PATH)
+    region_words = parser.extract_region_words([(0.0, 0.0, 1.0, 0.1), (0.0, 0.85, 1.0, 1.0)])
+    assert not parser.parsed
+    assert region_words.page_size == (1056.0, 552.0)
+
+    _, _, words = parser.parse()
+    assert {w[:5] for w in region_words} < {w[:5] for w in words}
+    texts = [w[4] for w in region_words]
+    assert "JOANA" in texts and "SITUAÇÃO" in texts
+    assert "Inscrição" not in texts
@@ -0,0 +1,79 @@
+import json
+import socket
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from src.extraction_pipeline.cache_store import SqliteCacheStore
+from src.extraction_pipeline.orchestrator import Orchestrator
+from src.extraction_pipeline.server import ExtractionServer
+from src.extraction_pipeline.telemetry import MetricsRegistry
+from src.extraction_pipeline.extractors.cache_extractor import CacheExtractor
+from src.extraction_pipeline.extractors.heuristic_extractor import HeuristicExtractor
+from tests.test_orchestrator import RecordingLlm
+
+SCHEMA = {"inscricao": "Número de inscrição", "telefone_profissional": "Telefone"}
+
+
+@pytest.fixture
+def server(tmp_path):
+    store = SqliteCacheStore(str(tmp_path / "cache.sqlite"), migrate_from=None)
+    orchestrator = Orchestrator(HeuristicExtractor(), CacheExtractor(store), RecordingLlm(), metrics=MetricsRegistry())
+    with ExtractionServer(orchestrator, port=0) as server:
+        yield server
+    store.close()
+
+
+def request(server: ExtractionServer, method: str, path: str, body=None):
+    conn = http.client.HTTPConnection(server.address.removeprefix("http://"), timeout=10)
+    conn.request(method, path, body=json.dumps(body) if body is not None else None)
+    response = conn.getresponse()
+    data = response.read()
+    conn.close()
+    return response.status, data
+
+
+def test_extract_then_cache_hit_and_stats(server: ExtractionServer):
+    item = {"label": "carteira_oab", "pdf_path": "data/oab_1.pdf", "extraction_schema": SCHEMA}
+    status, body = request(server, "POST", "/extract", item)
+    first = json.loads(body)
+    assert status == 200
+    assert first["result"] == {"inscricao": "101943", "telefone_profissional": "llm:telefone_profissional"}
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        answers = list(pool.map(lambda _: request(server, "POST", "/extract", item), range(8)))
+    for status, body in answers:
+        assert status == 200
+        assert json.loads(body)["field_sources"] == {"inscricao": "stage_0", "telefone_profissional": "stage_0"}
+
+    stats = json.loads(request(server, "GET", "/stats")[1])
+    assert stats["requests"] == 9 and stats["errors"] == 0 and stats["in_flight"] == 0
+    assert request(server, "GET", "/health")[0] == 200
+    assert b"extraction_documents_total" in request(server, "GET", "/metrics")[1]
+
+
+def test_bad_requests_are_rejected(server: ExtractionServer):
+    assert request(server, "POST", "/extract", {"label": "carteira_oab"})[0] == 400
+    missing = {"label": "carteira_oab", "pdf_path": "data/missing.pdf", "extraction_schema": SCHEMA}
+    assert request(server, "POST", "/extract", missing)[0] == 404
+    assert request(server, "GET", "/nope")[0] == 404
+    for budget_s in ("5", -1, 0, True, [1]):
+        bad_budget = {"label": "carteira_oab", "pdf_path": "data/oab_1.pdf", "extraction_schema": SCHEMA,
+                      "budget_s": budget_s}
+        assert request(server, "POST", "/extract", bad_budget)[0] == 400
+
+
+def test_unix_socket(tmp_path):
+    store = SqliteCacheStore(str(tmp_path / "cache.sqlite"), migrate_from=None)
+    orchestrator = Orchestrator(HeuristicExtractor(), CacheExtractor(store), RecordingLlm(), metrics=MetricsRegistry())
+    path = str(tmp_path / "extract.sock")
+    with ExtractionServer(orchestrator, unix_socket=path):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(path)
+        sock.sendall(b"GET /health HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n")
+        reply = b""
+        while chunk := sock.recv(4096):
+            reply += chunk
+        sock.close()
+    store.close()
+    assert reply.startswith(b"HTTP/1.1 200")
+    assert b'"status": "ok"' in reply
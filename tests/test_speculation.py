@@ -0,0 +1,136 @@
+import time
+import fitz
+import pytest
+from src.extraction_pipeline.cache_store import SqliteCacheStore
+from src.extraction_pipeline.orchestrator import Orchestrator
+from src.extraction_pipeline.speculation import FieldHitRates
+from src.extraction_pipeline.stage_router import StageRouter
+from src.extraction_pipeline.telemetry import MetricsRegistry
+from src.extraction_pipeline.extractors.cache_extractor import CacheExtractor
+from src.extraction_pipeline.extractors.heuristic_extractor import HeuristicExtractor
+from tests.test_orchestrator import RecordingLlm
+
+SCHEMA = {"cidade": "Cidade", "observacao": "Observação do atendimento"}
+
+
+class SlowLlm(RecordingLlm):
+    def extract(self, pdf_text, extraction_schema):
+        time.sleep(0.3)
+        return super().extract(pdf_text, extraction_schema)
+
+
+class StalledSpeculationLlm(RecordingLlm):
+    """The third call (the speculative one of the third document) hangs past the LLM timeout."""
+    timeout_s = 0.2
+
+    def extract(self, pdf_text, extraction_schema):
+        if len(self.calls) == 2:
+            self.calls.append(dict(extraction_schema))
+            time.sleep(1.0)
+            return None
+        return super().extract(pdf_text, extraction_schema)
+
+
+class SlowHeuristics(HeuristicExtractor):
+    def extract(self, *args, **kwargs):
+        time.sleep(0.3)
+        return super().extract(*args, **kwargs)
+
+
+def make_pdf(tmp_path, n: int, with_city: bool = True) -> str:
+    doc = fitz.open()
+    page = doc.new_page()
+    if with_city:
+        page.insert_text((72, 72), "Cidade: Goiânia")
+    page.insert_text((72, 90), f"Protocolo {n} Observação: cliente retornou")
+    path = str(tmp_path / f"tela_{n}.pdf")
+    doc.save(path)
+    doc.close()
+    return path
+
+
+@pytest.fixture
+def metrics() -> MetricsRegistry:
+    return MetricsRegistry()
+
+
+def make_orchestrator(tmp_path, llm, metrics, heuristics=None) -> Orchestrator:
+    store = SqliteCacheStore(str(tmp_path / "cache.sqlite"), migrate_from=None)
+    router = StageRouter(store)
+    return Orchestrator(heuristics or HeuristicExtractor(), CacheExtractor(store, content_cache=False), llm,
+                        metrics=metrics, speculative=True, router=router,
+                        hit_rates=FieldHitRates(router, min_observations=2))
+
+
+def test_hit_rates_read_the_router_stats_and_need_enough_observations():
+    router = StageRouter()
+    rates = FieldHitRates(router, min_observations=3, miss_threshold=0.6)
+    for _ in range(2):
+        router.record("tela", "stage_1", {"cidade": True, "observacao": False})
+        router.record("tela", "stage_3", {"observacao": True})
+    assert rates.likely_unresolved("tela", SCHEMA) == {}
+    router.record("tela", "stage_1", {"cidade": False, "observacao": False})
+    router.record("tela", "stage_3", {"cidade": True, "observacao": False})
+    assert rates.likely_unresolved("tela", SCHEMA) == {"observacao": "Observação do atendimento"}
+    assert rates.miss_rate("tela", "cidade") == pytest.approx(1 / 3)
+    assert rates.miss_rate("tela", "produto") is None
+    assert rates.miss_rate("outra", "observacao") is None
+
+
+def test_llm_call_overlaps_the_heuristics_for_usually_missed_fields(tmp_path, metrics):
+    llm = SlowLlm()
+    orchestrator = make_orchestrator(tmp_path, llm, metrics, SlowHeuristics())
+    for n in range(2):
+        orchestrator.run_document("tela_sistema", make_pdf(tmp_path, n), SCHEMA)
+    assert metrics.counter("llm_speculation_total", label="tela_sistema", outcome="used") == 0
+
+    start = time.perf_counter()
+    run = orchestrator.run_document("tela_sistema", make_pdf(tmp_path, 2), SCHEMA)
+    elapsed = time.perf_counter() - start
+
+    assert run.result == {"cidade": "Goiânia", "observacao": "llm:observacao"}
+    assert run.field_sources == {"cidade": "stage_1", "observacao": "stage_3"}
+    assert llm.calls[-1] == {"observacao": "Observação do atendimento"}
+    assert metrics.counter("llm_speculation_total", label="tela_sistema", outcome="used") == 1
+    assert elapsed < 0.5
+
+
+def test_missed_fields_outside_the_speculation_get_their_own_call(tmp_path, metrics):
+    llm = RecordingLlm()
+    orchestrator = make_orchestrator(tmp_path, llm, metrics)
+    for n in range(2):
+        orchestrator.run_document("tela_sistema", make_pdf(tmp_path, n), SCHEMA)
+
+    run = orchestrator.run_document("tela_sistema", make_pdf(tmp_path, 2, with_city=False), SCHEMA)
+    assert run.result == {"cidade": "llm:cidade", "observacao": "llm:observacao"}
+    assert sorted(map(tuple, llm.calls[-2:])) == [("cidade",), ("observacao",)]
+    assert metrics.counter("llm_speculation_total", label="tela_sistema", outcome="partial") == 1
+
+
+def test_speculation_is_discarded_when_the_heuristics_resolve_everything(tmp_path, metrics):
+    llm = RecordingLlm()
+    orchestrator = make_orchestrator(tmp_path, llm, metrics)
+    for n in range(2):
+        orchestrator.run_document("tela_sistema", make_pdf(tmp_path, n, with_city=False), {"cidade": "Cidade"})
+    assert orchestrator.hit_rates.likely_unresolved("tela_sistema", {"cidade": "Cidade"})
+
+    run = orchestrator.run_document("tela_sistema", make_pdf(tmp_path, 2), {"cidade": "Cidade"})
+    assert run.result == {"cidade": "Goiânia"}
+    assert run.field_sources == {"cidade": "stage_1"}
+    assert metrics.counter("llm_speculation_total", label="tela_sistema", outcome="wasted") == 1
+
+
+def test_stalled_speculation_falls_back_to_a_regular_call(tmp_path, metrics):
+    llm = StalledSpeculationLlm()
+    orchestrator = make_orchestrator(tmp_path, llm, metrics)
+    for n in range(2):
+        orchestrator.run_document("tela_sistema", make_pdf(tmp_path, n), SCHEMA)
+
+    start = time.perf_counter()
+    run = orchestrator.run_document("tela_sistema", make_pdf(tmp_path, 2), SCHEMA)
+    elapsed = time.perf_counter() - start
+
+    assert run.result == {"cidade": "Goiânia", "observacao": "llm:observacao"}
+    assert len(llm.calls) == 4
+    assert metrics.counter("llm_speculation_total", label="tela_sistema", outcome="failed") == 1
+    assert elapsed < 0.8
@@ -0,0 +1,71 @@
+import fitz
+import pytest
+from src.extraction_pipeline.cache_store import JsonCacheStore, SqliteCacheStore
+from src.extraction_pipeline.orchestrator import Orchestrator
+from src.extraction_pipeline.stage_router import StageRouter
+from src.extraction_pipeline.extractors.cache_extractor import CacheExtractor
+from src.extraction_pipeline.extractors.heuristic_extractor import HeuristicExtractor
+from tests.test_orchestrator import RecordingLlm
+
+
+def test_hopeless_stage_is_skipped_explored_and_brought_back():
+    router = StageRouter(min_attempts=3, min_success_rate=0.2, explore_every=4)
+    for _ in range(3):
+        assert router.should_run("tela", "cidade", "stage_1")
+        router.record("tela", "stage_1", {"cidade": False}, 0.003)
+
+    decisions = [router.should_run("tela", "cidade", "stage_1") for _ in range(8)]
+    assert decisions == [False, False, False, True, False, False, False, True]
+    assert router.should_run("tela", "cidade", "stage_3")
+    assert router.should_run("outra", "cidade", "stage_1")
+
+    router.record("tela", "stage_1", {"cidade": True})
+    assert router.should_run("tela", "cidade", "stage_1")
+    (_, stats, routed), = router.rows("tela")
+    assert (stats.attempts, stats.successes, stats.skipped, routed) == (4, 1, 8, True)
+    assert stats.mean_latency_ms == pytest.approx(2.25)
+
+
+def test_stats_persist_in_both_stores(tmp_path):
+    opens = [lambda: SqliteCacheStore(str(tmp_path / "cache.sqlite"), migrate_from=None),
+             lambda: JsonCacheStore(str(tmp_path / "cache_db.json"))]
+    for open_store in opens:
+        store = open_store()
+        StageRouter(store, min_attempts=2).record("oab", "stage_2", {"nome": True, "inscricao": False}, 0.01)
+        store.close()
+
+        reopened = open_store()
+        rows = {key: stats for key, stats, _ in StageRouter(reopened).rows()}
+        assert rows[("oab", "nome", "stage_2")].successes == 1
+        assert rows[("oab", "inscricao", "stage_2")].attempts == 1
+        reopened.close()
+
+
+def make_pdf(tmp_path, n: int) -> str:
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), f"Protocolo {n} sem os campos esperados")
+    path = str(tmp_path / f"tela_{n}.pdf")
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def test_orchestrator_routes_fields_around_a_failing_heuristic(tmp_path):
+    store = SqliteCacheStore(str(tmp_path / "cache.sqlite"), migrate_from=None)
+    router = StageRouter(store, min_attempts=2, explore_every=100)
+    llm = RecordingLlm()
+    orchestrator = Orchestrator(HeuristicExtractor(), CacheExtractor(store, content_cache=False), llm, router=router)
+    schema = {"cidade": "Cidade", "observacao": "Observação"}
+
+    for n in range(3):
+        run = orchestrator.run_document("tela_sistema", make_pdf(tmp_path, n), schema)
+        assert run.result == {"cidade": "llm:cidade", "observacao": "llm:observacao"}
+
+    rows = {key: (stats, routed) for key, stats, routed in router.rows("tela_sistema")}
+    stats, routed = rows[("tela_sistema", "cidade", "stage_1")]
+    assert (stats.attempts, stats.skipped, routed) == (2, 1, False)
+    assert ("tela_sistema", "observacao", "stage_1") not in rows
+    assert rows[("tela_sistema", "cidade", "stage_3")][0].successes == 3
+    assert "skip" in router.format_table("tela_sistema")
+    store.close()
@@ -0,0 +1,40 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(ROOT, "main.py")
+PDF = os.path.join(ROOT, "data", "oab_1.pdf")
+SCHEMA = json.dumps({"inscricao": "Número de inscrição"})
+
+# Total import time of a cached single-file run. It is ~0.1s with lazy
+# imports and ~0.9s when openai/fitz are imported eagerly.
+IMPORT_BUDGET_S = 0.35
+
+
+def run_main(cwd, *flags):
+    command = [sys.executable, *flags, MAIN, "--file", PDF, "--label", "carteira_oab", "--schema", SCHEMA]
+    return subprocess.run(command, cwd=cwd, capture_output=True, text=True, timeout=60, check=True)
+
+
+def imported_modules(importtime_log: str):
+    """(module, self time in s) from `python -X importtime` output."""
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        if self_us.strip().isdigit():
+            yield name.strip(), int(self_us) / 1e6
+
+
+def test_cached_document_skips_heavy_imports(tmp_path):
+    first = run_main(tmp_path)
+    assert '"inscricao": "101943"' in first.stdout
+
+    cached = run_main(tmp_path, "-X", "importtime")
+    assert "stage_0=" in cached.stdout
+
+    modules = dict(imported_modules(cached.stderr))
+    assert not {"openai", "fitz", "dotenv", "numpy"} & set(modules)
+    assert sum(modules.values()) < IMPORT_BUDGET_S
@@ -0,0 +1,76 @@
+import json
+from openai import OpenAI
+from src.extraction_pipeline.cache_store import SqliteCacheStore
+from src.extraction_pipeline.orchestrator import Orchestrator
+from src.extraction_pipeline.telemetry import DocumentTrace, MetricsRegistry, activate
+from src.extraction_pipeline.extractors.cache_extractor import CacheExtractor
+from src.extraction_pipeline.extractors.heuristic_extractor import HeuristicExtractor
+from src.extraction_pipeline.extractors.llm_extractor import LlmExtractor
+from tests.fake_openai_server import FakeOpenAIServer
+from tests.test_orchestrator import RecordingLlm
+
+
+def test_prometheus_output_has_cumulative_buckets_and_escaped_labels():
+    registry = MetricsRegistry(buckets=(0.1, 1.0))
+    registry.inc("documents_total", label='tela "x"')
+    registry.inc("documents_total", label='tela "x"')
+    for value in (0.05, 0.5, 3.0):
+        registry.observe("stage_duration_seconds", value, stage="parse")
+
+    text = registry.to_prometheus()
+    assert "# TYPE extraction_documents_total counter" in text
+    assert 'extraction_documents_total{label="tela \\"x\\""} 2' in text
+    assert 'extraction_stage_duration_seconds_bucket{stage="parse",le="0.1"} 1' in text
+    assert 'extraction_stage_duration_seconds_bucket{stage="parse",le="1"} 2' in text
+    assert 'extraction_stage_duration_seconds_bucket{stage="parse",le="+Inf"} 3' in text
+    assert 'extraction_stage_duration_seconds_count{stage="parse"} 3' in text
+    assert 'extraction_stage_duration_seconds_sum{stage="parse"} 3.55' in text
+
+
+def test_json_lines_holds_traces_then_metrics():
+    registry = MetricsRegistry()
+    trace = DocumentTrace("carteira_oab", "a.pdf")
+    with trace.span("parse"):
+        pass
+    trace.set_source(["nome"], "stage_1")
+    registry.record_trace(trace)
+
+    lines = [json.loads(line) for line in registry.to_json_lines().splitlines()]
+    assert [line["type"] for line in lines] == ["trace", "metrics"]
+    assert lines[0]["field_sources"] == {"nome": "stage_1"}
+    assert registry.counter("fields_resolved_total", label="carteira_oab", source="stage_1") == 1
+    assert registry.histogram_count("stage_duration_seconds", stage="parse") == 1
+
+
+def test_run_document_is_traced_and_silent(tmp_path, capsys):
+    registry = MetricsRegistry()
+    store = SqliteCacheStore(str(tmp_path / "cache.sqlite"), migrate_from=None)
+    orchestrator = Orchestrator(HeuristicExtractor(), CacheExtractor(store), RecordingLlm(), metrics=registry)
+    schema = {"inscricao": "Número de inscrição", "telefone_profissional": "Telefone"}
+
+    run = orchestrator.run_document("carteira_oab", "data/oab_1.pdf", schema)
+    again = orchestrator.run_document("carteira_oab", "data/oab_1.pdf", schema)
+    store.close()
+
+    assert run.field_sources == {"inscricao": "stage_1", "telefone_profissional": "stage_3"}
+    assert again.field_sources == {"inscricao": "stage_0", "telefone_profissional": "stage_0"}
+    assert {"hash", "parse", "stage_1", "stage_3"} <= {span["name"] for span in run.trace.spans}
+    assert registry.counter("documents_total", label="carteira_oab") == 2
+    assert registry.counter("fields_resolved_total", label="carteira_oab", source="stage_0") == 2
+    assert capsys.readouterr() == ("", "")
+
+
+def test_llm_tokens_are_recorded_on_the_caller_trace():
+    registry = MetricsRegistry()
+    with FakeOpenAIServer(latency=lambda n: 0.01, content=lambda prompt: {"cidade": "X"}) as server:
+        client = OpenAI(base_url=server.base_url, api_key="test", max_retries=0)
+        extractor = LlmExtractor(client=client, timeout_s=5, max_concurrency=1, metrics=registry)
+        trace = DocumentTrace("tela_sistema")
+        with activate(trace):
+            assert extractor.extract("Cidade: X", {"cidade": "Cidade"}) == {"cidade": "X"}
+
+    assert trace.llm_requests == 1
+    assert trace.llm_tokens["completion"] == 5 and trace.llm_tokens["prompt"] > 0
+    assert "llm_wait" in {span["name"] for span in trace.spans}
+    assert registry.counter("llm_tokens_total", model=extractor.model, kind="completion") == 5
+    assert registry.histogram_count("llm_request_seconds", model=extractor.model) == 1
@@ -0,0 +1,40 @@
+from src.extraction_pipeline.extractors.word_index import WordIndex
+
+WORDS = [
+    (10.0, 50.0, 60.0, 60.0, "Tipo:", 0, 0, 0),
+    (120.0, 50.5, 160.0, 60.0, "CPF", 0, 0, 1),
+    (70.0, 51.0, 110.0, 60.0, "de", 0, 0, 2),
+    (12.0, 80.0, 50.0, 90.0, "101943", 1, 0, 0),
+    (12.0, 120.0, 50.0, 130.0, "Outro", 2, 0, 0),
+    (500.0, 700.0, 560.0, 710.0, "SITUAÇÃO", 3, 0, 0),
+]
+
+
+def test_on_line_returns_words_sorted_by_x():
+    index = WordIndex(WORDS)
+    assert [w[4] for w in index.on_line(50.0, 60.0)] == ["Tipo:", "de", "CPF"]
+
+
+def test_first_below_picks_top_most_word_in_column():
+    index = WordIndex(WORDS)
+    assert index.first_below(62.0, 5.0, 65.0)[4] == "101943"
+    assert index.first_below(200.0, 5.0, 65.0) is None
+
+
+def test_zone_and_text_lookups():
+    index = WordIndex(WORDS)
+    assert [index.words[i][4] for i in index.in_zone(400, 600)] == ["SITUAÇÃO"]
+    assert index.first_with_text(["OUTRO", "CPF"])[4] == "CPF"
+
+
+def test_word_table_is_columnar_and_round_trips():
+    import pickle
+    from src.extraction_pipeline.extractors.word_table import WordTable
+
+    table = WordTable.from_words(WORDS)
+    assert table.y0.dtype.name == "float64" and table.block.dtype.name == "int32"
+    assert table.upper[5] == "SITUAÇÃO" and table.upper[1] is table.text[1]
+    assert list(table) == WORDS and table[3] == WORDS[3]
+    assert pickle.loads(pickle.dumps(table)) == WORDS
+    assert table.leading_above(60.0).tolist() == [0, 1, 2]
+    assert WordIndex(table).table is table